@@ -0,0 +1,67 @@
+"""需要予測と在庫日数の計算時間のベンチマーク
+
+製品数を変えて、出庫履歴の日別集計（store.daily_quantities）・予測の
+当てはめ（utils/forecast.py の fit）・在庫日数の表の作成にかかる時間を測る。
+
+使い方:
+    python scripts/benchmark_forecast.py
+    python scripts/benchmark_forecast.py --sizes 1000,10000 --transactions 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.forecast import HISTORY_DAYS, cover_table, fit  # noqa: E402
+from utils.ledger import SHIPMENT  # noqa: E402
+from utils.storage import MemoryStore  # noqa: E402
+from utils.synthetic import populate  # noqa: E402
+
+
+def _ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="需要予測の計算時間")
+    parser.add_argument("--sizes", default="1000,10000", help="製品数（カンマ区切り）")
+    parser.add_argument(
+        "--transactions", type=int, default=1_000_000, help="入出庫の件数"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="繰り返し回数")
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    since = datetime.combine(today - timedelta(days=HISTORY_DAYS), datetime.min.time())
+    for size in [int(s) for s in args.sizes.split(",")]:
+        store = MemoryStore()
+        populate(store, products=size, orders=0, transactions=args.transactions)
+        names = store.product_names()
+        times = {"日別集計": [], "予測": [], "在庫日数の表": []}
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            history = store.daily_quantities(SHIPMENT, since, HISTORY_DAYS)
+            times["日別集計"].append(_ms(started))
+            started = time.perf_counter()
+            model = fit(history)
+            times["予測"].append(_ms(started))
+            model.update(products=names, today=today)
+            started = time.perf_counter()
+            cover_table(model, store.products_table(), 14)
+            times["在庫日数の表"].append(_ms(started))
+
+        print(f"製品 {size:,}件・入出庫 {args.transactions:,}件（{HISTORY_DAYS}日分）")
+        for name, values in times.items():
+            print(f"  {name:　<6} {statistics.median(values):8.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""ライブ更新1回あたりのコストのベンチマーク
+
+台帳・注文の件数を変えて、少数の変更（入出庫・注文の追加とステータス
+変更）のあとに画面の表を最新にするコストを、表全体を作り直す場合と
+差分だけを反映する場合（utils/live.py）で比べる。差分の反映は
+変更の件数で決まり、履歴の件数にはほとんどよらないことを確かめる。
+
+使い方:
+    python scripts/benchmark_live.py
+    python scripts/benchmark_live.py --sizes 10000,100000,1000000 --events 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.live import LiveOrders, LiveTables, LiveTransactions  # noqa: E402
+from utils.orders import PENDING  # noqa: E402
+from utils.storage import MemoryStore  # noqa: E402
+from utils.synthetic import SHIPPED, populate  # noqa: E402
+
+
+def _cases(today):
+    """表示名 -> (LiveTable の種類とパラメータ, 作り直す関数)"""
+    return {
+        "注文一覧": (
+            (LiveOrders,),
+            lambda store: store.orders_table(),
+        ),
+        "未出荷注文": (
+            (LiveOrders, PENDING),
+            lambda store: store.orders_table(PENDING),
+        ),
+        "最新20件": (
+            (LiveTransactions, 20),
+            lambda store: store.transaction_table(limit=20),
+        ),
+        "本日の出庫": (
+            (LiveTransactions, None, None, "出庫", today),
+            lambda store: store.transaction_table(type="出庫", since=today),
+        ),
+    }
+
+
+def _change(store, rng, names, events: int) -> None:
+    """入出庫・注文の追加・ステータス変更を合わせて events 件"""
+    for i in range(events):
+        product = rng.choice(names)
+        kind = i % 4
+        if kind < 2:
+            store.receive(product, rng.randint(1, 5), "ライブ更新の計測")
+        elif kind == 2:
+            store.add_order("計測", product, 1, "2030-01-01")
+        else:
+            order_id = rng.randint(1, store.order_book.next_id - 1)
+            store.set_order_status(order_id, rng.choice([PENDING, SHIPPED]))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ライブ更新のコストの比較")
+    parser.add_argument(
+        "--sizes", default="10000,100000", help="台帳・注文の件数（カンマ区切り）"
+    )
+    parser.add_argument("--events", type=int, default=20, help="更新の間の変更件数")
+    parser.add_argument("--repeat", type=int, default=10, help="繰り返し回数")
+    args = parser.parse_args(argv)
+
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    cases = _cases(today)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        store = MemoryStore()
+        populate(store, products=200, orders=size, transactions=size)
+        names = store.product_names()
+        rng = random.Random(0)
+        tables = LiveTables()
+        for spec, _ in cases.values():
+            tables.get(store, *spec)
+
+        full = {name: [] for name in cases}
+        delta = {name: [] for name in cases}
+        for _ in range(args.repeat):
+            _change(store, rng, names, args.events)
+            for name, (spec, rebuild) in cases.items():
+                started = time.perf_counter()
+                rebuild(store)
+                full[name].append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                tables.get(store, *spec)
+                delta[name].append((time.perf_counter() - started) * 1000)
+
+        print(f"台帳・注文 {size:,}件、更新ごとに {args.events}件の変更")
+        for name in cases:
+            print(
+                f"  {name:　<6} 作り直し {statistics.median(full[name]):8.2f}ms"
+                f"  →  差分の反映 {statistics.median(delta[name]):6.2f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
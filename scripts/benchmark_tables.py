@@ -0,0 +1,79 @@
+"""表の作成とシリアライズのベンチマーク
+
+st.dataframe に渡す表を、pandas の DataFrame を経由する方法と
+Arrow テーブルを直接作る方法で作り、Streamlit がブラウザへ送る
+Arrow IPC のバイト列にするまでの時間とピークメモリを比べる。
+
+使い方:
+    python scripts/benchmark_tables.py
+    python scripts/benchmark_tables.py --rows 1000000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from streamlit.dataframe_util import convert_anything_to_arrow_bytes  # noqa: E402
+from utils.storage import MemoryStore  # noqa: E402
+from utils.synthetic import populate  # noqa: E402
+
+TRANSACTION_COLUMNS = ["datetime", "type", "quantity", "note"]
+ORDER_COLUMNS = ["customer", "quantity", "delivery_date", "status"]
+
+
+def _measure(build, repeat: int) -> dict:
+    """表を作って IPC にするまでの時間（中央値）とピークメモリ"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        convert_anything_to_arrow_bytes(build())
+        times.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    convert_anything_to_arrow_bytes(build())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": statistics.median(times), "peak_mb": peak / 2**20}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="表の作成とシリアライズの比較")
+    parser.add_argument("--rows", type=int, default=100_000, help="行数")
+    parser.add_argument("--repeat", type=int, default=5, help="繰り返し回数")
+    args = parser.parse_args(argv)
+
+    store = MemoryStore()
+    populate(store, products=200, orders=args.rows, transactions=args.rows)
+
+    cases = {
+        "入出庫": (
+            lambda: store.transaction_frame()[TRANSACTION_COLUMNS],
+            lambda: store.transaction_table().select(TRANSACTION_COLUMNS),
+        ),
+        "注文": (
+            lambda: pd.DataFrame(store.orders())[ORDER_COLUMNS],
+            lambda: store.orders_table().select(ORDER_COLUMNS),
+        ),
+    }
+    print(f"{args.rows:,}行")
+    for name, (via_pandas, via_arrow) in cases.items():
+        before = _measure(via_pandas, args.repeat)
+        after = _measure(via_arrow, args.repeat)
+        print(
+            f"  {name}  DataFrame {before['ms']:7.1f}ms {before['peak_mb']:6.1f}MB"
+            f"  →  Arrow {after['ms']:7.1f}ms {after['peak_mb']:6.1f}MB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
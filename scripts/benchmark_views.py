@@ -0,0 +1,242 @@
+"""表示モードごとのベンチマーク
+
+合成データ（utils/synthetic.py）を規模別に用意し、Streamlit の AppTest で
+アプリをヘッドレスに実行して、表示モードごとに再実行1回あたりの
+所要時間とピークメモリ（tracemalloc）を測る。結果は JSON に保存する。
+
+使い方:
+    python scripts/benchmark_views.py                         # small, medium
+    python scripts/benchmark_views.py --scales small,medium,large --db memory
+    python scripts/benchmark_views.py --compare data/benchmarks/前回.json
+
+測定項目（表示モードごと）:
+    cold_ms        表示モードを切り替えた直後の再実行（派生データの作成を含む）
+    warm_ms        そのまま再実行したときの中央値（キャッシュが効いた状態）
+    cold_peak_mb   派生データのキャッシュを空にして再実行したときのピークメモリ
+    warm_peak_mb   キャッシュが効いた状態での再実行のピークメモリ
+
+時間の測定中は tracemalloc を止めている（測定のオーバーヘッドを避けるため）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from utils.storage import MemoryStore, SQLiteStore  # noqa: E402
+from utils.synthetic import populate  # noqa: E402
+from views.common import shared_cache, shared_live_tables  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+
+# 規模（製品数, 注文数, 入出庫件数）
+SCALES = {
+    "small": (20, 200, 5_000),
+    "medium": (200, 2_000, 100_000),
+    "large": (1_000, 20_000, 1_000_000),
+}
+
+RESULTS_DIR = os.path.join(ROOT, "data", "benchmarks")
+
+# AppTest は再実行のたびにスクリプトをコンパイルし直し、その分の時間と
+# メモリ（app.py で数 MB）が測定値に上乗せされる。実際のサーバーと同じく
+# コンパイル結果をプロセス内で使い回す。
+_bytecode = {}
+_get_bytecode = ScriptCache.get_bytecode
+
+
+def _cached_bytecode(self, script_path):
+    script_path = os.path.abspath(script_path)
+    if script_path not in _bytecode:
+        _bytecode[script_path] = _get_bytecode(self, script_path)
+    return _bytecode[script_path]
+
+
+ScriptCache.get_bytecode = _cached_bytecode
+
+
+def _timed_run(at: AppTest) -> float:
+    started = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - started) * 1000
+
+
+def _peak_run(at: AppTest) -> float:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        at.run()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _errors(at: AppTest) -> list[str]:
+    return [e.message for e in at.exception]
+
+
+def _prepare_store(directory: str, backend: str, counts, seed: int) -> dict:
+    """合成データを入れたストアを用意し、アプリ用の環境変数を返す"""
+    snapshot = os.path.join(directory, "snapshot")
+    if backend == "memory":
+        # MemoryStore はプロセス内にしかないので、スナップショット経由で渡す
+        store = MemoryStore()
+        populate(store, *counts, seed=seed)
+        store.export_snapshot(snapshot)
+        return {"INVENTORY_DB": "memory", "INVENTORY_SNAPSHOT": snapshot}
+    path = os.path.join(directory, "bench.db")
+    store = SQLiteStore(path, snapshot)
+    try:
+        populate(store, *counts, seed=seed)
+    finally:
+        store.close()
+    return {"INVENTORY_DB": path, "INVENTORY_SNAPSHOT": snapshot}
+
+
+def bench_scale(name: str, backend: str, repeat: int, seed: int, timeout: float):
+    counts = SCALES[name]
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        env = _prepare_store(directory, backend, counts, seed)
+        populate_s = time.perf_counter() - started
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        # 共有ストアは前の規模のものが残っているので開き直させる
+        st.cache_resource.clear()
+        try:
+            at = AppTest.from_file(APP, default_timeout=timeout)
+            startup_ms = _timed_run(at)
+            errors = _errors(at)
+            print(f"  起動（データ読み込みを含む） {startup_ms:8.1f}ms")
+            views = {}
+            for view in at.sidebar.radio[0].options:
+                at.sidebar.radio[0].set_value(view)
+                cold_ms = _timed_run(at)
+                warm = [_timed_run(at) for _ in range(repeat)]
+                shared_cache().clear()
+                shared_live_tables().clear()
+                views[view] = {
+                    "cold_ms": round(cold_ms, 1),
+                    "warm_ms": round(statistics.median(warm), 1),
+                    "warm_runs_ms": [round(ms, 1) for ms in warm],
+                    "cold_peak_mb": round(_peak_run(at), 2),
+                    "warm_peak_mb": round(_peak_run(at), 2),
+                    "errors": _errors(at),
+                }
+                print(
+                    f"  {view:<8} cold {cold_ms:8.1f}ms  "
+                    f"warm {views[view]['warm_ms']:8.1f}ms  "
+                    f"peak {views[view]['cold_peak_mb']:7.1f}MB"
+                    + ("  (エラーあり)" if views[view]["errors"] else "")
+                )
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return {
+        "scale": name,
+        "products": counts[0],
+        "orders": counts[1],
+        "transactions": counts[2],
+        "populate_s": round(populate_s, 2),
+        "startup_ms": round(startup_ms, 1),
+        "startup_errors": errors,
+        "views": views,
+    }
+
+
+def compare(previous: dict, current: dict) -> None:
+    """前回の結果との比（今回 / 前回）を表示する"""
+    before = {
+        (s["scale"], v): m for s in previous["results"] for v, m in s["views"].items()
+    }
+    print(f"\n前回（{previous['created']}）との比較: 今回 / 前回")
+    for scale in current["results"]:
+        for view, metrics in scale["views"].items():
+            old = before.get((scale["scale"], view))
+            if old is None:
+                continue
+            ratios = "  ".join(
+                f"{key} {metrics[key] / old[key]:5.2f}x"
+                for key in ("cold_ms", "warm_ms", "cold_peak_mb")
+                if old[key]
+            )
+            print(f"  {scale['scale']:<6} {view:<8} {ratios}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="表示モードごとのベンチマーク")
+    parser.add_argument(
+        "--scales", default="small,medium", help=f"{','.join(SCALES)} から選ぶ"
+    )
+    parser.add_argument("--db", choices=["sqlite", "memory"], default="sqlite")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="キャッシュ後の再実行回数"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="再実行1回の上限（秒）"
+    )
+    parser.add_argument("--out", help=f"結果の JSON（省略時は {RESULTS_DIR} に保存）")
+    parser.add_argument("--compare", help="比較する前回の結果の JSON")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"不明な規模です: {', '.join(unknown)}")
+
+    results = []
+    for name in scales:
+        products, orders, transactions = SCALES[name]
+        print(
+            f"{name}: 製品 {products:,}・注文 {orders:,}・入出庫 {transactions:,}"
+            f"（{args.db}）"
+        )
+        results.append(bench_scale(name, args.db, args.repeat, args.seed, args.timeout))
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "backend": args.db,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, time.strftime("views-%Y%m%d-%H%M%S.json")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+    failed = any(s["startup_errors"] for s in results) or any(
+        v["errors"] for s in results for v in s["views"].values()
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
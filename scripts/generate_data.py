@@ -0,0 +1,68 @@
+"""合成データで空のストアを作る
+
+使い方:
+    python scripts/generate_data.py --db data/large.db --products 1000 \\
+        --orders 20000 --transactions 1000000
+
+作ったストアは INVENTORY_DB で指定してアプリから開ける。
+分布については utils/synthetic.py を参照。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import open_store  # noqa: E402
+from utils.synthetic import populate  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="合成データの生成")
+    parser.add_argument(
+        "--db", help="ストアのパス（省略時は INVENTORY_DB または data/inventory.db）"
+    )
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365, help="入出庫履歴の期間")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    store = open_store(args.db)
+    if not store.is_empty():
+        print("ストアが空ではありません。新しいパスを指定してください。")
+        store.close()
+        return 1
+
+    started = time.perf_counter()
+
+    def progress(rows):
+        print(f"\r入出庫 {rows:,}/{args.transactions:,}件", end="", flush=True)
+
+    try:
+        counts = populate(
+            store,
+            args.products,
+            args.orders,
+            args.transactions,
+            args.days,
+            args.seed,
+            progress=progress,
+        )
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n製品 {counts['products']:,}件・注文 {counts['orders']:,}件・"
+        f"入出庫 {counts['transactions']:,}件を登録しました（{elapsed:.1f}秒）"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
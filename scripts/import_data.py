@@ -0,0 +1,69 @@
+"""入出庫・注文を CSV / Parquet から一括取り込みする
+
+使い方:
+    python scripts/import_data.py transactions history.csv
+    python scripts/import_data.py orders orders.parquet --db data/inventory.db
+
+ファイルはチャンク単位で読み、全行の検証が通った場合だけ1回のコミットで
+反映する。エラーがあれば何も登録せずに終了コード 1 で終わる。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bulk_import import (  # noqa: E402
+    DEFAULT_CHUNK_ROWS,
+    FORMATS,
+    ChunkReader,
+    InvalidImportError,
+)
+from utils.storage import InsufficientStockError, open_store  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="入出庫・注文の一括取り込み")
+    parser.add_argument("kind", choices=["transactions", "orders"])
+    parser.add_argument("path", help="CSV または Parquet ファイル")
+    parser.add_argument(
+        "--db", help="ストアのパス（省略時は INVENTORY_DB または data/inventory.db）"
+    )
+    parser.add_argument("--format", choices=FORMATS, help="省略時は拡張子で判定")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    store = open_store(args.db)
+    if store.is_empty():
+        print("製品マスタが空です。先にアプリを起動して初期化してください。")
+        return 1
+
+    reader = ChunkReader(args.path, args.format, args.chunk_rows)
+    started = time.perf_counter()
+
+    def progress(rows):
+        fraction = f"{reader.fraction:.0%}" if reader.fraction is not None else "-"
+        print(f"\r{rows:,}行を検証・書き込み済み（{fraction}）", end="", flush=True)
+
+    try:
+        if args.kind == "transactions":
+            count = store.import_transactions(reader, progress)
+        else:
+            count = store.import_orders(reader, progress)
+    except (InvalidImportError, InsufficientStockError) as e:
+        print(f"\n取り込みを中止しました（何も登録していません）: {e}")
+        return 1
+    finally:
+        store.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n{count:,}件を取り込みました（{elapsed:.1f}秒）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
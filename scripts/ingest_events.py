@@ -0,0 +1,112 @@
+"""ドロップディレクトリの入出庫イベントを取り込む（アプリの外で動かす場合）
+
+アプリと同じ取り込みスレッド（utils/ingest.py）を単独で動かし、
+取り込み状況を定期的に表示する。--generate で合成イベントを置いて
+取り込み速度と遅延を確かめられる。同じディレクトリをアプリ
+（INVENTORY_INGEST_DIR）とこのスクリプトの両方で監視しないこと。
+
+使い方:
+    python scripts/ingest_events.py --dir data/inbox
+    python scripts/ingest_events.py --dir /tmp/inbox --generate 100000 --drain
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingest import DEFAULT_BATCH_EVENTS, IngestWorker, write_events  # noqa: E402
+from utils.ledger import RECEIPT, SHIPMENT  # noqa: E402
+from utils.storage import open_store  # noqa: E402
+
+DEFAULT_DIR = os.path.join("data", "inbox")
+
+
+def generate(directory: str, products, events: int, file_events: int) -> None:
+    """合成イベント（入庫が多め）を file_events 件ずつのファイルにして置く"""
+    rng = random.Random(0)
+    for lo in range(0, events, file_events):
+        write_events(
+            directory,
+            (
+                {
+                    "product": rng.choice(products),
+                    "type": RECEIPT if rng.random() < 0.8 else SHIPMENT,
+                    "quantity": rng.randint(1, 5),
+                }
+                for _ in range(min(file_events, events - lo))
+            ),
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="入出庫イベントの自動取り込み")
+    parser.add_argument(
+        "--dir",
+        default=os.environ.get("INVENTORY_INGEST_DIR", DEFAULT_DIR),
+        help="ドロップディレクトリ（省略時は INVENTORY_INGEST_DIR または data/inbox）",
+    )
+    parser.add_argument(
+        "--db", help="ストアのパス（省略時は INVENTORY_DB または data/inventory.db）"
+    )
+    parser.add_argument("--batch-events", type=int, default=DEFAULT_BATCH_EVENTS)
+    parser.add_argument(
+        "--generate", type=int, default=0, help="先に置く合成イベント数"
+    )
+    parser.add_argument("--file-events", type=int, default=100, help="1ファイルの件数")
+    parser.add_argument(
+        "--drain", action="store_true", help="ディレクトリが空になったら終了"
+    )
+    parser.add_argument("--interval", type=float, default=2.0, help="表示の間隔（秒）")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.db)
+    if store.is_empty():
+        print("製品マスタが空です。先にアプリを起動して初期化してください。")
+        return 1
+    if args.generate:
+        # 在庫が足りなくなる出庫の行は rejected/ に回る
+        generate(args.dir, store.product_names(), args.generate, args.file_events)
+        print(f"{args.generate:,}件のイベントを置きました: {args.dir}")
+
+    worker = IngestWorker(store, args.dir, args.batch_events).start()
+    started = time.perf_counter()
+    try:
+        while True:
+            time.sleep(args.interval)
+            stats = worker.stats()
+            print(
+                f"取り込み {stats['ingested']:,}件・除外 {stats['rejected']:,}件・"
+                f"未処理 {stats['backlog_files']}ファイル・"
+                f"遅延 {stats['lag_seconds']:.1f}秒"
+                + (
+                    f"・再試行待ち {stats['last_error']}"
+                    if stats["backoff_seconds"]
+                    else ""
+                )
+            )
+            if args.drain and not stats["backlog_files"]:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+        store.close()
+    elapsed = time.perf_counter() - started
+    stats = worker.stats()
+    last = stats["last_batch"] or {}
+    print(
+        f"{stats['ingested']:,}件を{stats['batches']}回のコミットで取り込みました"
+        f"（{elapsed:.1f}秒・{stats['ingested'] / elapsed:,.0f}件/秒、"
+        f"直近のコミット {last.get('commit_ms', 0)}ms）"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""新しいセッションの初回表示までの時間を測る
+
+新しいプロセスで AppTest を使ってアプリを1回実行し、次を測る。
+
+    import_ms          AppTest（= streamlit 本体）の import。
+                       サーバーでは起動時に済んでいる
+    cold_first_run_ms  プロセスで最初のセッションの初回実行
+                       （アプリ側の import を含む）
+    warm_first_run_ms  2つ目以降のセッションの初回実行（import 済み）
+    harness_ms         空のスクリプトを同じ手順で実行した時間。AppTest
+                       自体のコストなので、アプリの分はこれを引いて見る
+
+これをプロセスを替えて --trials 回繰り返し、中央値を JSON に保存する。
+
+使い方:
+    python scripts/measure_startup.py
+    python scripts/measure_startup.py --db path/to/inventory.db --trials 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+RESULTS_DIR = os.path.join(ROOT, "data", "benchmarks")
+
+SESSIONS = 5
+
+
+def _child() -> None:
+    """子プロセス側：1プロセス分を測って JSON を標準出力に書く"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    import_ms = (time.perf_counter() - started) * 1000
+    runs = []
+    for _ in range(SESSIONS):
+        at = AppTest.from_file(APP, default_timeout=600)
+        started = time.perf_counter()
+        at.run()
+        runs.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise SystemExit(at.exception[0].message)
+    # アプリの後に測る（先に測るとアプリの初回実行が温まってしまう）
+    harness = []
+    for _ in range(SESSIONS):
+        at = AppTest.from_string("import streamlit as st", default_timeout=600)
+        started = time.perf_counter()
+        at.run()
+        harness.append((time.perf_counter() - started) * 1000)
+    json.dump(
+        {
+            "import_ms": import_ms,
+            "cold_first_run_ms": runs[0],
+            "warm_first_run_ms": statistics.median(runs[1:]),
+            "harness_ms": statistics.median(harness[1:]),
+        },
+        sys.stdout,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="新しいセッションの初回表示の計測")
+    parser.add_argument(
+        "--db", help="ストアのパス（省略時は一時ファイルの SQLite）か memory"
+    )
+    parser.add_argument("--trials", type=int, default=5, help="プロセスを替える回数")
+    parser.add_argument("--out", help=f"結果の JSON（省略時は {RESULTS_DIR} に保存）")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child()
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env["INVENTORY_DB"] = args.db or os.path.join(directory, "startup.db")
+        env.setdefault("INVENTORY_SNAPSHOT", os.path.join(directory, "snapshot"))
+        trials = []
+        for i in range(args.trials):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            trials.append(json.loads(output))
+            print(
+                f"{i + 1}: 初回 {trials[-1]['cold_first_run_ms']:7.1f}ms  "
+                f"2セッション目以降 {trials[-1]['warm_first_run_ms']:6.1f}ms"
+            )
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "db": args.db or "sqlite",
+        "trials": trials,
+        **{
+            key: round(statistics.median(t[key] for t in trials), 1)
+            for key in (
+                "import_ms",
+                "cold_first_run_ms",
+                "warm_first_run_ms",
+                "harness_ms",
+            )
+        },
+    }
+    print(
+        f"中央値: streamlit の import {report['import_ms']}ms、"
+        f"プロセス初回 {report['cold_first_run_ms']}ms、"
+        f"2セッション目以降 {report['warm_first_run_ms']}ms"
+        f"（うち AppTest {report['harness_ms']}ms）"
+    )
+    out = args.out or os.path.join(
+        RESULTS_DIR, time.strftime("startup-%Y%m%d-%H%M%S.json")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
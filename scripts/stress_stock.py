@@ -0,0 +1,168 @@
+"""同時出庫の負荷試験
+
+複数スレッド（SQLite なら複数プロセスも）から同じ製品へ出庫を大量に
+同時に登録し、在庫がマイナスにならないこと、成功した出庫の合計と
+在庫の減少量・台帳の件数が一致することを確かめる。複数プロセスでは、
+出庫の前から開いていたストアで（他のプロセスの出庫を読み込んで）確かめる。
+
+使い方:
+    python scripts/stress_stock.py                        # SQLite・1プロセス
+    python scripts/stress_stock.py --processes 4          # SQLite・4プロセス
+    python scripts/stress_stock.py --db memory            # MemoryStore
+
+問題がなければ終了コード 0、食い違いがあれば 1 で終わる。
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ledger import SHIPMENT  # noqa: E402
+from utils.storage import InsufficientStockError, open_store  # noqa: E402
+
+PRODUCT = "負荷試験品"
+MAX_QUANTITY = 5
+
+
+def _ship_many(store, count: int, seed: int) -> tuple[int, int, int]:
+    """count 回出庫し、(成功件数, 成功した数量の合計, 在庫不足の件数) を返す"""
+    rng = random.Random(seed)
+    succeeded = shipped = rejected = 0
+    for _ in range(count):
+        quantity = rng.randint(1, MAX_QUANTITY)
+        try:
+            store.ship(PRODUCT, quantity, "負荷試験")
+        except InsufficientStockError:
+            rejected += 1
+        else:
+            succeeded += 1
+            shipped += quantity
+    return succeeded, shipped, rejected
+
+
+def _run_threads(store, threads: int, shipments: int, seed: int) -> dict:
+    """1つのストアに対して threads 本のスレッドから出庫する"""
+    results = []
+    lowest = [store.product(PRODUCT)["stock"]]
+    done = threading.Event()
+
+    def watch():
+        # 出庫の途中でも在庫数がマイナスにならないことを見張る
+        while not done.is_set():
+            lowest[0] = min(lowest[0], store.product(PRODUCT)["stock"])
+
+    def work(i):
+        results.append(_ship_many(store, shipments // threads, seed * 1000 + i))
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    done.set()
+    watcher.join()
+    return {
+        "succeeded": sum(r[0] for r in results),
+        "shipped": sum(r[1] for r in results),
+        "rejected": sum(r[2] for r in results),
+        "lowest": lowest[0],
+    }
+
+
+def _process_main(args) -> dict:
+    path, threads, shipments, seed = args
+    store = open_store(path)
+    try:
+        return _run_threads(store, threads, shipments, seed)
+    finally:
+        store.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="同時出庫の負荷試験")
+    parser.add_argument("--db", help="SQLite のパス（省略時は一時ファイル）か memory")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--shipments", type=int, default=4000, help="1プロセスあたり")
+    parser.add_argument("--stock", type=int, help="初期在庫（省略時は出庫の半分程度）")
+    args = parser.parse_args(argv)
+
+    if args.db == "memory" and args.processes > 1:
+        parser.error("MemoryStore はプロセス間で共有できません")
+    tmpdir = None
+    path = args.db
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "stress.db")
+    total_shipments = args.shipments * args.processes
+    # 平均数量 3 で全件の半分程度が成功する在庫にして、在庫切れ付近を競合させる
+    initial = args.stock if args.stock is not None else total_shipments * 3 // 2
+
+    store = open_store(path)
+    if store.product(PRODUCT) is None:
+        if not store.is_empty():
+            print(f"{path} は空ではありません。空のストアで実行してください。")
+            return 1
+        store.seed([{"name": PRODUCT, "stock": initial, "unit": "個"}], [], [])
+    initial = store.product(PRODUCT)["stock"]
+
+    started = time.perf_counter()
+    if args.processes == 1:
+        results = [_run_threads(store, args.threads, args.shipments, 0)]
+    else:
+        store.close()
+        jobs = [(path, args.threads, args.shipments, i) for i in range(args.processes)]
+        with multiprocessing.Pool(args.processes) as pool:
+            # ワーカーの起動後に開き直し（接続を fork に持ち越さない）、
+            # 開いたままのストアが他のプロセスの出庫を読み込めるかも確かめる
+            store = open_store(path)
+            results = pool.map(_process_main, jobs)
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(r["succeeded"] for r in results)
+    shipped = sum(r["shipped"] for r in results)
+    rejected = sum(r["rejected"] for r in results)
+    lowest = min(r["lowest"] for r in results)
+    final = store.product(PRODUCT)["stock"]
+    rows = len(store.transaction_frame(product=PRODUCT, type=SHIPMENT))
+    problems = store.check_consistency()
+    store.close()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    print(
+        f"{args.processes}プロセス × {args.threads}スレッド: 出庫 {succeeded:,}件成功・"
+        f"{rejected:,}件在庫不足（{elapsed:.1f}秒、"
+        f"{(succeeded + rejected) / elapsed:,.0f}件/秒）"
+    )
+    print(f"在庫 {initial:,} → {final:,}（出庫合計 {shipped:,}、最小 {lowest:,}）")
+
+    failures = []
+    if final < 0 or lowest < 0:
+        failures.append("在庫がマイナスになりました")
+    if initial - shipped != final:
+        failures.append(f"在庫の減少量が出庫合計と一致しません: {initial - final}")
+    if rows != succeeded:
+        failures.append(f"台帳の出庫件数が成功件数と一致しません: {rows}")
+    if problems:
+        failures.append(f"集計が台帳と一致しません: {problems}")
+    for failure in failures:
+        print(f"NG: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""工場在庫管理ダッシュボードの共通ユーティリティ"""
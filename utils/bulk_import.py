@@ -0,0 +1,227 @@
+"""CSV・Parquet からの一括取り込み
+
+ファイルはチャンク単位で読み、各チャンクを検証・正規化して
+ストアの import_transactions / import_orders に渡す。
+ファイル全体をメモリに載せることはない。
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.ledger import TYPES
+from utils.orders import PENDING, STATUSES
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+FORMATS = ("csv", "parquet")
+
+TRANSACTION_COLUMNS = ("datetime", "type", "product", "quantity")
+ORDER_COLUMNS = ("customer", "product", "quantity", "delivery_date")
+ORDER_FIELDS = ORDER_COLUMNS + ("status",)
+
+
+class InvalidImportError(ValueError):
+    """取り込みデータの不備（row はデータの行番号、1 始まり）"""
+
+    def __init__(self, message: str, row: int | None = None):
+        self.row = row
+        if row is not None:
+            message = f"{row}行目: {message}"
+        super().__init__(message)
+
+
+def detect_format(name: str) -> str:
+    """ファイル名の拡張子から形式（csv / parquet）を判定"""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext in (".csv", ".txt"):
+        return "csv"
+    raise InvalidImportError(f"対応していないファイル形式です: {name}")
+
+
+class ChunkReader:
+    """ファイルを DataFrame のチャンクとして順に読む
+
+    rows_read は読み終えた行数、fraction は読み終えた割合
+    （分からない場合は None）。
+    """
+
+    def __init__(
+        self, source, format: str | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS
+    ):
+        name = source if isinstance(source, str) else getattr(source, "name", "")
+        self.format = format or detect_format(name)
+        if self.format not in FORMATS:
+            raise InvalidImportError(f"対応していないファイル形式です: {self.format}")
+        self.source = source
+        self.chunk_rows = chunk_rows
+        self.rows_read = 0
+        self.fraction = None
+
+    def __iter__(self):
+        if self.format == "parquet":
+            yield from self._parquet_chunks()
+        else:
+            yield from self._csv_chunks()
+
+    def _csv_chunks(self):
+        handle = self.source
+        close = False
+        if isinstance(handle, str):
+            handle = open(handle, "rb")
+            close = True
+        try:
+            size = _remaining_size(handle)
+            start = handle.tell() if size else 0
+            reader = pd.read_csv(
+                handle,
+                chunksize=self.chunk_rows,
+                dtype=str,
+                keep_default_na=False,
+                skipinitialspace=True,
+            )
+            for chunk in reader:
+                self.rows_read += len(chunk)
+                if size:
+                    self.fraction = min((handle.tell() - start) / size, 1.0)
+                yield chunk
+            self.fraction = 1.0
+        finally:
+            if close:
+                handle.close()
+
+    def _parquet_chunks(self):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(self.source)
+        total = parquet.metadata.num_rows
+        for batch in parquet.iter_batches(batch_size=self.chunk_rows):
+            chunk = batch.to_pandas()
+            self.rows_read += len(chunk)
+            self.fraction = self.rows_read / total if total else 1.0
+            yield chunk
+        self.fraction = 1.0
+
+
+def _remaining_size(handle) -> int | None:
+    try:
+        position = handle.tell()
+        end = handle.seek(0, os.SEEK_END)
+        handle.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+def _check_columns(chunk: pd.DataFrame, required) -> None:
+    missing = [c for c in required if c not in chunk.columns]
+    if missing:
+        raise InvalidImportError(f"必要な列がありません: {', '.join(missing)}")
+
+
+def _first_bad(mask: np.ndarray, first_row: int) -> int | None:
+    bad = np.flatnonzero(mask)
+    return None if not len(bad) else first_row + int(bad[0])
+
+
+def _quantities(chunk: pd.DataFrame, first_row: int) -> np.ndarray:
+    quantity = pd.to_numeric(chunk["quantity"], errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+    row = _first_bad(
+        np.isnan(quantity) | (quantity <= 0) | (quantity != np.floor(quantity)),
+        first_row,
+    )
+    if row is not None:
+        raise InvalidImportError("数量は1以上の整数で指定してください", row)
+    return quantity.astype(np.int64)
+
+
+def _products(chunk: pd.DataFrame, first_row: int) -> np.ndarray:
+    products = chunk["product"].astype(str).str.strip().to_numpy(dtype=object)
+    row = _first_bad(products == "", first_row)
+    if row is not None:
+        raise InvalidImportError("製品名が空です", row)
+    return products
+
+
+def normalize_transactions(chunk: pd.DataFrame, first_row: int = 1) -> dict:
+    """入出庫のチャンクを検証し、列の配列にする
+
+    列は datetime, type, product, quantity（note は任意）。
+    返り値は ts（エポック秒）, type_code, product, quantity, note の dict。
+    first_row はチャンク先頭行の行番号（エラー表示用）。
+    """
+    _check_columns(chunk, TRANSACTION_COLUMNS)
+    datetimes = pd.to_datetime(chunk["datetime"], errors="coerce", format="mixed")
+    row = _first_bad(datetimes.isna().to_numpy(), first_row)
+    if row is not None:
+        raise InvalidImportError("日時を解釈できません", row)
+    ts = datetimes.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+    type_codes = (
+        chunk["type"]
+        .astype(str)
+        .str.strip()
+        .map({name: code for code, name in enumerate(TYPES)})
+    )
+    row = _first_bad(type_codes.isna().to_numpy(), first_row)
+    if row is not None:
+        raise InvalidImportError(f"種別は {'・'.join(TYPES)} のいずれかです", row)
+
+    if "note" in chunk.columns:
+        notes = chunk["note"].fillna("").astype(str).str.strip()
+        notes = notes.where(notes != "", "-").tolist()
+    else:
+        notes = ["-"] * len(chunk)
+
+    return {
+        "ts": ts,
+        "type_code": type_codes.to_numpy(dtype=np.int8),
+        "product": _products(chunk, first_row),
+        "quantity": _quantities(chunk, first_row),
+        "note": notes,
+    }
+
+
+def normalize_orders(chunk: pd.DataFrame, first_row: int = 1) -> dict:
+    """注文のチャンクを検証し、列ごとのリストにする
+
+    列は customer, product, quantity, delivery_date（status は任意で
+    STATUSES のいずれか、省略時は未出荷）。納期は "YYYY-MM-DD" に揃える。
+    """
+    _check_columns(chunk, ORDER_COLUMNS)
+    customers = chunk["customer"].astype(str).str.strip()
+    row = _first_bad((customers == "").to_numpy(), first_row)
+    if row is not None:
+        raise InvalidImportError("顧客名が空です", row)
+
+    dates = pd.to_datetime(chunk["delivery_date"], errors="coerce", format="mixed")
+    row = _first_bad(dates.isna().to_numpy(), first_row)
+    if row is not None:
+        raise InvalidImportError("納期を解釈できません", row)
+
+    if "status" in chunk.columns:
+        statuses = chunk["status"].fillna("").astype(str).str.strip()
+        statuses = statuses.where(statuses != "", PENDING)
+        row = _first_bad((~statuses.isin(STATUSES)).to_numpy(), first_row)
+        if row is not None:
+            raise InvalidImportError(
+                f"ステータスは {'・'.join(STATUSES)} のいずれかです", row
+            )
+        statuses = statuses.tolist()
+    else:
+        statuses = [PENDING] * len(chunk)
+
+    return {
+        "customer": customers.tolist(),
+        "product": _products(chunk, first_row).tolist(),
+        "quantity": _quantities(chunk, first_row).tolist(),
+        "delivery_date": dates.dt.strftime("%Y-%m-%d").tolist(),
+        "status": statuses,
+    }
@@ -0,0 +1,99 @@
+"""初回起動時に登録するデモデータ
+
+製品・注文・入出庫の定義はモジュールの定数として1度だけ作り、
+セッションごとには作り直さない。入出庫の日時は登録時点からの
+相対（何日・何時間前）で持つ。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+# 製品マスタ
+PRODUCTS = (
+    {"name": "製品A", "stock": 220, "unit": "個"},
+    {"name": "製品B", "stock": 185, "unit": "個"},
+    {"name": "製品C", "stock": 300, "unit": "個"},
+    {"name": "製品D", "stock": 145, "unit": "個"},
+    {"name": "製品E", "stock": 250, "unit": "個"},
+)
+
+# 注文リスト
+ORDERS = (
+    {
+        "customer": "株式会社サンプル商事",
+        "product": "製品A",
+        "quantity": 30,
+        "delivery_date": "2025-12-20",
+        "status": "未出荷",
+    },
+    {
+        "customer": "テスト工業株式会社",
+        "product": "製品B",
+        "quantity": 50,
+        "delivery_date": "2025-12-22",
+        "status": "未出荷",
+    },
+    {
+        "customer": "ダミー株式会社",
+        "product": "製品C",
+        "quantity": 100,
+        "delivery_date": "2025-12-25",
+        "status": "未出荷",
+    },
+    {
+        "customer": "サンプル物産",
+        "product": "製品A",
+        "quantity": 20,
+        "delivery_date": "2025-12-19",
+        "status": "出荷済",
+    },
+    {
+        "customer": "テストトレーディング",
+        "product": "製品E",
+        "quantity": 75,
+        "delivery_date": "2025-12-28",
+        "status": "未出荷",
+    },
+)
+
+# 入出庫履歴（何日・何時間前, 種別, 製品, 数量, 備考）。約10週間前から現在まで
+TRANSACTIONS = (
+    (70, 10, "入庫", "製品A", 150, "製造完了分"),
+    (65, 14, "出庫", "製品A", 80, "サンプル商事向け出荷"),
+    (56, 9, "入庫", "製品C", 200, "製造完了分"),
+    (49, 15, "出庫", "製品C", 100, "テスト工業向け出荷"),
+    (42, 11, "入庫", "製品B", 120, "製造完了分"),
+    (35, 13, "出庫", "製品B", 60, "ダミー株式会社向け出荷"),
+    (28, 10, "入庫", "製品E", 180, "製造完了分"),
+    (21, 16, "出庫", "製品E", 90, "サンプル物産向け出荷"),
+    (14, 9, "入庫", "製品D", 100, "製造完了分"),
+    (7, 14, "出庫", "製品D", 45, "テストトレーディング向け出荷"),
+    (5, 10, "入庫", "製品A", 100, "製造完了分"),
+    (4, 14, "出庫", "製品A", 50, "サンプル商事向け出荷"),
+    (3, 9, "入庫", "製品B", 80, "製造完了分"),
+    (2, 16, "出庫", "製品B", 30, "テスト工業向け出荷"),
+    (1, 11, "入庫", "製品E", 120, "製造完了分"),
+    (0, 5, "出庫", "製品C", 50, "ダミー株式会社向け出荷"),
+    (0, 2, "入庫", "製品A", 70, "製造完了分"),
+)
+
+
+def seed_demo_data(store) -> bool:
+    """ストアが空ならデモデータを登録する（登録したら True）"""
+    if not store.is_empty():
+        return False
+    base_date = datetime.now().replace(second=0, microsecond=0)
+    transactions = [
+        {
+            "datetime": base_date - timedelta(days=days, hours=hours),
+            "type": kind,
+            "product": product,
+            "quantity": quantity,
+            "note": note,
+        }
+        for days, hours, kind, product, quantity, note in TRANSACTIONS
+    ]
+    # ストアが dict をそのまま持つことがあるので、定数は渡さずコピーを渡す
+    store.seed([dict(p) for p in PRODUCTS], [dict(o) for o in ORDERS], transactions)
+    return True
@@ -0,0 +1,85 @@
+"""折れ線グラフ用の間引き"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TARGET_POINTS = 500
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets で残す点のインデックスを返す
+
+    先頭と末尾は必ず残し、間を threshold - 2 個のバケツに分けて
+    各バケツから三角形の面積が最大になる点を1つ選ぶ。
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_buckets(x: np.ndarray, y: np.ndarray, buckets: int) -> np.ndarray:
+    """時間を等幅のバケツに分け、各バケツの最小点・最大点のインデックスを返す
+
+    x は昇順であること。欠品（在庫0）のような極値を間引きで消さないために使う。
+    """
+    n = len(x)
+    if n == 0 or buckets < 1:
+        return np.empty(0, dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    edges = np.linspace(x[0], x[-1], buckets + 1)
+    group = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, buckets - 1)
+    # グループ内で y 昇順に並べると、各グループの先頭が最小・末尾が最大
+    order = np.lexsort((y, group))
+    sorted_group = group[order]
+    boundary = np.flatnonzero(np.diff(sorted_group)) + 1
+    first = np.concatenate([[0], boundary])
+    last = np.concatenate([boundary - 1, [n - 1]])
+    return np.unique(np.concatenate([order[first], order[last]]))
+
+
+def downsample(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    target_points: int = DEFAULT_TARGET_POINTS,
+) -> pd.DataFrame:
+    """折れ線グラフの点数を target_points 程度に抑える
+
+    点の半分を LTTB で、残りを時間バケツごとの最小・最大で選ぶ。
+    df は x 列の昇順に並んでいること。
+    """
+    n = len(df)
+    if n <= target_points:
+        return df
+    xs = df[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype("datetime64[s]").astype(np.int64)
+    ys = df[y].to_numpy()
+
+    half = max(target_points // 2, 3)
+    keep = np.concatenate(
+        [lttb(xs, ys, half), minmax_buckets(xs, ys, max(half // 2, 1))]
+    )
+    return df.iloc[np.unique(keep)]
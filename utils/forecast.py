@@ -0,0 +1,153 @@
+"""出庫履歴からの需要予測と在庫日数（全製品をまとめて計算）
+
+製品 × 日の出庫数量の配列に、曜日の季節成分を持つ加法型の指数平滑法
+（Holt-Winters、トレンドなし、周期7日）を当てはめる。平滑化の係数は
+ALPHAS × GAMMAS の組み合わせを全製品について同時に計算し、1日先予測の
+二乗誤差が最小のものを製品ごとに選ぶ。日ごとのループは履歴の日数分だけで、
+製品の数についてはすべて numpy の配列演算になる。
+
+予測は7日周期の日別の出庫数（翌日から）で、在庫日数・在庫切れ予定日・
+目標日数分の不足数はそこから閉じた式で求める。
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+
+from utils.ledger import SHIPMENT
+
+SEASON_DAYS = 7
+# 当てはめに使う出庫履歴（12週）
+HISTORY_DAYS = 12 * SEASON_DAYS
+ALPHAS = (0.1, 0.3, 0.5)
+GAMMAS = (0.05, 0.2)
+
+FORECAST_SCHEMA = pa.schema(
+    [
+        ("name", pa.string()),
+        ("stock", pa.int64()),
+        ("daily_demand", pa.float64()),
+        ("days_of_cover", pa.float64()),
+        ("stockout_date", pa.date32()),
+        ("suggested", pa.int64()),
+    ]
+)
+
+
+def fit(history: np.ndarray) -> dict:
+    """製品 × 日の出庫数量（最後の列が最新の日）から需要を予測する
+
+    返り値は pattern（製品 × 7、翌日から7日分の予測出庫数）、製品ごとに
+    選んだ alpha・gamma、1日先予測の平均二乗誤差の平方根 rmse。
+    """
+    history = np.asarray(history, dtype=np.float64)
+    products, days = history.shape
+    if days < 2 * SEASON_DAYS:
+        raise ValueError(f"履歴は{2 * SEASON_DAYS}日以上必要です")
+    # 係数の組み合わせ × 製品の配列で、全組み合わせを同時に計算する
+    # （日ごとに参照する行が連続するよう、日・曜日を先頭の軸にする）
+    alpha = np.repeat(ALPHAS, len(GAMMAS))[:, None]
+    gamma = np.tile(GAMMAS, len(ALPHAS))[:, None]
+    daily = np.ascontiguousarray(history.T)
+    first_week = daily[:SEASON_DAYS]
+    level = np.broadcast_to(first_week.mean(axis=0), (len(alpha), products)).copy()
+    season = np.repeat((first_week - level[0])[:, None, :], len(alpha), axis=1)
+    squared = np.zeros_like(level)
+    for t in range(SEASON_DAYS, days):
+        actual = daily[t]
+        s = season[t % SEASON_DAYS]
+        error = actual - level - s
+        squared += error * error
+        level = alpha * (actual - s) + (1 - alpha) * level
+        season[t % SEASON_DAYS] = gamma * (actual - level) + (1 - gamma) * s
+
+    best = squared.argmin(axis=0)
+    columns = np.arange(products)
+    upcoming = (days + np.arange(SEASON_DAYS)) % SEASON_DAYS
+    pattern = (level[best, columns] + season[upcoming][:, best, columns]).T
+    return {
+        "pattern": np.clip(pattern, 0, None),
+        "alpha": alpha[best, 0],
+        "gamma": gamma[best, 0],
+        "rmse": np.sqrt(squared[best, columns] / (days - SEASON_DAYS)),
+    }
+
+
+def days_of_cover(stock, pattern: np.ndarray) -> np.ndarray:
+    """在庫が予測出庫（7日周期）で翌日から何日分もつか（出庫の予測がなければ inf）"""
+    stock = np.maximum(np.asarray(stock, dtype=np.float64), 0)
+    weekly = pattern.sum(axis=1)
+    cumulative = np.cumsum(pattern, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weeks = np.where(weekly > 0, np.floor(stock / weekly), 0)
+    rest = stock - weeks * weekly
+    # 端数の週で、累計が残りの在庫を超えない日数
+    partial = (cumulative <= rest[:, None] + 1e-9).sum(axis=1)
+    cover = weeks * SEASON_DAYS + partial
+    return np.where(weekly > 0, cover, np.inf)
+
+
+def demand(pattern: np.ndarray, days: int) -> np.ndarray:
+    """翌日から days 日間の予測出庫数の合計"""
+    weeks, rest = divmod(days, SEASON_DAYS)
+    total = pattern.sum(axis=1) * weeks
+    if rest:
+        total = total + pattern[:, :rest].sum(axis=1)
+    return total
+
+
+def forecast_demand(store, today: date | None = None) -> dict:
+    """ストアの出庫履歴（昨日までの HISTORY_DAYS 日）から全製品の需要を予測する
+
+    返り値は fit の結果に products（製品名、登録順）と today を加えたもの。
+    """
+    today = today or date.today()
+    since = datetime.combine(today - timedelta(days=HISTORY_DAYS), datetime.min.time())
+    history = store.daily_quantities(SHIPMENT, since, HISTORY_DAYS)
+    model = fit(history)
+    model["products"] = store.product_names()
+    model["today"] = today
+    return model
+
+
+def cover_table(model: dict, products: pa.Table, target_days: int) -> pa.Table:
+    """在庫日数の少ない順の表（列は FORECAST_SCHEMA）
+
+    products は store.products_table()（name, stock 列）。予測は出庫が
+    あったときだけ作り直し、在庫数はこの表から毎回読む。suggested は
+    翌日から target_days 日分の予測出庫に対する在庫の不足数。
+    在庫日数・在庫切れ予定日は予測出庫がない製品では空。
+    """
+    # 予測のあとに登録された製品は、出庫の予測なしとして扱う
+    index = {name: i for i, name in enumerate(model["products"])}
+    rows = np.array(
+        [index.get(name, -1) for name in products["name"].to_pylist()], dtype=int
+    )
+    known = rows >= 0
+    pattern = np.zeros((len(rows), SEASON_DAYS))
+    pattern[known] = model["pattern"][rows[known]]
+    stock = products["stock"].to_numpy()
+    cover = days_of_cover(stock, pattern)
+    finite = np.isfinite(cover)
+    stockout = np.full(len(cover), None, dtype=object)
+    # 在庫がない製品は今日、それ以外はもつ日数の翌日に在庫切れになる
+    offsets = np.where(stock > 0, cover + 1, 0)
+    stockout[finite] = [
+        model["today"] + timedelta(days=int(offset)) for offset in offsets[finite]
+    ]
+    suggested = np.ceil(np.maximum(demand(pattern, target_days) - stock, 0))
+    order = np.argsort(cover, kind="stable")
+    return pa.Table.from_arrays(
+        [
+            products["name"].take(order),
+            pa.array(stock[order], type=pa.int64()),
+            pa.array(np.round(pattern.mean(axis=1)[order], 1)),
+            pa.array(cover[order], mask=~finite[order]),
+            pa.array(stockout[order].tolist(), type=pa.date32()),
+            pa.array(suggested[order].astype(np.int64)),
+        ],
+        schema=FORECAST_SCHEMA,
+    )
@@ -0,0 +1,369 @@
+"""ドロップディレクトリからの入出庫イベントの自動取り込み
+
+製造設備やハンディスキャナは、完了イベントを JSON Lines のファイルにして
+ドロップディレクトリに置く。IngestWorker はバックグラウンドのスレッドで
+ディレクトリを監視し、溜まったファイルのイベントをまとめて
+InventoryStore.import_transactions で1回のコミット（グループコミット）で
+登録する。1件ずつ record するより1件あたりのコストが小さく、毎秒数千件の
+イベントを取り込める。
+
+1行が1件のイベント（type の省略時は入庫、datetime の省略時はファイルが
+置かれた時刻、note の省略時はファイル名）:
+
+    {"product": "製品A", "quantity": 5}
+    {"datetime": "2026-10-18 09:30:00", "type": "出庫", "product": "製品B",
+     "quantity": 2, "note": "ライン2"}
+
+書き込み途中のファイルを読まないよう、ファイルは別名で書き終えてから
+拡張子 .jsonl に rename する（write_events）。取り込んだファイルは done/ に、
+不正な行は理由を付けて rejected/ に書き出す。ファイルはコミットの後に
+移すので、移す前に止まった場合は同じファイルを再度取り込むことがある。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.bulk_import import DEFAULT_CHUNK_ROWS, InvalidImportError
+from utils.ledger import RECEIPT, SHIPMENT, TYPES, to_epoch
+from utils.storage import InsufficientStockError
+
+EVENT_SUFFIX = ".jsonl"
+DONE_DIR = "done"
+REJECTED_DIR = "rejected"
+
+# 1回のコミットにまとめるイベント数の目安（ファイルの途中では区切らない）
+DEFAULT_BATCH_EVENTS = 5000
+# ディレクトリを見に行く間隔（秒）
+DEFAULT_POLL_SECONDS = 0.2
+# ストアが混んでいる・エラーが続くときの待ち時間の上限（秒）
+MAX_BACKOFF_SECONDS = 10.0
+# 取り込み速度を求める期間（秒）
+RATE_WINDOW_SECONDS = 60
+
+
+class IngestEvent:
+    """検証済みのイベント（origin は (ファイル名, 行番号, 元の行)）"""
+
+    __slots__ = ("ts", "type", "product", "quantity", "note", "origin")
+
+    def __init__(self, ts, type, product, quantity, note, origin):
+        self.ts = ts
+        self.type = type
+        self.product = product
+        self.quantity = quantity
+        self.note = note
+        self.origin = origin
+
+
+def write_events(directory: str, events, name: str | None = None) -> str:
+    """イベント（dict のイテラブル）をドロップディレクトリに置き、パスを返す
+
+    別名で書き終えてから rename するので、取り込み側が書き込み途中の
+    ファイルを読むことはない。
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = name or f"{time.time_ns()}-{os.getpid()}{EVENT_SUFFIX}"
+    path = os.path.join(directory, name)
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False))
+            f.write("\n")
+    os.replace(temp, path)
+    return path
+
+
+def _parse_datetime(value) -> int:
+    when = datetime.fromisoformat(value)
+    if when.tzinfo is not None:
+        when = when.astimezone().replace(tzinfo=None)
+    return to_epoch(when)
+
+
+def parse_event(line: str, products, arrived: int, origin) -> IngestEvent:
+    """1行を検証して IngestEvent にする（不備は ValueError）
+
+    products は登録済みの製品名の集合、arrived はファイルが置かれた時刻
+    （エポック秒）。
+    """
+    try:
+        raw = json.loads(line)
+    except json.JSONDecodeError:
+        raise ValueError("JSON として読めません") from None
+    if not isinstance(raw, dict):
+        raise ValueError("JSON のオブジェクトではありません")
+    product = raw.get("product")
+    if product not in products:
+        raise ValueError(f"製品マスタにない製品です: {product}")
+    quantity = raw.get("quantity")
+    if type(quantity) is not int or quantity <= 0:
+        raise ValueError("数量は正の整数です")
+    kind = raw.get("type", RECEIPT)
+    if kind not in TYPES:
+        raise ValueError(f"種別は {'・'.join(TYPES)} のいずれかです")
+    ts = arrived
+    if raw.get("datetime") is not None:
+        try:
+            ts = _parse_datetime(raw["datetime"])
+        except (TypeError, ValueError):
+            raise ValueError("日時を解釈できません") from None
+    note = raw.get("note") or f"自動取り込み（{origin[0]}）"
+    return IngestEvent(ts, kind, product, quantity, str(note), origin)
+
+
+def _frames(events):
+    """import_transactions に渡すチャンク（DataFrame）を作る"""
+    for lo in range(0, len(events), DEFAULT_CHUNK_ROWS):
+        chunk = events[lo : lo + DEFAULT_CHUNK_ROWS]
+        ts = np.fromiter((e.ts for e in chunk), dtype=np.int64, count=len(chunk))
+        yield pd.DataFrame(
+            {
+                "datetime": ts.astype("datetime64[s]"),
+                "type": [e.type for e in chunk],
+                "product": [e.product for e in chunk],
+                "quantity": [e.quantity for e in chunk],
+                "note": [e.note for e in chunk],
+            }
+        )
+
+
+class IngestWorker:
+    """ドロップディレクトリを監視し、イベントをまとめて登録するスレッド
+
+    start でデーモンスレッドを起動する。run_once は1回分（溜まった
+    ファイルの読み込みと登録）を同期的に行うので、スクリプトからも使える。
+    登録中はストアのロックを持つので、取り込みが続くときは登録に
+    かかった時間と同じだけ間を空け、画面の読み取りを待たせ続けない。
+    SQLite が他のプロセスの書き込みで混んでいる（database is locked）
+    などで登録に失敗したときは、間隔を倍々に延ばして再試行する。
+    """
+
+    def __init__(
+        self,
+        store,
+        directory: str,
+        batch_events: int = DEFAULT_BATCH_EVENTS,
+        poll_seconds: float = DEFAULT_POLL_SECONDS,
+    ):
+        self.store = store
+        self.directory = directory
+        self.batch_events = batch_events
+        self.poll_seconds = poll_seconds
+        os.makedirs(os.path.join(directory, DONE_DIR), exist_ok=True)
+        os.makedirs(os.path.join(directory, REJECTED_DIR), exist_ok=True)
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._recent = deque()
+        self._ingested = 0
+        self._rejected = 0
+        self._batches = 0
+        self._files = 0
+        self._backlog_files = 0
+        self._oldest_arrival = None
+        self._last_batch = None
+        self._backoff = 0.0
+        self._last_error = None
+
+    # --- スレッド ---
+
+    def start(self) -> "IngestWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="inventory-ingest", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                count, commit_seconds = self.run_once()
+            except Exception as e:  # noqa: BLE001 - 止めずに間隔を空けて再試行する
+                self._backoff = min(
+                    max(self._backoff * 2, self.poll_seconds), MAX_BACKOFF_SECONDS
+                )
+                self._last_error = f"{time.strftime('%H:%M:%S')} {e}"
+                delay = self._backoff
+                continue
+            self._backoff = 0.0
+            delay = commit_seconds if count else self.poll_seconds
+
+    # --- 取り込み ---
+
+    def _pending_files(self) -> list:
+        """置かれた順（更新時刻・名前順）の (パス, 更新時刻) のリスト"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(EVENT_SUFFIX) and entry.is_file():
+                    files.append((entry.stat().st_mtime, entry.name, entry.path))
+        files.sort()
+        with self._stats_lock:
+            self._backlog_files = len(files)
+            self._oldest_arrival = files[0][0] if files else None
+        return [(path, mtime) for mtime, _, path in files]
+
+    def _read(self, path: str, mtime: float, products):
+        """ファイルのイベントと不正な行（理由付き）を読む"""
+        name = os.path.basename(path)
+        arrived = to_epoch(datetime.fromtimestamp(mtime))
+        events, rejected = [], []
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                origin = (name, number, line)
+                try:
+                    events.append(parse_event(line, products, arrived, origin))
+                except ValueError as e:
+                    rejected.append((origin, str(e)))
+        return events, rejected
+
+    def run_once(self) -> tuple[int, float]:
+        """溜まったファイルを1回分まとめて登録し、(登録件数, 登録の秒数) を返す
+
+        ファイルは置かれた順に、イベント数が batch_events に達するまで
+        読む。登録に失敗したら何も登録せず、ファイルもそのまま残す。
+        """
+        files = self._pending_files()
+        if not files:
+            return 0, 0.0
+        products = set(self.store.product_names())
+        batch, events, rejected = [], [], []
+        for path, mtime in files:
+            file_events, file_rejected = self._read(path, mtime, products)
+            batch.append((path, mtime))
+            events += file_events
+            rejected += file_rejected
+            if len(events) >= self.batch_events:
+                break
+        events.sort(key=lambda e: e.ts)
+
+        started = time.perf_counter()
+        count = self._commit(events, rejected)
+        commit_seconds = time.perf_counter() - started
+
+        self._write_rejected(rejected)
+        for path, _ in batch:
+            os.replace(
+                path, os.path.join(self.directory, DONE_DIR, os.path.basename(path))
+            )
+        rest = files[len(batch) :]
+        now = time.time()
+        with self._stats_lock:
+            self._backlog_files = len(rest)
+            self._oldest_arrival = rest[0][1] if rest else None
+            self._ingested += count
+            self._rejected += len(rejected)
+            self._batches += 1
+            self._files += len(batch)
+            self._recent.append((now, count))
+            while self._recent and self._recent[0][0] < now - RATE_WINDOW_SECONDS:
+                self._recent.popleft()
+            self._last_batch = {
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "events": count,
+                "files": len(batch),
+                "rejected": len(rejected),
+                "commit_ms": round(commit_seconds * 1000, 1),
+                # ファイルが置かれてから登録されるまで（バッチ内で最も古いもの）
+                "lag_seconds": round(now - min(mtime for _, mtime in batch), 3),
+            }
+        return count, commit_seconds
+
+    def _commit(self, events: list, rejected: list) -> int:
+        """events を1回のコミットで登録する
+
+        在庫がマイナスになる出庫は登録の中でまとめて外し、rejected に移す。
+        それ以外の失敗（ストアが混んでいるなど）は例外のまま返す。
+        """
+        while events:
+            shortages = []
+            try:
+                count = self.store.import_transactions(
+                    _frames(events), shortages=shortages
+                )
+            except InvalidImportError as e:
+                if e.row is None:
+                    raise
+                event = events.pop(e.row - 1)
+                rejected.append((event.origin, str(e).split(": ", 1)[-1]))
+                continue
+            except InsufficientStockError as e:
+                # 他のプロセスの出庫と競合した。その製品の出庫は見送る
+                keep = []
+                for event in events:
+                    if event.type == SHIPMENT and event.product == e.product:
+                        rejected.append((event.origin, f"{e.product}の在庫不足"))
+                    else:
+                        keep.append(event)
+                events[:] = keep
+                continue
+            for row in shortages:
+                event = events[row - 1]
+                rejected.append((event.origin, f"{event.product}の在庫不足"))
+            return count
+        return 0
+
+    def _write_rejected(self, rejected: list) -> None:
+        by_file = {}
+        for (name, number, line), reason in rejected:
+            by_file.setdefault(name, []).append(
+                {"line": number, "error": reason, "event": line}
+            )
+        for name, records in by_file.items():
+            path = os.path.join(self.directory, REJECTED_DIR, name)
+            with open(path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write("\n")
+
+    # --- 状態 ---
+
+    def stats(self) -> dict:
+        """取り込みの状況（lag_seconds は未登録で最も古いファイルの待ち時間）"""
+        now = time.time()
+        with self._stats_lock:
+            recent = sum(
+                count for t, count in self._recent if t >= now - RATE_WINDOW_SECONDS
+            )
+            return {
+                "running": self.running,
+                "directory": self.directory,
+                "ingested": self._ingested,
+                "rejected": self._rejected,
+                "batches": self._batches,
+                "files": self._files,
+                "events_per_second": recent / RATE_WINDOW_SECONDS,
+                "backlog_files": self._backlog_files,
+                "lag_seconds": (
+                    max(0.0, now - self._oldest_arrival)
+                    if self._oldest_arrival is not None
+                    else 0.0
+                ),
+                "last_batch": self._last_batch,
+                "backoff_seconds": self._backoff,
+                "last_error": self._last_error,
+            }
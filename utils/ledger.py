@@ -0,0 +1,711 @@
+"""列指向・追記専用の入出庫台帳"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.rollup import SECONDS_PER_DAY
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+RECEIPT = "入庫"
+SHIPMENT = "出庫"
+TYPES = (RECEIPT, SHIPMENT)
+_TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+
+_EPOCH = datetime(1970, 1, 1)
+
+# 履歴の並べ替えに使える列
+SORT_COLUMNS = ("datetime", "quantity")
+
+# 製品ごとの在庫増減の累計を記録する間隔（行数）
+CHECKPOINT_INTERVAL = 4096
+
+
+def to_epoch(value) -> int:
+    """日時（datetime または表示用文字列）をエポック秒に変換"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, DATETIME_FORMAT)
+    return int((value - _EPOCH).total_seconds())
+
+
+def encode_notes(notes) -> tuple[np.ndarray, bytes]:
+    """備考の列を (各行の UTF-8 のバイト数, 連結したバイト列) に変換"""
+    encoded = [note.encode("utf-8") for note in notes]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    return lengths, b"".join(encoded)
+
+
+class _SeqIndex:
+    """シーケンス番号（昇順）を追記していく伸長可能な配列"""
+
+    def __init__(self, capacity: int = 64):
+        self._seq = np.empty(capacity, dtype=np.int64)
+        self._size = 0
+
+    def append(self, seq: int) -> None:
+        if self._size == len(self._seq):
+            grown = np.empty(len(self._seq) * 2, dtype=np.int64)
+            grown[: self._size] = self._seq
+            self._seq = grown
+        self._seq[self._size] = seq
+        self._size += 1
+
+    def extend(self, seqs: np.ndarray) -> None:
+        needed = self._size + len(seqs)
+        if needed > len(self._seq):
+            capacity = len(self._seq)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[: self._size] = self._seq[: self._size]
+            self._seq = grown
+        self._seq[self._size : needed] = seqs
+        self._size = needed
+
+    @property
+    def seq(self) -> np.ndarray:
+        return self._seq[: self._size]
+
+
+def _appended(array, size: int, values: np.ndarray) -> np.ndarray:
+    """array の先頭 size 個に values を続けた配列（容量が足りなければ倍に広げる）"""
+    needed = size + len(values)
+    if needed > len(array):
+        grown = np.empty(max(needed, 2 * len(array)), dtype=array.dtype)
+        grown[:size] = array[:size]
+        array = grown
+    array[size:needed] = values
+    return array
+
+
+class Ledger:
+    """入出庫履歴を NumPy 配列の列で保持する台帳
+
+    追記順（＝シーケンス番号順）に格納し、末尾への追加は償却 O(1)。
+    新しい順の表示は逆順スライスで作る。製品名は整数コード、
+    備考は UTF-8 のバイト列とオフセット配列で保持する。
+
+    日時はエポック秒（datetime64[s] と同じ値）で保持し、文字列への
+    変換は表示時にだけ行う。追記が時刻順なら期間での絞り込みは
+    シーケンス番号の二分探索で行う。過去の日時の行（ERP の履歴の
+    取り込みや、設備の時刻での取り込み）が追記された後は、時刻順に
+    並べたシーケンス番号（_time_order）を別に持ち、それを二分探索する。
+
+    製品別・種別別・製品×種別ごとにシーケンス番号の索引を持ち、
+    履歴のページ取得（page）は索引の二分探索とページ分の取り出しで済む。
+    索引は初めて使うときに全行から作り、以降は追記のたびに伸ばす
+    （スナップショットからの復元では作らない）。
+
+    CHECKPOINT_INTERVAL 行ごとに製品別の在庫増減の累計（チェックポイント）を
+    残すので、ある時点までの増減（net）は直前のチェックポイントから
+    最大 CHECKPOINT_INTERVAL 行をたどるだけで求まる。
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(int(capacity), 16)
+        self._size = 0
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._product = np.empty(capacity, dtype=np.int32)
+        self._type = np.empty(capacity, dtype=np.int8)
+        self._quantity = np.empty(capacity, dtype=np.int64)
+        self._note_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._notes = bytearray()
+        self._product_names = []
+        self._product_codes = {}
+        self._time_sorted = True
+        # 時刻順でなくなった後の、(日時, シーケンス番号) 順のシーケンス番号と
+        # その日時。先頭 _time_rows 行分を反映済み（残りは参照時に差し込む）
+        self._time_seq = None
+        self._time_ts = None
+        self._time_rows = 0
+        self._index = {}  # ("product", code) などの索引キー -> _SeqIndex
+        self._net = np.zeros(0, dtype=np.int64)  # 製品コード -> 在庫増減の累計
+        # j 番目は先頭 (j + 1) * CHECKPOINT_INTERVAL 行の製品別累計
+        self._checkpoints = []
+
+    def __len__(self):
+        return self._size
+
+    # 列（追記済み部分のビュー）
+    @property
+    def ts(self) -> np.ndarray:
+        return self._ts[: self._size]
+
+    @property
+    def time_sorted(self) -> bool:
+        """全行が時刻順に並んでいるか"""
+        return self._time_sorted
+
+    @property
+    def product_codes(self) -> np.ndarray:
+        return self._product[: self._size]
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        return self._type[: self._size]
+
+    @property
+    def quantity(self) -> np.ndarray:
+        return self._quantity[: self._size]
+
+    @property
+    def product_names(self) -> list[str]:
+        return self._product_names
+
+    def product_code(self, name: str, create: bool = False) -> int | None:
+        """製品名に対応するコード（未登録なら None、create=True なら採番）"""
+        code = self._product_codes.get(name)
+        if code is None and create:
+            code = len(self._product_names)
+            self._product_names.append(name)
+            self._product_codes[name] = code
+        return code
+
+    @staticmethod
+    def type_code(name: str) -> int:
+        return _TYPE_CODES[name]
+
+    def _reserve(self, needed: int) -> None:
+        capacity = len(self._ts)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr in ("_ts", "_product", "_type", "_quantity"):
+            old = getattr(self, attr)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, attr, new)
+        offsets = np.zeros(capacity + 1, dtype=np.int64)
+        offsets[: self._size + 1] = self._note_offsets[: self._size + 1]
+        self._note_offsets = offsets
+
+    def append(self, ts: int, type: str, product: str, quantity: int, note: str) -> int:
+        """1件追記し、そのシーケンス番号を返す"""
+        self._reserve(self._size + 1)
+        i = self._size
+        if i and ts < self._ts[i - 1]:
+            self._time_sorted = False
+        self._ts[i] = ts
+        self._product[i] = self.product_code(product, create=True)
+        self._type[i] = _TYPE_CODES[type]
+        self._quantity[i] = quantity
+        self._writable_notes()
+        self._notes += note.encode("utf-8")
+        self._note_offsets[i + 1] = len(self._notes)
+        self._size = i + 1
+        for key in self._index_keys(self._product[i], self._type[i]):
+            index = self._index.get(key)
+            if index is not None:
+                index.append(i)
+        code = int(self._product[i])
+        self._grow_net(code + 1)
+        self._net[code] += quantity if type == RECEIPT else -quantity
+        if self._size % CHECKPOINT_INTERVAL == 0:
+            self._checkpoints.append(self._net.copy())
+        return i
+
+    @staticmethod
+    def _index_keys(product_code, type_code):
+        product_code, type_code = int(product_code), int(type_code)
+        return (
+            ("product", product_code),
+            ("type", type_code),
+            ("product_type", product_code, type_code),
+        )
+
+    def extend(self, rows) -> None:
+        """(ts, type, product, quantity, note) の列をまとめて追記"""
+        rows = list(rows)
+        if not rows:
+            return
+        ts, types, products, quantity, notes = zip(*rows)
+        self.extend_arrays(
+            np.array(ts, dtype=np.int64),
+            np.array([self.product_code(p, create=True) for p in products]),
+            np.array([_TYPE_CODES[t] for t in types]),
+            np.array(quantity, dtype=np.int64),
+            notes,
+        )
+
+    def extend_arrays(self, ts, product_codes, type_codes, quantity, notes) -> int:
+        """列の配列をまとめて追記し、先頭行のシーケンス番号を返す
+
+        product_codes・type_codes は product_code・type_code のコード。
+        大量の行の取り込み用で、1行ずつの append より速い。
+        """
+        return self.extend_encoded(
+            ts, product_codes, type_codes, quantity, *encode_notes(notes)
+        )
+
+    def extend_encoded(
+        self, ts, product_codes, type_codes, quantity, note_lengths, note_bytes
+    ) -> int:
+        """extend_arrays と同じ（備考は encode_notes で変換済みのもの）"""
+        n = len(ts)
+        lo = self._size
+        hi = lo + n
+        if not n:
+            return lo
+        ts = np.asarray(ts, dtype=np.int64)
+        product_codes = np.asarray(product_codes, dtype=np.int32)
+        type_codes = np.asarray(type_codes, dtype=np.int8)
+        self._reserve(hi)
+        if (lo and ts[0] < self._ts[lo - 1]) or np.any(ts[1:] < ts[:-1]):
+            self._time_sorted = False
+        self._ts[lo:hi] = ts
+        self._product[lo:hi] = product_codes
+        self._type[lo:hi] = type_codes
+        self._quantity[lo:hi] = quantity
+        self._note_offsets[lo + 1 : hi + 1] = len(self._notes) + np.cumsum(note_lengths)
+        self._writable_notes()
+        self._notes += note_bytes
+        self._size = hi
+        self._index_rows(lo, product_codes, type_codes)
+        self._accumulate_net(lo, hi)
+        return lo
+
+    def _index_rows(self, lo, product_codes, type_codes) -> None:
+        """lo から始まる行を作成済みの索引に追加する（キーごとにまとめて追加）"""
+        if not self._index:
+            return
+        n = len(product_codes)
+        pairs = product_codes.astype(np.int64) * len(TYPES) + type_codes
+        order = np.argsort(pairs, kind="stable")
+        unique, starts = np.unique(pairs[order], return_index=True)
+        bounds = np.append(starts, n)
+        for pair, start, end in zip(unique.tolist(), bounds[:-1], bounds[1:]):
+            index = self._index.get(("product_type", *divmod(pair, len(TYPES))))
+            if index is not None:
+                index.extend(order[start:end] + lo)
+        for code in np.unique(product_codes).tolist():
+            index = self._index.get(("product", code))
+            if index is not None:
+                index.extend(np.flatnonzero(product_codes == code) + lo)
+        for code in np.unique(type_codes).tolist():
+            index = self._index.get(("type", code))
+            if index is not None:
+                index.extend(np.flatnonzero(type_codes == code) + lo)
+
+    @classmethod
+    def from_arrays(
+        cls, ts, product_codes, type_codes, quantity, note_offsets, notes, product_names
+    ) -> "Ledger":
+        """列の配列から台帳を作る（配列はコピーせずにそのまま使う）
+
+        メモリマップした読み取り専用の配列も受け付ける。最初の追記の
+        ときに書き込み可能な配列へ移す。note_offsets は行数 + 1 個、
+        notes は UTF-8 の備考を連結したバイト列。
+        """
+        ledger = cls()
+        for name in product_names:
+            ledger.product_code(name, create=True)
+        n = len(ts)
+        if not n:
+            return ledger
+        ledger._ts = ts
+        ledger._product = product_codes
+        ledger._type = type_codes
+        ledger._quantity = quantity
+        ledger._note_offsets = note_offsets
+        ledger._notes = notes
+        ledger._size = n
+        ledger._time_sorted = bool(np.all(ts[1:] >= ts[:-1]))
+        ledger._accumulate_net(0, n)
+        return ledger
+
+    @property
+    def note_offsets(self) -> np.ndarray:
+        """備考のオフセット（行数 + 1 個）"""
+        return self._note_offsets[: self._size + 1]
+
+    @property
+    def note_bytes(self) -> memoryview:
+        """全行の備考を連結した UTF-8 バイト列"""
+        return memoryview(self._notes)[: int(self._note_offsets[self._size])]
+
+    def _writable_notes(self) -> None:
+        # from_arrays で受け取ったバイト列は追記の前に bytearray へ移す
+        if not isinstance(self._notes, bytearray):
+            self._notes = bytearray(self._notes)
+
+    def _index_for(self, key) -> _SeqIndex:
+        """索引 key（初めて使うときに全行から作る）"""
+        index = self._index.get(key)
+        if index is None:
+            mask = np.ones(self._size, dtype=bool)
+            if key[0] != "type":
+                mask &= self.product_codes == key[1]
+            if key[0] != "product":
+                mask &= self.type_codes == key[-1]
+            index = self._index[key] = _SeqIndex()
+            index.extend(np.flatnonzero(mask))
+        return index
+
+    def note(self, i: int) -> str:
+        start, end = self._note_offsets[i], self._note_offsets[i + 1]
+        return bytes(self._notes[start:end]).decode("utf-8")
+
+    def _time_order(self) -> tuple[np.ndarray, np.ndarray]:
+        """時刻順に並べたシーケンス番号とその日時（時刻順でないときに使う）
+
+        最初に参照したときに全行を並べ、以降は追記された行だけを
+        差し込む。追記が時刻順なら末尾に足すだけで済む。
+        """
+        if self._time_seq is None:
+            order = np.argsort(self.ts, kind="stable")
+            self._time_seq = order.astype(np.int64)
+            self._time_ts = self.ts[order]
+            self._time_rows = self._size
+        elif self._time_rows < self._size:
+            new = np.arange(self._time_rows, self._size, dtype=np.int64)
+            new_ts = self._ts[self._time_rows : self._size]
+            order = np.argsort(new_ts, kind="stable")
+            new, new_ts = new[order], new_ts[order]
+            n = self._time_rows
+            if not n or new_ts[0] >= self._time_ts[n - 1]:
+                self._time_seq = _appended(self._time_seq, n, new)
+                self._time_ts = _appended(self._time_ts, n, new_ts)
+            else:
+                # 同じ日時ならシーケンス番号順（後から追記した行が後ろ）
+                at = np.searchsorted(self._time_ts[:n], new_ts, side="right")
+                self._time_seq = np.insert(self._time_seq[:n], at, new)
+                self._time_ts = np.insert(self._time_ts[:n], at, new_ts)
+            self._time_rows = self._size
+        n = self._time_rows
+        return self._time_seq[:n], self._time_ts[:n]
+
+    def _rows_between(self, since, until, key=None) -> np.ndarray:
+        """時刻順でないときの、期間内で索引 key に含まれる行（昇順）
+
+        期間内の行数と索引の行数の少ない方をたどる。
+        """
+        seq, ts = self._time_order()
+        lo = 0 if since is None else int(np.searchsorted(ts, since))
+        hi = len(seq) if until is None else int(np.searchsorted(ts, until))
+        if key is None:
+            return np.sort(seq[lo:hi])
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64)
+        index = self._index_for(key)
+        if hi - lo < len(index.seq):
+            rows = seq[lo:hi]
+            mask = np.ones(len(rows), dtype=bool)
+            if key[0] != "type":
+                mask &= self._product[rows] == key[1]
+            if key[0] != "product":
+                mask &= self._type[rows] == key[-1]
+            return np.sort(rows[mask])
+        rows = index.seq
+        row_ts = self._ts[rows]
+        mask = np.ones(len(rows), dtype=bool)
+        if since is not None:
+            mask &= row_ts >= since
+        if until is not None:
+            mask &= row_ts < until
+        return rows[mask]
+
+    def time_bounds(
+        self, since: int | None = None, until: int | None = None
+    ) -> tuple[int, int]:
+        """since 以上 until 未満の行を含むシーケンス番号の範囲 [lo, hi)
+
+        時刻順でない場合は全範囲を返す（呼び出し側でマスクする）。
+        """
+        if not self._time_sorted:
+            return 0, self._size
+        ts = self.ts
+        lo = 0 if since is None else int(np.searchsorted(ts, since))
+        hi = self._size if until is None else int(np.searchsorted(ts, until))
+        return lo, max(lo, hi)
+
+    def _mask(self, lo, hi, product, type):
+        """[lo, hi) の範囲で製品・種別の条件に合う行のマスク（条件なしなら None）"""
+        mask = None
+        if product is not None:
+            mask = self._product[lo:hi] == self._product_codes[product]
+        if type is not None:
+            type_mask = self._type[lo:hi] == _TYPE_CODES[type]
+            mask = type_mask if mask is None else mask & type_mask
+        return mask
+
+    def select(
+        self,
+        product: str | None = None,
+        type: str | None = None,
+        since: int | None = None,
+        limit: int | None = None,
+        until: int | None = None,
+    ) -> np.ndarray:
+        """条件に合うシーケンス番号を新しい順で返す
+
+        期間・製品・種別を索引と二分探索で絞り、末尾から limit 件だけを
+        取り出す（台帳全体は走査しない）。
+        """
+        if product is not None and product not in self._product_codes:
+            return np.empty(0, dtype=np.int64)
+        candidates = self._candidates(product, type, since, until)
+        if limit is not None:
+            candidates = candidates[max(len(candidates) - limit, 0) :]
+        return np.asarray(candidates, dtype=np.int64)[::-1]
+
+    def _grow_net(self, size: int) -> None:
+        if len(self._net) < size:
+            self._net = np.concatenate(
+                [self._net, np.zeros(size - len(self._net), dtype=np.int64)]
+            )
+
+    def _signed(self, lo: int, hi: int) -> np.ndarray:
+        """[lo, hi) の行の在庫増減（入庫は正、出庫は負）"""
+        quantity = self._quantity[lo:hi]
+        return np.where(self._type[lo:hi] == _TYPE_CODES[RECEIPT], quantity, -quantity)
+
+    def _accumulate_net(self, lo: int, hi: int) -> None:
+        """[lo, hi) の行を製品別累計に加え、途中のチェックポイントを残す"""
+        if hi <= lo:
+            return
+        self._grow_net(int(self._product[lo:hi].max()) + 1)
+        start = lo
+        for boundary in range(
+            (lo // CHECKPOINT_INTERVAL + 1) * CHECKPOINT_INTERVAL,
+            hi + 1,
+            CHECKPOINT_INTERVAL,
+        ):
+            self._net += np.bincount(
+                self._product[start:boundary],
+                weights=self._signed(start, boundary),
+                minlength=len(self._net),
+            ).astype(np.int64)
+            self._checkpoints.append(self._net.copy())
+            start = boundary
+        if start < hi:
+            self._net += np.bincount(
+                self._product[start:hi],
+                weights=self._signed(start, hi),
+                minlength=len(self._net),
+            ).astype(np.int64)
+
+    def _net_before(self, code: int, seq: int) -> int:
+        """シーケンス番号 seq より前の行での製品の在庫増減の合計"""
+        if seq >= self._size:
+            return int(self._net[code]) if code < len(self._net) else 0
+        j = seq // CHECKPOINT_INTERVAL
+        total = 0
+        if j:
+            checkpoint = self._checkpoints[j - 1]
+            total = int(checkpoint[code]) if code < len(checkpoint) else 0
+        start = j * CHECKPOINT_INTERVAL
+        mask = self._product[start:seq] == code
+        return total + int(self._signed(start, seq)[mask].sum())
+
+    def net(
+        self, product: str, since: int | None = None, until: int | None = None
+    ) -> int:
+        """期間内（since 以上 until 未満）の製品の在庫増減の合計
+
+        時刻順なら期間の両端をチェックポイントから求める。
+        """
+        code = self._product_codes.get(product)
+        if code is None:
+            return 0
+        if since is None and until is None:
+            return int(self._net[code]) if code < len(self._net) else 0
+        if self._time_sorted:
+            lo, hi = self.time_bounds(since, until)
+            return self._net_before(code, hi) - self._net_before(code, lo)
+        rows = np.asarray(self._candidates(product, None, since, until))
+        quantity = self._quantity[rows]
+        receipt = self._type[rows] == _TYPE_CODES[RECEIPT]
+        return int(np.where(receipt, quantity, -quantity).sum())
+
+    def sum_quantity(
+        self,
+        product: str | None = None,
+        type: str | None = None,
+        since: int | None = None,
+        until: int | None = None,
+    ) -> int:
+        """条件に合う行の数量合計"""
+        if product is not None and product not in self._product_codes:
+            return 0
+        if not self._time_sorted and (since is not None or until is not None):
+            rows = self._candidates(product, type, since, until)
+            return int(self._quantity[rows].sum())
+        lo, hi = self.time_bounds(since, until)
+        quantity = self._quantity[lo:hi]
+        mask = self._mask(lo, hi, product, type)
+        if mask is not None:
+            quantity = quantity[mask]
+        return int(quantity.sum())
+
+    def _candidates(self, product, type, since, until):
+        """絞り込み条件に合う行（昇順）を range か配列で返す
+
+        製品・種別は索引で、期間は二分探索で絞る（時刻順でなければ
+        時刻順のシーケンス番号を使う）。
+        """
+        key = None
+        if product is None and type is not None:
+            key = ("type", _TYPE_CODES[type])
+        elif type is None and product is not None:
+            key = ("product", self._product_codes[product])
+        elif product is not None:
+            key = ("product_type", self._product_codes[product], _TYPE_CODES[type])
+        if not self._time_sorted and (since is not None or until is not None):
+            return self._rows_between(since, until, key)
+        lo, hi = self.time_bounds(since, until)
+        if key is None:
+            return range(lo, hi)
+        seq = self._index_for(key).seq
+        return seq[np.searchsorted(seq, lo) : np.searchsorted(seq, hi)]
+
+    def daily_totals(self, type: str, since: int, days: int) -> np.ndarray:
+        """since（エポック秒）から days 日間の製品別・日別の数量合計
+
+        返り値は 製品コード × 日 の配列。種別の索引から期間内の行だけを
+        取り出して集計する。
+        """
+        until = since + days * SECONDS_PER_DAY
+        rows = np.asarray(self._candidates(None, type, since, until), dtype=np.int64)
+        ts = self._ts[rows]
+        products = len(self._product_names)
+        cells = (
+            self._product[rows].astype(np.int64) * days
+            + (ts - since) // SECONDS_PER_DAY
+        )
+        totals = np.bincount(
+            cells, weights=self._quantity[rows], minlength=products * days
+        )
+        return totals.astype(np.int64).reshape(products, days)
+
+    def _note_matches(self, text: str, first: int, last: int) -> np.ndarray:
+        """first〜last 行目（シーケンス番号）で備考に text を含む行（昇順）
+
+        備考のバッファをコピーせずに、その行の範囲のバイト列だけを探す。
+        """
+        needle = text.encode("utf-8")
+        offsets = self._note_offsets[: self._size + 1]
+        notes = self._searchable_notes()
+        end = int(offsets[last + 1])
+        rows = []
+        pos = notes.find(needle, int(offsets[first]), end)
+        while pos >= 0:
+            row = int(np.searchsorted(offsets, pos, side="right")) - 1
+            if pos + len(needle) <= offsets[row + 1]:
+                rows.append(row)
+                # 同じ行の中の2つめ以降の一致は飛ばす
+                pos = notes.find(needle, int(offsets[row + 1]), end)
+            else:
+                pos = notes.find(needle, pos + 1, end)
+        return np.asarray(rows, dtype=np.int64)
+
+    def _searchable_notes(self):
+        # スナップショットから読んだ memoryview は find を持たないので、
+        # 最初の検索のときに1度だけ bytes にする
+        if not isinstance(self._notes, (bytes, bytearray)):
+            self._notes = bytes(self._notes)
+        return self._notes
+
+    def page(
+        self,
+        offset: int = 0,
+        size: int = 50,
+        product: str | None = None,
+        type: str | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        note: str | None = None,
+        sort: str = "datetime",
+        descending: bool = True,
+    ) -> tuple[np.ndarray, int]:
+        """条件に合う行のうち1ページ分のシーケンス番号と、該当件数を返す
+
+        日時順（時刻順に追記されている場合）は索引のスライスだけで
+        ページを取り出す。備考の部分一致と数量順は該当行全体を
+        走査・並べ替えるので、その分のコストがかかる。
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"並べ替えできない列です: {sort}")
+        if product is not None and product not in self._product_codes:
+            return np.empty(0, dtype=np.int64), 0
+        candidates = self._candidates(product, type, since, until)
+        if note and len(candidates):
+            matches = self._note_matches(note, int(candidates[0]), int(candidates[-1]))
+            candidates = np.intersect1d(candidates, matches, assume_unique=True)
+        total = len(candidates)
+        stop = min(offset + size, total)
+        if offset >= stop:
+            return np.empty(0, dtype=np.int64), total
+
+        if sort == "datetime" and self._time_sorted:
+            # シーケンス番号順 = 日時順なので並べ替え不要
+            if descending:
+                picked = candidates[total - stop : total - offset][::-1]
+            else:
+                picked = candidates[offset:stop]
+            return np.asarray(picked, dtype=np.int64), total
+
+        candidates = np.asarray(candidates, dtype=np.int64)
+        column = self._ts if sort == "datetime" else self._quantity
+        keys = column[candidates]
+        # 同じ値はシーケンス番号順（降順なら新しい順）に並べる
+        if descending:
+            order = np.lexsort((-candidates, -keys))
+        else:
+            order = np.lexsort((candidates, keys))
+        return candidates[order[offset:stop]], total
+
+    def to_frame(self, indices: np.ndarray) -> pd.DataFrame:
+        """指定したシーケンス番号の行を DataFrame にする
+
+        datetime 列は datetime64[s] のまま返す。
+        """
+        names = np.asarray(self._product_names, dtype=object)
+        return pd.DataFrame(
+            {
+                "datetime": self._ts[indices].view("datetime64[s]"),
+                "type": np.asarray(TYPES, dtype=object)[self._type[indices]],
+                "product": names[self._product[indices]],
+                "quantity": self._quantity[indices],
+                "note": [self.note(i) for i in indices],
+            }
+        )
+
+    def to_arrow(self, indices: np.ndarray) -> pa.Table:
+        """指定したシーケンス番号の行を Arrow テーブルにする
+
+        列は to_frame と同じ（datetime は timestamp[s]）。備考は UTF-8 の
+        バッファを文字列配列として参照し、必要な行だけを取り出す
+        （Python の文字列は作らない）。
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        notes = pa.LargeStringArray.from_buffers(
+            self._size,
+            pa.py_buffer(self.note_offsets),
+            pa.py_buffer(self.note_bytes),
+        )
+        table = pa.table(
+            {
+                "datetime": pa.array(self._ts[indices], type=pa.timestamp("s")),
+                "type": pa.array(TYPES).take(self._type[indices]),
+                "product": pa.array(self._product_names, type=pa.string()).take(
+                    self._product[indices]
+                ),
+                "quantity": self._quantity[indices],
+                # take はコピーを返すので、台帳のバッファは参照し続けない
+                "note": notes.take(indices).cast(pa.string()),
+            }
+        )
+        del notes
+        return table
+
+    def rows(self, indices: np.ndarray) -> list[dict]:
+        """指定したシーケンス番号の行を dict のリストにする（日時は文字列）"""
+        frame = self.to_frame(indices)
+        frame["datetime"] = frame["datetime"].dt.strftime(DATETIME_FORMAT)
+        return frame.to_dict("records")
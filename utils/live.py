@@ -0,0 +1,232 @@
+"""差分だけを反映して保つ表示用の表（ライブ更新用）
+
+LiveTable は最初に表全体を作り、以降はストアの changes_since で前回の
+sequence より後に追加された入出庫・変わった注文だけを取り出して表に
+反映する。多くの画面が数秒ごとに更新しても、1回の更新のコストは
+その間の変更の件数で決まり、履歴・注文全体の件数にはほとんどよらない。
+
+表は LiveTables で全セッションが共有する。返した表は変更しない
+（反映は新しい表を作って差し替える）。
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.orders import order_table
+
+DEFAULT_MAX_ENTRIES = 64
+
+# 注文一覧を分けて持つチャンクの行数（変更はそのチャンクだけを作り直す）
+CHUNK_ROWS = 16384
+
+# 入出庫履歴の表は、追記でチャンクがこの数を超えたら1つにまとめる
+MAX_CHUNKS = 32
+
+
+def _split(table: pa.Table) -> list:
+    """ID 付きの注文の表を CHUNK_ROWS 行以下の (ID の配列, RecordBatch) に分ける"""
+    batches = table.combine_chunks().to_batches(max_chunksize=CHUNK_ROWS)
+    return [(batch.column(0).to_numpy(), batch) for batch in batches if batch.num_rows]
+
+
+def _compact(table: pa.Table) -> pa.Table:
+    if table.num_columns and table.column(0).num_chunks > MAX_CHUNKS:
+        return table.combine_chunks()
+    return table
+
+
+class LiveTable:
+    """差分を反映して保つ表の基底クラス
+
+    サブクラスは build（表全体を作って self.table に入れる）と apply
+    （changes_since の結果を反映する）を実装する。
+    """
+
+    def __init__(self):
+        self.table = None
+        self._store = None
+        self._sequence = None
+        self._lock = threading.Lock()
+
+    def get(self, store) -> pa.Table:
+        """ストアの最新の状態を反映した表"""
+        with self._lock:
+            if self._store is store and self._sequence is not None:
+                if store.sequence() == self._sequence:
+                    return self.table
+                changes = store.changes_since(self._sequence)
+                if not changes["reset"]:
+                    self.apply(changes)
+                    self._sequence = changes["sequence"]
+                    return self.table
+            self._store = store
+            self._sequence, _ = store.read_at_sequence(lambda: self.build(store))
+            return self.table
+
+    def build(self, store) -> None:
+        raise NotImplementedError
+
+    def apply(self, changes: dict) -> None:
+        raise NotImplementedError
+
+
+class LiveOrders(LiveTable):
+    """注文一覧（登録順。status を指定するとそのステータスの注文だけ）
+
+    列は store.orders_table と同じ。表は ID 順に CHUNK_ROWS 行ずつの
+    チャンクに分けて持ち、変更された注文を含むチャンクだけを作り直す
+    （追加は末尾のチャンクに足し、status 指定の表ではステータスが
+    変わった注文を外したり、戻った注文を ID の位置に差し込んだりする）。
+    """
+
+    def __init__(self, status: str | None = None):
+        super().__init__()
+        self.status = status
+        self._schema = None
+        self._chunks = []  # [(ID の配列, ID 付きの RecordBatch)]（ID 順）
+
+    def build(self, store) -> None:
+        table = store.orders_table(self.status, with_id=True)
+        self._schema = table.schema
+        self._chunks = _split(table)
+        self._publish()
+
+    def _publish(self) -> None:
+        batches = [batch for _, batch in self._chunks]
+        table = pa.Table.from_batches(batches, schema=self._schema)
+        self.table = table.drop_columns(["id"])
+
+    def apply(self, changes: dict) -> None:
+        if not changes["orders"]:
+            return
+        firsts = [int(ids[0]) for ids, _ in self._chunks]
+        edits = defaultdict(lambda: ({}, [], []))  # チャンク -> (更新, 削除, 追加)
+        for order in sorted(changes["orders"], key=lambda order: order["id"]):
+            i = max(bisect.bisect_right(firsts, order["id"]) - 1, 0)
+            row = None
+            if self._chunks:
+                ids = self._chunks[i][0]
+                j = int(np.searchsorted(ids, order["id"]))
+                if j < len(ids) and ids[j] == order["id"]:
+                    row = j
+            updates, removals, additions = edits[i]
+            if self.status is not None and order["status"] != self.status:
+                if row is not None:
+                    removals.append(row)
+            elif row is None:
+                additions.append(order)
+            elif self.status is None:
+                updates[row] = order["status"]
+        # 後ろのチャンクから置き換えて、前のチャンクの位置をずらさない
+        for i in sorted(edits, reverse=True):
+            chunk = self._chunks[i] if self._chunks else None
+            self._chunks[i : i + 1] = self._rebuild(chunk, *edits[i])
+        self._publish()
+
+    def _rebuild(self, chunk, updates, removals, additions) -> list:
+        """1つのチャンクに変更を反映し、置き換えるチャンクのリストを返す"""
+        if chunk is None:
+            part = self._schema.empty_table()
+        else:
+            part = pa.Table.from_batches([chunk[1]])
+        if updates:
+            rows = sorted(updates)
+            mask = np.zeros(part.num_rows, dtype=bool)
+            mask[rows] = True
+            column = part.schema.get_field_index("status")
+            part = part.set_column(
+                column,
+                "status",
+                pc.replace_with_mask(
+                    part.column(column).combine_chunks(),
+                    pa.array(mask),
+                    pa.array([updates[row] for row in rows], type=pa.string()),
+                ),
+            )
+        if removals:
+            keep = np.ones(part.num_rows, dtype=bool)
+            keep[removals] = False
+            part = part.filter(pa.array(keep))
+        if additions:
+            part = pa.concat_tables([part, order_table(additions, with_id=True)])
+            part = part.sort_by("id")
+        return _split(part)
+
+
+class LiveTransactions(LiveTable):
+    """入出庫履歴（新しい順）。列は store.transaction_table と同じ
+
+    limit・product・type・since は transaction_table と同じ意味で、
+    追加された入出庫のうち条件に合う行を先頭に足す。
+    """
+
+    def __init__(self, limit=None, product=None, type=None, since=None):
+        super().__init__()
+        self.limit = limit
+        self.product = product
+        self.type = type
+        self.since = since
+
+    def build(self, store) -> None:
+        self.table = store.transaction_table(
+            self.product, self.type, self.since, self.limit
+        )
+
+    def apply(self, changes: dict) -> None:
+        new = changes["transactions"]
+        mask = None
+        for column, value, compare in (
+            ("product", self.product, pc.equal),
+            ("type", self.type, pc.equal),
+            ("datetime", self.since, pc.greater_equal),
+        ):
+            if value is not None and new.num_rows:
+                matched = compare(new[column], pa.scalar(value, new[column].type))
+                mask = matched if mask is None else pc.and_(mask, matched)
+        if mask is not None:
+            new = new.filter(mask)
+        if not new.num_rows:
+            return
+        new = new.take(np.arange(new.num_rows - 1, -1, -1))
+        table = pa.concat_tables([new, self.table])
+        if self.limit is not None:
+            table = table.slice(0, self.limit)
+        self.table = _compact(table)
+
+
+class LiveTables:
+    """LiveTable を種類・パラメータごとに1つ持つ（全セッションで共有）
+
+    使われていないものから max_entries を超えた分を捨てる。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def get(self, store, kind, *params) -> pa.Table:
+        """kind(*params) の表の最新の状態（kind は LiveTable のサブクラス）"""
+        key = (kind, params)
+        with self._lock:
+            live = self._tables.get(key)
+            if live is None:
+                live = self._tables[key] = kind(*params)
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_entries:
+                self._tables.popitem(last=False)
+        return live.get(store)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
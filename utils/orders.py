@@ -0,0 +1,251 @@
+"""注文の索引"""
+
+from __future__ import annotations
+
+import bisect
+from array import array
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pyarrow as pa
+
+PENDING = "未出荷"
+SHIPPED = "出荷済み"
+STATUSES = (PENDING, SHIPPED)
+
+ORDER_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("customer", pa.string()),
+        ("product", pa.string()),
+        ("quantity", pa.int64()),
+        ("delivery_date", pa.string()),
+        ("status", pa.string()),
+    ]
+)
+
+
+def order_table(rows, with_id: bool = False) -> pa.Table:
+    """注文の行（dict）を列ごとに集めて Arrow テーブルにする
+
+    列は customer, product, quantity, delivery_date（"YYYY-MM-DD"）, status
+    （with_id なら先頭に id）。pandas の DataFrame は経由しない。
+    """
+    schema = ORDER_SCHEMA if with_id else ORDER_SCHEMA.remove(0)
+    columns = []
+    for field in schema:
+        name = field.name
+        values = [row[name] for row in rows]
+        if name == "delivery_date":
+            values = [str(value) for value in values]
+        # 型を指定すると推論の分だけ速い
+        columns.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def parse_date(value) -> date:
+    """納期（date または "YYYY-MM-DD"）を date にする"""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+class DeliveryQueue:
+    """注文 ID を納期順に保持するキュー
+
+    納期の日付ごとのバケツと、日付（序数）の昇順リストで構成する。
+    追加・削除は O(日付の種類数) 以下、先頭 n 件や期間での取り出しは
+    二分探索＋取り出す件数分で済む。同じ納期の注文は ID 順に返す。
+    """
+
+    def __init__(self):
+        self._days = []  # 日付の序数（昇順）
+        self._buckets = {}  # 日付の序数 -> {order_id: None}
+        self._day_of = {}  # order_id -> 日付の序数
+
+    def __len__(self):
+        return len(self._day_of)
+
+    def __contains__(self, order_id):
+        return order_id in self._day_of
+
+    def add(self, order_id: int, delivery_date) -> None:
+        day = parse_date(delivery_date).toordinal()
+        if order_id in self._day_of:
+            self.remove(order_id)
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            bucket = self._buckets[day] = {}
+            bisect.insort(self._days, day)
+        bucket[order_id] = None
+        self._day_of[order_id] = day
+
+    def remove(self, order_id: int) -> None:
+        day = self._day_of.pop(order_id)
+        bucket = self._buckets[day]
+        del bucket[order_id]
+        if not bucket:
+            del self._buckets[day]
+            del self._days[bisect.bisect_left(self._days, day)]
+
+    def _iter(self, start=None, end=None):
+        lo = 0 if start is None else bisect.bisect_left(self._days, start)
+        hi = len(self._days) if end is None else bisect.bisect_left(self._days, end)
+        for day in self._days[lo:hi]:
+            yield from sorted(self._buckets[day])
+
+    def first(self, n: int | None = None) -> list[int]:
+        """納期の早い順に最大 n 件"""
+        ids = []
+        for order_id in self._iter():
+            if n is not None and len(ids) >= n:
+                break
+            ids.append(order_id)
+        return ids
+
+    def between(self, start=None, end=None, limit: int | None = None) -> list[int]:
+        """納期が start 以上 end 未満の注文（納期順）"""
+        start = None if start is None else parse_date(start).toordinal()
+        end = None if end is None else parse_date(end).toordinal()
+        ids = []
+        for order_id in self._iter(start, end):
+            if limit is not None and len(ids) >= limit:
+                break
+            ids.append(order_id)
+        return ids
+
+    def overdue(self, today, limit: int | None = None) -> list[int]:
+        """納期が today より前の注文"""
+        return self.between(None, today, limit)
+
+    def due_within(self, days: int, today, limit: int | None = None) -> list[int]:
+        """納期が today から days 日後まで（両端を含む）の注文"""
+        today = parse_date(today)
+        return self.between(today, today + timedelta(days=days + 1), limit)
+
+
+class OrderBook:
+    """ステータス・製品別の集計と納期順の未出荷リストを保つ注文台帳
+
+    注文の追加・ステータス変更のたびに索引を更新するので、件数・数量の
+    参照は O(1)、製品別の注文は製品の注文数だけで取り出せる。
+    構築後の追加・ステータス変更は変更ログに注文 ID を記録し、
+    change_seq 以降に変わった注文を changed_since で取り出せる。
+    """
+
+    def __init__(self, orders=()):
+        self._orders = {}
+        self._next_id = 1
+        self._count = defaultdict(int)  # (status, product) -> 件数
+        self._status_count = defaultdict(int)  # status -> 件数
+        self._quantity = defaultdict(int)  # (status, product) -> 数量
+        self._status_quantity = defaultdict(int)  # status -> 数量
+        self._by_product = defaultdict(list)  # product -> [id]（登録順）
+        self._pending = DeliveryQueue()
+        self._changes = array("q")
+        for order in orders:
+            self.add(order)
+        # 構築時の注文は記録しない（変更ログは構築後の変更だけ）
+        del self._changes[:]
+
+    def __len__(self):
+        return len(self._orders)
+
+    def _index(self, order, sign):
+        key = (order["status"], order["product"])
+        self._count[key] += sign
+        self._status_count[order["status"]] += sign
+        self._quantity[key] += sign * order["quantity"]
+        self._status_quantity[order["status"]] += sign * order["quantity"]
+        if order["status"] == PENDING:
+            if sign > 0:
+                self._pending.add(order["id"], order["delivery_date"])
+            else:
+                self._pending.remove(order["id"])
+
+    def add(self, order: dict) -> int:
+        """注文を登録し、その ID を返す（order に id があればそれを使う）"""
+        row_id = order.get("id") or self._next_id
+        if row_id in self._orders:
+            raise ValueError(f"注文IDが重複しています: {row_id}")
+        row = {"id": row_id, **{k: v for k, v in order.items() if k != "id"}}
+        self._next_id = max(self._next_id, row_id + 1)
+        self._orders[row_id] = row
+        self._by_product[row["product"]].append(row_id)
+        self._index(row, 1)
+        self._changes.append(row_id)
+        return row_id
+
+    @property
+    def next_id(self) -> int:
+        """次に採番する注文 ID"""
+        return self._next_id
+
+    def get(self, order_id: int) -> dict | None:
+        return self._orders.get(order_id)
+
+    def set_status(self, order_id: int, status: str) -> dict:
+        """ステータスを変更し、変更後の注文を返す"""
+        row = self._orders[order_id]
+        if row["status"] != status:
+            self._index(row, -1)
+            row["status"] = status
+            self._index(row, 1)
+            self._changes.append(order_id)
+        return row
+
+    @property
+    def change_seq(self) -> int:
+        """変更ログの件数（changed_since に渡す位置）"""
+        return len(self._changes)
+
+    def changed_since(self, seq: int) -> list[dict]:
+        """変更ログの位置 seq 以降に追加・変更された注文（最後に変わった順）"""
+        ids = dict.fromkeys(reversed(self._changes[seq:]))
+        return [self._orders[i] for i in reversed(ids)]
+
+    def orders(self, status: str | None = None, product: str | None = None):
+        """注文（登録順）"""
+        if product is not None:
+            rows = (self._orders[i] for i in self._by_product.get(product, ()))
+        else:
+            rows = self._orders.values()
+        if status is not None:
+            rows = (row for row in rows if row["status"] == status)
+        return list(rows)
+
+    def count(self, status: str | None = None, product: str | None = None) -> int:
+        """注文件数"""
+        if status is None:
+            if product is None:
+                return len(self._orders)
+            return len(self._by_product.get(product, ()))
+        if product is None:
+            return self._status_count.get(status, 0)
+        return self._count.get((status, product), 0)
+
+    def quantity(self, status: str, product: str | None = None) -> int:
+        """注文数量の合計"""
+        if product is None:
+            return self._status_quantity.get(status, 0)
+        return self._quantity.get((status, product), 0)
+
+    def quantity_by_product(self, status: str = PENDING) -> dict:
+        """製品ごとの注文数量（0件の製品は含まない）"""
+        return {
+            product: quantity
+            for (row_status, product), quantity in self._quantity.items()
+            if row_status == status and quantity
+        }
+
+    def pending_by_date(self, limit: int | None = None) -> list[dict]:
+        """未出荷注文を納期の早い順に返す"""
+        return [self._orders[i] for i in self._pending.first(limit)]
+
+    def overdue(self, today, limit: int | None = None) -> list[dict]:
+        """納期を過ぎた未出荷注文（納期順）"""
+        return [self._orders[i] for i in self._pending.overdue(today, limit)]
+
+    def due_within(self, days: int, today, limit: int | None = None) -> list[dict]:
+        """today から days 日以内が納期の未出荷注文（納期順）"""
+        return [self._orders[i] for i in self._pending.due_within(days, today, limit)]
@@ -0,0 +1,76 @@
+"""製品マスタ"""
+
+from __future__ import annotations
+
+import pyarrow as pa
+
+PRODUCT_SCHEMA = pa.schema(
+    [("name", pa.string()), ("stock", pa.int64()), ("unit", pa.string())]
+)
+
+
+class ProductRegistry:
+    """名前・ID で O(1) 参照できる製品マスタ
+
+    ID は登録順の連番で、一覧（セレクトボックス用）も登録順に返す。
+    """
+
+    def __init__(self, products=()):
+        self._by_name = {}
+        self._rows = []
+        self._names = None
+        for product in products:
+            self.add(product)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def add(self, product: dict) -> int:
+        """製品を登録し、その ID を返す"""
+        name = product["name"]
+        if name in self._by_name:
+            raise ValueError(f"製品が重複しています: {name}")
+        row = dict(product)
+        row_id = len(self._rows)
+        self._rows.append(row)
+        self._by_name[name] = row_id
+        self._names = None
+        return row_id
+
+    def get(self, name: str) -> dict | None:
+        """製品を名前で取得（内部の行をそのまま返す）"""
+        row_id = self._by_name.get(name)
+        return None if row_id is None else self._rows[row_id]
+
+    def names(self) -> list[str]:
+        """製品名の一覧（登録順）"""
+        if self._names is None:
+            self._names = [row["name"] for row in self._rows]
+        return self._names
+
+    def set_stock(self, name: str, stock: int) -> int:
+        """在庫数を stock にし、変化量を返す"""
+        row = self._rows[self._by_name[name]]
+        delta = stock - row["stock"]
+        row["stock"] = stock
+        return delta
+
+    def to_list(self) -> list[dict]:
+        """製品一覧のコピー（登録順）"""
+        return [dict(row) for row in self._rows]
+
+    def to_arrow(self) -> pa.Table:
+        """製品一覧の Arrow テーブル（登録順、列は name, stock, unit）"""
+        return pa.Table.from_arrays(
+            [
+                pa.array([row[name] for row in self._rows], type=field.type)
+                for name, field in zip(PRODUCT_SCHEMA.names, PRODUCT_SCHEMA)
+            ],
+            schema=PRODUCT_SCHEMA,
+        )
@@ -0,0 +1,165 @@
+"""再実行ごとの区間計測とプロファイル
+
+アプリの再実行を lap() で区切り、区間ごとの所要時間を記録する。
+無効なときの lap() は属性を1つ見て戻るだけなので、計測点を
+残したままでもほとんどコストはかからない。
+
+capture を指定した再実行では cProfile と tracemalloc も動かし、
+関数ごとの累積時間とメモリの確保箇所を記録する。記録は
+JSON Lines（1行1再実行）でログに追記する。
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+DEFAULT_LOG_PATH = os.path.join("data", "profile", "reruns.jsonl")
+
+# プロファイルで表示する関数・確保箇所の件数
+PROFILE_TOP = 30
+MEMORY_TOP = 15
+
+_log_lock = threading.Lock()
+
+
+class RerunProfiler:
+    """1回の再実行を区間ごとに計測する
+
+    start() から finish() までを1回の再実行とし、lap(name) は直前の
+    lap（または start）からの経過時間を name の区間として記録する。
+    直前の再実行の記録は last に残る。フラグメントだけの再実行は
+    fragment() で囲み、同じ形式の記録（fragment 付き）を残す。
+    """
+
+    def __init__(self, log_path: str | None = DEFAULT_LOG_PATH):
+        self.log_path = log_path
+        self.enabled = False
+        self.last = None
+        self.view = None
+        self._sections = None
+        self._started = self._lap_at = 0.0
+        self._profile = None
+        self._tracing = False
+
+    def start(self, enabled: bool = True, capture: bool = False) -> None:
+        """再実行の計測を始める（capture なら cProfile・tracemalloc も）"""
+        self.enabled = enabled or capture
+        if not self.enabled:
+            self._sections = None
+            return
+        self._sections = {}
+        self._profile = None
+        self._tracing = False
+        if capture:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            tracemalloc.reset_peak()
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # 別のセッションがプロファイル中（3.12 以降は1つしか動かせない）
+                self._profile = None
+        self._started = self._lap_at = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """直前の区切りからここまでを name の区間として記録"""
+        if self._sections is None:
+            return
+        now = time.perf_counter()
+        self._sections[name] = self._sections.get(name, 0.0) + (now - self._lap_at)
+        self._lap_at = now
+
+    @contextmanager
+    def fragment(self, name: str):
+        """フラグメントだけの再実行を1回の再実行として計測する
+
+        有効かどうかと画面名は直前のページ全体の再実行のものを使う。
+        """
+        self.start(self.enabled)
+        try:
+            yield
+        finally:
+            self.finish(self.view, fragment=name)
+
+    def finish(
+        self, view: str | None = None, fragment: str | None = None
+    ) -> dict | None:
+        """計測を終えて記録を返す（無効なら None）
+
+        記録は time, view, total_ms, sections（区間名 -> ミリ秒）を持ち、
+        フラグメントだけの再実行では fragment（関数名）、capture した
+        再実行ではさらに peak_mb, profile（上位の関数）, allocations
+        （確保の多い行）を持つ。log_path があれば追記する。
+        """
+        if fragment is None:
+            self.view = view
+        if self._sections is None:
+            return None
+        now = time.perf_counter()
+        self.lap("その他")
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "view": view,
+            "total_ms": round((now - self._started) * 1000, 2),
+            "sections": {k: round(v * 1000, 2) for k, v in self._sections.items()},
+        }
+        if fragment is not None:
+            record["fragment"] = fragment
+        if self._profile is not None:
+            self._profile.disable()
+            record.update(self._capture_result())
+        self._sections = None
+        self.last = record
+        if self.log_path:
+            self._append_log(record)
+        return record
+
+    def _capture_result(self) -> dict:
+        # メモリを先に取る（pstats の整形で確保する分を含めないように）
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ]
+        )
+        if self._tracing:
+            tracemalloc.stop()
+        allocations = [
+            {
+                "line": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:MEMORY_TOP]
+        ]
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        self._profile = None
+        return {
+            "peak_mb": round(peak / 2**20, 2),
+            "profile": stream.getvalue(),
+            "allocations": allocations,
+        }
+
+    def _append_log(self, record: dict) -> None:
+        # プロファイルの本文は大きいのでログには残さない
+        line = {k: v for k, v in record.items() if k != "profile"}
+        directory = os.path.dirname(self.log_path)
+        with _log_lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
@@ -0,0 +1,218 @@
+"""日別・製品別の入出庫集計"""
+
+from __future__ import annotations
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+# セルのキー（製品, 種別, 日）を1つの整数にまとめるときのビット幅
+_DAY_BITS = 32
+_TYPE_BITS = 8
+# 1970年より前の日も正の値にする
+_DAY_OFFSET = 1 << (_DAY_BITS - 1)
+
+
+def day_of(ts: int) -> int:
+    """エポック秒をエポック日（1970-01-01 からの日数）に変換"""
+    return int(ts) // SECONDS_PER_DAY
+
+
+def _cell_keys(day, type, product) -> np.ndarray:
+    """(日, 種別, 製品) を、製品・種別・日の順に並ぶ整数キーにする"""
+    day = np.asarray(day, dtype=np.int64) + _DAY_OFFSET
+    type = np.asarray(type, dtype=np.int64)
+    product = np.asarray(product, dtype=np.int64)
+    return (((product << _TYPE_BITS) | type) << _DAY_BITS) | day
+
+
+def _split_keys(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_cell_keys の逆変換（日, 種別, 製品）"""
+    day = (keys & ((1 << _DAY_BITS) - 1)) - _DAY_OFFSET
+    rest = keys >> _DAY_BITS
+    return day, rest & ((1 << _TYPE_BITS) - 1), rest >> _TYPE_BITS
+
+
+class DailyRollup:
+    """日 × 製品 × 種別 → 数量合計・件数 の集計表
+
+    入出庫の登録ごとに add で更新し、KPI は日単位の参照だけで求める。
+    製品・種別は Ledger の整数コードで扱う。台帳から作り直す
+    from_ledger と、台帳との突き合わせを行う verify を持つ。
+
+    セルはキー（製品・種別・日の順）で並べた配列で持つので、製品・
+    種別ごとの期間の合計は二分探索した範囲の和で求まり、スナップショット
+    からの復元も配列をそのまま使える。全製品の合計は 種別 × 日 の配列。
+    """
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.int64)
+        self._quantity = np.empty(0, dtype=np.int64)
+        self._count = np.empty(0, dtype=np.int64)
+        # 全製品の数量合計（種別 × (日 - first_day)）
+        self._totals = np.zeros((0, 0), dtype=np.int64)
+        self.first_day = None
+        self.last_day = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, ts: int, product: int, type: int, quantity: int) -> None:
+        """1件分を加算"""
+        day = day_of(ts)
+        key = _cell_keys(day, type, product)
+        i = int(np.searchsorted(self._keys, key))
+        if (
+            i < len(self._keys)
+            and self._keys[i] == key
+            and type < len(self._totals)
+            and self.first_day <= day <= self.last_day
+        ):
+            # その日のセルがあれば（大半の登録）その場で加算する
+            self._quantity[i] += quantity
+            self._count[i] += 1
+            self._totals[type, day - self.first_day] += quantity
+            return
+        self.add_many([ts], [product], [type], [quantity])
+
+    def add_many(self, ts, products, types, quantity) -> None:
+        """複数件をまとめて加算（各引数は同じ長さの配列）"""
+        if not len(ts):
+            return
+        days = np.asarray(ts, dtype=np.int64) // SECONDS_PER_DAY
+        types = np.asarray(types, dtype=np.int64)
+        quantity = np.asarray(quantity, dtype=np.int64)
+        unique, inverse = np.unique(
+            _cell_keys(days, types, products), return_inverse=True
+        )
+        self._merge(
+            unique,
+            np.bincount(inverse, weights=quantity, minlength=len(unique)).astype(
+                np.int64
+            ),
+            np.bincount(inverse, minlength=len(unique)).astype(np.int64),
+        )
+        self._add_totals(days, types, quantity)
+
+    def _merge(self, keys, quantity, count) -> None:
+        """昇順で重複のないキーのセルを加算する（ないセルは差し込む）"""
+        pos = np.searchsorted(self._keys, keys)
+        found = pos < len(self._keys)
+        found[found] = self._keys[pos[found]] == keys[found]
+        self._quantity[pos[found]] += quantity[found]
+        self._count[pos[found]] += count[found]
+        new = ~found
+        if new.any():
+            at = pos[new]
+            self._keys = np.insert(self._keys, at, keys[new])
+            self._quantity = np.insert(self._quantity, at, quantity[new])
+            self._count = np.insert(self._count, at, count[new])
+
+    def _add_totals(self, days, types, quantity) -> None:
+        """全製品の合計に加算する（日・種別の範囲が広がれば配列を広げる）"""
+        first, last = int(days.min()), int(days.max())
+        if self.first_day is not None:
+            first = min(first, self.first_day)
+            last = max(last, self.last_day)
+        shape = (max(int(types.max()) + 1, len(self._totals)), last - first + 1)
+        if shape != self._totals.shape:
+            totals = np.zeros(shape, dtype=np.int64)
+            if self.first_day is not None:
+                start = self.first_day - first
+                rows, width = self._totals.shape
+                totals[:rows, start : start + width] = self._totals
+            self._totals = totals
+            self.first_day, self.last_day = first, last
+        rows, width = shape
+        self._totals += (
+            np.bincount(
+                types * width + (days - first),
+                weights=quantity,
+                minlength=rows * width,
+            )
+            .astype(np.int64)
+            .reshape(shape)
+        )
+
+    @classmethod
+    def from_ledger(cls, ledger) -> "DailyRollup":
+        """台帳全体から集計し直す"""
+        rollup = cls()
+        rollup.add_many(
+            ledger.ts, ledger.product_codes, ledger.type_codes, ledger.quantity
+        )
+        return rollup
+
+    def to_arrays(self) -> dict:
+        """集計表を列の配列（day, type, product, quantity, count）にする"""
+        day, type, product = _split_keys(self._keys)
+        return {
+            "day": day,
+            "type": type.astype(np.int8),
+            "product": product.astype(np.int32),
+            "quantity": self._quantity.copy(),
+            "count": self._count.copy(),
+        }
+
+    @classmethod
+    def from_arrays(cls, day, type, product, quantity, count) -> "DailyRollup":
+        """to_arrays の結果から集計表を作る（配列はコピーする）"""
+        rollup = cls()
+        if not len(day):
+            return rollup
+        day = np.asarray(day, dtype=np.int64)
+        type = np.asarray(type, dtype=np.int64)
+        quantity = np.asarray(quantity, dtype=np.int64)
+        keys = _cell_keys(day, type, product)
+        # to_arrays の結果はキー順なので、並べ替えはほぼ素通りになる
+        order = np.argsort(keys, kind="stable")
+        rollup._keys = keys[order]
+        rollup._quantity = quantity[order]
+        rollup._count = np.asarray(count, dtype=np.int64)[order]
+        rollup._add_totals(day, type, quantity)
+        return rollup
+
+    def quantity(self, day: int, type: int, product: int | None = None) -> int:
+        """1日分の数量合計"""
+        return self.sum(type, day, day, product)
+
+    def sum(
+        self,
+        type: int,
+        first_day: int | None = None,
+        last_day: int | None = None,
+        product: int | None = None,
+    ) -> int:
+        """first_day から last_day まで（両端を含む）の数量合計"""
+        if self.first_day is None:
+            return 0
+        first = self.first_day if first_day is None else max(first_day, self.first_day)
+        last = self.last_day if last_day is None else min(last_day, self.last_day)
+        if last < first:
+            return 0
+        if product is None:
+            if type >= len(self._totals):
+                return 0
+            row = self._totals[type]
+            return int(row[first - self.first_day : last - self.first_day + 1].sum())
+        lo = np.searchsorted(self._keys, _cell_keys(first, type, product))
+        hi = np.searchsorted(self._keys, _cell_keys(last, type, product), "right")
+        return int(self._quantity[lo:hi].sum())
+
+    def _cells_at(self, keys: np.ndarray) -> np.ndarray:
+        """キーのセルの (数量合計, 件数)（ないセルは 0）"""
+        values = np.zeros((len(keys), 2), dtype=np.int64)
+        pos = np.searchsorted(self._keys, keys)
+        found = pos < len(self._keys)
+        found[found] = self._keys[pos[found]] == keys[found]
+        values[found, 0] = self._quantity[pos[found]]
+        values[found, 1] = self._count[pos[found]]
+        return values
+
+    def verify(self, ledger) -> list[tuple]:
+        """台帳から作り直した集計と比較し、食い違うキーを返す"""
+        expected = DailyRollup.from_ledger(ledger)
+        keys = np.union1d(self._keys, expected._keys)
+        mismatched = (self._cells_at(keys) != expected._cells_at(keys)).any(axis=1)
+        day, type, product = _split_keys(keys[mismatched])
+        return sorted(zip(day.tolist(), type.tolist(), product.tolist()))
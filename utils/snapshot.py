@@ -0,0 +1,212 @@
+"""在庫状態のスナップショット（Arrow IPC / Parquet）
+
+製品・注文・台帳・日別集計を1つのディレクトリに書き出す。
+Arrow IPC 形式（既定）はメモリマップで読み込み、台帳の列は
+コピーも解析もせずにそのまま Ledger として使う。Parquet は
+ファイルが小さいかわりに、読み込み時に展開が必要。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+import pyarrow as pa
+
+from utils.ledger import Ledger
+from utils.rollup import DailyRollup
+
+SNAPSHOT_FORMATS = ("arrow", "parquet")
+
+MANIFEST = "manifest.json"
+
+_LEDGER_SCHEMA = pa.schema(
+    [
+        ("ts", pa.int64()),
+        ("product", pa.int32()),
+        ("type", pa.int8()),
+        ("quantity", pa.int64()),
+        ("note", pa.large_string()),
+    ]
+)
+_ROLLUP_SCHEMA = pa.schema(
+    [
+        ("day", pa.int64()),
+        ("type", pa.int8()),
+        ("product", pa.int32()),
+        ("quantity", pa.int64()),
+        ("count", pa.int64()),
+    ]
+)
+
+
+class SnapshotError(ValueError):
+    """スナップショットが見つからない・壊れている・一式が揃っていない"""
+
+
+def _ledger_table(ledger: Ledger) -> pa.Table:
+    n = len(ledger)
+    notes = pa.LargeStringArray.from_buffers(
+        n,
+        pa.py_buffer(np.ascontiguousarray(ledger.note_offsets)),
+        pa.py_buffer(ledger.note_bytes),
+    )
+    return pa.Table.from_arrays(
+        [
+            pa.array(ledger.ts),
+            pa.array(ledger.product_codes),
+            pa.array(ledger.type_codes),
+            pa.array(ledger.quantity),
+            notes,
+        ],
+        schema=_LEDGER_SCHEMA,
+    )
+
+
+def _write_table(table: pa.Table, path: str, format: str) -> None:
+    tmp = f"{path}.tmp"
+    if format == "arrow":
+        # 圧縮しない（メモリマップでそのまま読めるように）
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    else:
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def _read_table(path: str, format: str, memory_map: bool) -> pa.Table:
+    if format == "arrow":
+        source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+        return pa.ipc.open_file(source).read_all()
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path, memory_map=memory_map)
+
+
+def write_snapshot(
+    directory: str,
+    products: list[dict],
+    orders: list[dict],
+    ledger: Ledger,
+    rollup: DailyRollup,
+    format: str = "arrow",
+    metadata: dict | None = None,
+) -> dict:
+    """スナップショットを書き出し、マニフェストを返す
+
+    各ファイルを書き終えてから最後にマニフェストを置き換えるので、
+    書き出し中に読み込まれても古い一式か新しい一式のどちらかになる。
+    """
+    if format not in SNAPSHOT_FORMATS:
+        raise SnapshotError(f"対応していない形式です: {format}")
+    os.makedirs(directory, exist_ok=True)
+    snapshot_id = uuid.uuid4().hex
+    tables = {
+        "products": pa.Table.from_pylist(products),
+        "orders": pa.Table.from_pylist(orders),
+        "ledger": _ledger_table(ledger),
+        "rollup": pa.Table.from_pydict(rollup.to_arrays(), schema=_ROLLUP_SCHEMA),
+    }
+    files = {}
+    for name, table in tables.items():
+        table = table.replace_schema_metadata({"snapshot_id": snapshot_id})
+        files[name] = f"{name}-{snapshot_id}.{format}"
+        _write_table(table, os.path.join(directory, files[name]), format)
+
+    manifest = {
+        "id": snapshot_id,
+        "format": format,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "files": files,
+        "rows": {name: table.num_rows for name, table in tables.items()},
+        "product_names": list(ledger.product_names),
+        **(metadata or {}),
+    }
+    tmp = os.path.join(directory, f"{MANIFEST}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+
+    # 以前のスナップショットのファイルを片付ける
+    current = set(files.values()) | {MANIFEST}
+    for entry in os.listdir(directory):
+        if entry not in current and entry.endswith(SNAPSHOT_FORMATS):
+            os.remove(os.path.join(directory, entry))
+    return manifest
+
+
+def read_manifest(directory: str) -> dict:
+    """マニフェストを読む（なければ SnapshotError）"""
+    path = os.path.join(directory, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise SnapshotError(f"スナップショットがありません: {directory}") from None
+
+
+def _column(table: pa.Table, name: str) -> np.ndarray:
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy()
+
+
+def _ledger_from_table(table: pa.Table, product_names) -> Ledger:
+    if not table.num_rows:
+        return Ledger.from_arrays([], [], [], [], [], b"", product_names)
+    notes = table.column("note").combine_chunks()
+    _, offsets, data = notes.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[
+        notes.offset : notes.offset + len(notes) + 1
+    ]
+    data = memoryview(data) if data is not None else b""
+    if offsets[0]:
+        data = data[offsets[0] :]
+        offsets = offsets - offsets[0]
+    return Ledger.from_arrays(
+        _column(table, "ts"),
+        _column(table, "product"),
+        _column(table, "type"),
+        _column(table, "quantity"),
+        offsets,
+        data,
+        product_names,
+    )
+
+
+def read_snapshot(directory: str, memory_map: bool = True) -> dict:
+    """スナップショットを読み込む
+
+    products・orders（dict のリスト）、ledger（Ledger）、rollup
+    （DailyRollup）、manifest を持つ dict を返す。Arrow IPC 形式なら
+    台帳の列はメモリマップしたファイルを直接参照する。
+    """
+    manifest = read_manifest(directory)
+    tables = {}
+    for name, file in manifest["files"].items():
+        path = os.path.join(directory, file)
+        if not os.path.exists(path):
+            raise SnapshotError(f"スナップショットのファイルがありません: {file}")
+        table = _read_table(path, manifest["format"], memory_map)
+        snapshot_id = (table.schema.metadata or {}).get(b"snapshot_id", b"").decode()
+        if snapshot_id != manifest["id"]:
+            raise SnapshotError(f"スナップショットの一式が揃っていません: {file}")
+        tables[name] = table
+
+    rollup = tables["rollup"]
+    return {
+        "manifest": manifest,
+        "products": tables["products"].to_pylist(),
+        "orders": tables["orders"].to_pylist(),
+        "ledger": _ledger_from_table(tables["ledger"], manifest["product_names"]),
+        "rollup": DailyRollup.from_arrays(
+            *(_column(rollup, c) for c in _ROLLUP_SCHEMA.names)
+        ),
+    }
@@ -0,0 +1,101 @@
+"""製品ごとの在庫数推移"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import estimate_size
+from utils.ledger import RECEIPT, TYPES
+
+START = "開始"
+
+# 推移を保持しておく製品数とメモリの上限
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def compute_stock_history(ledger, product: str, current_stock: int) -> pd.DataFrame:
+    """台帳から製品の在庫数推移を求める
+
+    各入出庫の符号付き数量の累積和から、入出庫直後の在庫数を求める。
+    先頭には最初の入出庫の直前の在庫数を「開始」行として置く。
+    列は datetime（datetime64）, stock, type, quantity。
+    """
+    indices = ledger.select(product=product)[::-1]
+    if not len(indices):
+        return pd.DataFrame(columns=["datetime", "stock", "type", "quantity"])
+    if not ledger.time_sorted:
+        indices = indices[np.argsort(ledger.ts[indices], kind="stable")]
+
+    ts = ledger.ts[indices]
+    type_codes = ledger.type_codes[indices]
+    quantity = ledger.quantity[indices]
+    signed = np.where(type_codes == ledger.type_code(RECEIPT), quantity, -quantity)
+    balance = np.cumsum(signed)
+    start_stock = current_stock - int(balance[-1])
+
+    types = np.asarray(TYPES, dtype=object)[type_codes]
+    return pd.DataFrame(
+        {
+            "datetime": np.concatenate([ts[:1], ts]).view("datetime64[s]"),
+            "stock": np.concatenate([[start_stock], start_stock + balance]),
+            "type": np.concatenate([[START], types]),
+            "quantity": np.concatenate([[0], quantity]),
+        }
+    )
+
+
+class StockHistoryCache:
+    """製品ごとの在庫数推移のメモ化（LRU で件数・バイト数の上限を管理）
+
+    製品に新しい入出庫が記録されたときだけ、その製品の結果を破棄する。
+    返すのはコピーなので、呼び出し側で変更してもキャッシュは変わらない。
+    排他はストアのロックで行う前提。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()  # 製品名 -> (DataFrame, バイト数)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, ledger, product: str, current_stock: int) -> pd.DataFrame:
+        entry = self._frames.get(product)
+        if entry is not None:
+            self.hits += 1
+            self._frames.move_to_end(product)
+            return entry[0].copy()
+        self.misses += 1
+        frame = compute_stock_history(ledger, product, current_stock)
+        size = estimate_size(frame)
+        self._frames[product] = (frame, size)
+        self._bytes += size
+        # 直前に追加した1件は上限を超えていても残す
+        while len(self._frames) > 1 and (
+            len(self._frames) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, evicted) = self._frames.popitem(last=False)
+            self._bytes -= evicted
+        return frame.copy()
+
+    def invalidate(self, product: str | None = None) -> None:
+        """製品（省略時は全製品）の結果を破棄"""
+        if product is None:
+            self._frames.clear()
+            self._bytes = 0
+        else:
+            entry = self._frames.pop(product, None)
+            if entry is not None:
+                self._bytes -= entry[1]
@@ -0,0 +1,1498 @@
+"""在庫データの永続化レイヤー
+
+製品・注文・入出庫履歴の読み書きは InventoryStore を通して行う。
+読み取りはメモリ上の製品・注文リストと列指向の台帳（Ledger）から行い、
+変更はサブクラスが永続化する。実装はメモリ上で完結する MemoryStore と、
+SQLite（WALモード）に保存する SQLiteStore の2種類。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.bulk_import import (
+    ORDER_FIELDS,
+    InvalidImportError,
+    normalize_orders,
+    normalize_transactions,
+)
+from utils.ledger import (
+    CHECKPOINT_INTERVAL,
+    DATETIME_FORMAT,
+    RECEIPT,
+    SHIPMENT,
+    TYPES,
+    Ledger,
+    encode_notes,
+    to_epoch,
+)
+from utils.orders import PENDING, OrderBook, order_table
+from utils.products import ProductRegistry
+from utils.rollup import SECONDS_PER_DAY, DailyRollup
+from utils.snapshot import SnapshotError, read_snapshot, write_snapshot
+from utils.stock_history import StockHistoryCache
+from utils.trends import (
+    DEFAULT_MAX_BUCKETS,
+    RESOLUTIONS,
+    TrendPyramid,
+    choose_resolution,
+)
+
+DEFAULT_DB_PATH = os.path.join("data", "inventory.db")
+DEFAULT_SNAPSHOT_DIR = os.path.join("data", "snapshot")
+
+# shipments は ledger のうち出庫の追加でだけ変わる（需要予測のキャッシュキー用）
+DATASETS = ("products", "orders", "ledger", "shipments")
+
+
+def _epoch_or_none(value):
+    return to_epoch(value) if value is not None else None
+
+
+class InsufficientStockError(Exception):
+    """出庫数が在庫数を上回る（available は分かる場合の現在の在庫数）"""
+
+    def __init__(self, product: str, available: int | None = None):
+        super().__init__(product)
+        self.product = product
+        self.available = available
+
+
+class UnknownProductError(KeyError):
+    """製品マスタに存在しない製品"""
+
+
+class InventoryStore:
+    """在庫データストアの基底クラス
+
+    入出庫履歴は新しい順に返す。日時は transaction_frame では
+    datetime64、transaction_table・transaction_page では timestamp[s]、
+    transactions では表示用の文字列（DATETIME_FORMAT）。*_table は
+    表示用の Arrow テーブルを返す（st.dataframe にそのまま渡せる）。
+    サブクラスは _persist_* で変更を永続化する。
+
+    products・orders・ledger の各データセットは、変更のたびに増える
+    バージョン番号を持つ（派生データのキャッシュキーに使う）。
+    sequence は台帳・注文の変更の位置で、changes_since でそれ以降に
+    追加された入出庫と変わった注文だけを取り出せる（表示中の表に
+    差分だけを反映する live.LiveTable が使う）。
+
+    1つのストアをプロセス内の全セッションで共有できる。変更は
+    record・add_order などの変更 API がストアのロック内で行い、
+    読み取りはロック内で作ったコピーか、変更されない値（Arrow テーブル・
+    集計値）を返す。返した値を呼び出し側が変更してもストアには影響しない。
+    """
+
+    def __init__(self):
+        self.registry = ProductRegistry()
+        self.order_book = OrderBook()
+        self.ledger = Ledger()
+        self.rollup = DailyRollup()
+        # 推移の多段集計（初めて trend を呼んだときに作り、以降は増分で更新）
+        self._trends = None
+        self._stock_history = StockHistoryCache()
+        self._total_stock = 0
+        # 期首の在庫数（製品名 -> 在庫数。在庫数 = 期首 + 台帳の増減）
+        self._opening = {}
+        self._versions = dict.fromkeys(DATASETS, 0)
+        # データを読み込み直すたびに増やす（それまでの sequence を無効にする）
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+
+    @contextmanager
+    def _locked(self):
+        """ストアのロックを取り、他のプロセスの変更を読み込んでから処理する
+
+        読み込み（_refresh）は一番外側で取ったときだけ行うので、ロック内の
+        処理の途中でモデルが変わることはない。
+        """
+        with self._lock:
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1:
+                    self._refresh()
+                yield
+            finally:
+                self._lock_depth -= 1
+
+    def _refresh(self) -> None:
+        """他のプロセスが永続化した変更をメモリ上のモデルに読み込む"""
+
+    def _persist_seed(self, products, orders, rows) -> None:
+        """初期データの永続化"""
+
+    def _persist_record(self, type, product, quantity, ts, note) -> int:
+        """入出庫1件を永続化し、反映後の在庫数を返す
+
+        在庫の検査と更新は1つの不可分な操作として行い、在庫が足りなければ
+        InsufficientStockError を送出する。基底クラスはメモリ上の在庫数で
+        判定する（呼び出し側がストアのロックを持っている）。
+        """
+        stock = self.registry.get(product)["stock"] + _signed(type, quantity)
+        if stock < 0:
+            raise InsufficientStockError(product, stock + quantity)
+        return stock
+
+    def _persist_order(self, order) -> int | None:
+        """注文1件の永続化（採番した ID を返す。None ならメモリ側で採番）"""
+
+    def _persist_order_status(self, order_id, status) -> None:
+        """注文ステータス変更の永続化"""
+
+    def _persist_import_transactions(self, batches, deltas) -> dict | None:
+        """入出庫の一括登録を永続化し、反映後の在庫数（製品名 -> 在庫数）を返す
+
+        batches はチャンクごとに列の dict（ts, type, product, quantity,
+        note。type は種別名）を返す。deltas（製品名 -> 在庫の増減）は
+        batches を読み終えた時点で確定する。途中で例外が出たら何も
+        残さないこと。None を返すとメモリ上の在庫数に deltas を加える。
+        """
+        for _ in batches:
+            pass
+        return None
+
+    def _persist_import_orders(self, batches) -> list[int] | None:
+        """注文の一括登録の永続化
+
+        batches は注文（ID なし）のリストを返す。リストごとに採番した
+        先頭の ID（リスト内は連番）を返す。None ならメモリ側で採番する。
+        """
+        for _ in batches:
+            pass
+        return None
+
+    def _snapshot_metadata(self) -> dict:
+        """スナップショットのマニフェストに添える情報"""
+        return {}
+
+    def _load(self, products, orders, rows, ledger=None, rollup=None) -> None:
+        """メモリ上のモデルを構築する（rows は時刻順の台帳行）
+
+        ledger・rollup を渡すと（スナップショットから復元した場合）、
+        それに rows を追記して使う。
+        """
+        self.registry = ProductRegistry(products)
+        self.order_book = OrderBook(orders)
+        if ledger is None:
+            ledger = Ledger(capacity=len(rows) * 2)
+            rollup = None
+        # 台帳の製品コードを製品マスタの ID と揃えておく
+        for name in self.registry.names():
+            ledger.product_code(name, create=True)
+        start = len(ledger)
+        ledger.extend(rows)
+        self.ledger = ledger
+        if rollup is None:
+            rollup = DailyRollup.from_ledger(ledger)
+        else:
+            rollup.add_many(
+                ledger.ts[start:],
+                ledger.product_codes[start:],
+                ledger.type_codes[start:],
+                ledger.quantity[start:],
+            )
+        self.rollup = rollup
+        self._trends = None
+        self._stock_history.invalidate()
+        self._total_stock = sum(p["stock"] for p in self.registry)
+        self._opening = {
+            p["name"]: p["stock"] - ledger.net(p["name"]) for p in self.registry
+        }
+        self._generation += 1
+        self._bump(*DATASETS)
+
+    def _bump(self, *datasets) -> None:
+        for name in datasets:
+            self._versions[name] += 1
+
+    def version(self, *datasets) -> tuple:
+        """データセットのバージョン（省略時は全データセット）"""
+        with self._locked():
+            return tuple(self._versions[name] for name in datasets or DATASETS)
+
+    def sequence(self) -> tuple:
+        """変更の位置 (世代, 台帳の件数, 注文の変更ログの件数)"""
+        with self._locked():
+            return (self._generation, len(self.ledger), self.order_book.change_seq)
+
+    def changes_since(self, sequence: tuple) -> dict:
+        """sequence（sequence() の値）より後の変更
+
+        transactions は追加された入出庫（登録順）の Arrow テーブル、
+        orders は追加・ステータス変更された注文（ID 付き、変更後の値）。
+        データを読み込み直して sequence が使えなくなった場合は reset が
+        True（呼び出し側で作り直す）。コストは変更の件数に比例し、
+        台帳・注文全体の件数にはよらない。
+        """
+        with self._locked():
+            current = self.sequence()
+            generation, ledger_seq, order_seq = sequence
+            if generation != self._generation:
+                return {
+                    "sequence": current,
+                    "reset": True,
+                    "transactions": None,
+                    "orders": [],
+                }
+            return {
+                "sequence": current,
+                "reset": False,
+                "transactions": self.ledger.to_arrow(np.arange(ledger_seq, current[1])),
+                "orders": [
+                    dict(row) for row in self.order_book.changed_since(order_seq)
+                ],
+            }
+
+    def read_at_sequence(self, build) -> tuple:
+        """ロック内で build() を呼び、(sequence(), 結果) を返す
+
+        結果がちょうどその sequence までの変更を含むことを保証する。
+        """
+        with self._locked():
+            return self.sequence(), build()
+
+    def is_empty(self) -> bool:
+        """製品マスタが空かどうか"""
+        with self._locked():
+            return not len(self.registry)
+
+    def seed(self, products, orders, transactions) -> None:
+        """初期データを一括登録"""
+        rows = sorted(
+            (
+                to_epoch(t["datetime"]),
+                t["type"],
+                t["product"],
+                t["quantity"],
+                t.get("note") or "-",
+            )
+            for t in transactions
+        )
+        with self._locked():
+            self._persist_seed(products, orders, rows)
+            self._load(products, orders, rows)
+
+    def products(self) -> list[dict]:
+        """製品一覧（登録順）"""
+        with self._locked():
+            return self.registry.to_list()
+
+    def product_names(self) -> list[str]:
+        """製品名の一覧（登録順、呼び出し側で変更してよいコピー）"""
+        with self._locked():
+            return list(self.registry.names())
+
+    def products_table(self) -> pa.Table:
+        """製品一覧（登録順）の Arrow テーブル"""
+        with self._locked():
+            return self.registry.to_arrow()
+
+    def product(self, name: str) -> dict | None:
+        """製品を名前で取得"""
+        with self._locked():
+            row = self.registry.get(name)
+            return None if row is None else dict(row)
+
+    def orders(
+        self,
+        status: str | None = None,
+        product: str | None = None,
+        with_id: bool = False,
+    ) -> list[dict]:
+        """注文一覧（登録順）"""
+        with self._locked():
+            rows = self.order_book.orders(status, product)
+            return [_order_row(row, with_id) for row in rows]
+
+    def orders_table(
+        self,
+        status: str | None = None,
+        product: str | None = None,
+        with_id: bool = False,
+    ) -> pa.Table:
+        """注文一覧（登録順）の Arrow テーブル"""
+        with self._locked():
+            return order_table(self.order_book.orders(status, product), with_id)
+
+    def pending_orders_by_date(
+        self, limit: int | None = None, with_id: bool = False
+    ) -> list[dict]:
+        """未出荷注文（納期の早い順）"""
+        with self._locked():
+            rows = self.order_book.pending_by_date(limit)
+            return [_order_row(row, with_id) for row in rows]
+
+    def overdue_orders(
+        self, today=None, limit: int | None = None, with_id: bool = False
+    ) -> list[dict]:
+        """納期を過ぎた未出荷注文（納期順）"""
+        with self._locked():
+            rows = self.order_book.overdue(today or date.today(), limit)
+            return [_order_row(row, with_id) for row in rows]
+
+    def orders_due_within(
+        self,
+        days: int,
+        today=None,
+        limit: int | None = None,
+        with_id: bool = False,
+    ) -> list[dict]:
+        """今日から days 日以内が納期の未出荷注文（納期順）"""
+        with self._locked():
+            rows = self.order_book.due_within(days, today or date.today(), limit)
+            return [_order_row(row, with_id) for row in rows]
+
+    def order_count(self, status: str | None = None, product: str | None = None):
+        """注文件数"""
+        with self._locked():
+            return self.order_book.count(status, product)
+
+    def order_quantity(self, status: str = PENDING, product: str | None = None):
+        """注文数量の合計"""
+        with self._locked():
+            return self.order_book.quantity(status, product)
+
+    def pending_by_product(self) -> dict:
+        """製品ごとの未出荷数量"""
+        with self._locked():
+            return self.order_book.quantity_by_product(PENDING)
+
+    def add_order(
+        self, customer, product, quantity, delivery_date, status=PENDING
+    ) -> int:
+        """注文を登録し、その ID を返す"""
+        order = {
+            "customer": customer,
+            "product": product,
+            "quantity": quantity,
+            "delivery_date": delivery_date,
+            "status": status,
+        }
+        with self._locked():
+            if product not in self.registry:
+                raise UnknownProductError(product)
+            order_id = self._persist_order(order)
+            if order_id is not None:
+                order["id"] = order_id
+            order_id = self.order_book.add(order)
+            self._bump("orders")
+        return order_id
+
+    def set_order_status(self, order_id: int, status: str) -> None:
+        """注文のステータスを変更"""
+        with self._locked():
+            if self.order_book.get(order_id) is None:
+                raise KeyError(order_id)
+            self._persist_order_status(order_id, status)
+            self.order_book.set_status(order_id, status)
+            self._bump("orders")
+
+    def transaction_frame(
+        self,
+        product: str | None = None,
+        type: str | None = None,
+        since: datetime | None = None,
+        limit: int | None = None,
+        until: datetime | None = None,
+    ) -> pd.DataFrame:
+        """入出庫履歴（新しい順）を DataFrame で取得"""
+        with self._locked():
+            indices = self.ledger.select(
+                product, type, _epoch_or_none(since), limit, _epoch_or_none(until)
+            )
+            return self.ledger.to_frame(indices)
+
+    def transaction_table(
+        self,
+        product: str | None = None,
+        type: str | None = None,
+        since: datetime | None = None,
+        limit: int | None = None,
+        until: datetime | None = None,
+    ) -> pa.Table:
+        """入出庫履歴（新しい順）の Arrow テーブル"""
+        with self._locked():
+            indices = self.ledger.select(
+                product, type, _epoch_or_none(since), limit, _epoch_or_none(until)
+            )
+            return self.ledger.to_arrow(indices)
+
+    def transaction_page(
+        self,
+        page: int = 1,
+        page_size: int = 50,
+        product: str | None = None,
+        type: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        note: str | None = None,
+        sort: str = "datetime",
+        descending: bool = True,
+    ) -> tuple[pa.Table, int]:
+        """入出庫履歴の1ページ分（page は 1 始まり）の Arrow テーブルと該当件数
+
+        テーブルにするのは表示するページの行だけ。
+        """
+        with self._locked():
+            indices, total = self.ledger.page(
+                (page - 1) * page_size,
+                page_size,
+                product,
+                type,
+                _epoch_or_none(since),
+                _epoch_or_none(until),
+                note,
+                sort,
+                descending,
+            )
+            return self.ledger.to_arrow(indices), total
+
+    def transactions(self, product=None, type=None, since=None, limit=None):
+        """入出庫履歴（新しい順）"""
+        with self._locked():
+            indices = self.ledger.select(product, type, _epoch_or_none(since), limit)
+            return self.ledger.rows(indices)
+
+    def total_quantity(
+        self,
+        type: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        product: str | None = None,
+    ) -> int:
+        """期間内の入庫または出庫の数量合計
+
+        日をまたぐ部分は日別集計（rollup）から、期間の端の1日に
+        満たない部分だけを台帳から求める。
+        """
+        code = None
+        if product is not None:
+            code = self.ledger.product_code(product)
+            if code is None:
+                return 0
+        type_code = self.ledger.type_code(type)
+        start = _epoch_or_none(since)
+        end = _epoch_or_none(until)
+
+        with self._locked():
+            rollup = self.rollup
+            if rollup.first_day is None:
+                return 0
+            first = (
+                rollup.first_day
+                if start is None
+                else -(-start // SECONDS_PER_DAY)  # 切り上げ
+            )
+            last = rollup.last_day if end is None else end // SECONDS_PER_DAY - 1
+            if last < first:
+                return self.ledger.sum_quantity(product, type, start, end)
+
+            total = rollup.sum(type_code, first, last, code)
+            if start is not None and start < first * SECONDS_PER_DAY:
+                total += self.ledger.sum_quantity(
+                    product, type, start, first * SECONDS_PER_DAY
+                )
+            if end is not None and end > (last + 1) * SECONDS_PER_DAY:
+                total += self.ledger.sum_quantity(
+                    product, type, (last + 1) * SECONDS_PER_DAY, end
+                )
+            return total
+
+    def trend(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        product: str | None = None,
+        resolution: str | None = None,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ) -> tuple[str, pd.DataFrame]:
+        """期間内の入庫・出庫の推移を (粒度, DataFrame) で取得
+
+        粒度は hour / day / week / month。省略すると、期間を max_buckets 個
+        以内の区間で表せる最も細かい粒度を選ぶ。DataFrame は区間ごと・
+        種別ごとの行（datetime（区間の開始）, type, quantity, count）で、
+        期間の端にかかる区間は区間全体を集計する。多段集計から区間の数に
+        比例するコストで求め、台帳は集計し直さない。
+        """
+        code = None
+        if product is not None:
+            code = self.ledger.product_code(product)
+        with self._locked():
+            ts = self.ledger.ts
+            if (product is not None and code is None) or not len(ts):
+                return resolution or RESOLUTIONS[0], pd.DataFrame(
+                    columns=["datetime", "type", "quantity", "count"]
+                )
+            if since is None:
+                start = int(ts[0] if self.ledger.time_sorted else ts.min())
+            else:
+                start = to_epoch(since)
+            if until is None:
+                end = int(ts[-1] if self.ledger.time_sorted else ts.max()) + 1
+            else:
+                end = to_epoch(until)
+            end = max(start + 1, end)
+            if resolution is None:
+                resolution = choose_resolution(start, end, max_buckets)
+            if self._trends is None:
+                self._trends = TrendPyramid.from_ledger(self.ledger)
+            frames = []
+            for type in TYPES:
+                starts, quantity, count = self._trends.series(
+                    resolution, self.ledger.type_code(type), start, end, code
+                )
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            "datetime": starts,
+                            "type": type,
+                            "quantity": quantity,
+                            "count": count,
+                        }
+                    )
+                )
+        return resolution, pd.concat(frames, ignore_index=True)
+
+    def daily_quantities(self, type: str, since: datetime, days: int) -> np.ndarray:
+        """since から days 日間の入庫または出庫の日別数量（製品（登録順）× 日）
+
+        since は日の始まり（0時）にする。該当する行だけを索引から取り出して
+        集計するので、台帳全体は走査しない。
+        """
+        with self._locked():
+            totals = self.ledger.daily_totals(type, to_epoch(since), days)
+            codes = np.array(
+                [self.ledger.product_code(name) for name in self.registry.names()],
+                dtype=np.int64,
+            )
+            return totals[codes]
+
+    def stock_history(self, product: str) -> pd.DataFrame:
+        """製品の在庫数推移（入出庫ごとの在庫数、古い順）"""
+        with self._locked():
+            row = self.registry.get(product)
+            if row is None:
+                raise UnknownProductError(product)
+            return self._stock_history.get(self.ledger, product, row["stock"])
+
+    def stock_at(self, product: str, when) -> int:
+        """ある時点の在庫数（when より前の入出庫までを反映）
+
+        date を渡すとその日の終わりの時点。現在の在庫数から when 以降の
+        増減を差し引く。増減は台帳のチェックポイントから求めるので、
+        履歴の長さによらず最大 CHECKPOINT_INTERVAL 行をたどるだけで済む。
+        """
+        if not isinstance(when, datetime):
+            when = datetime.combine(when + timedelta(days=1), datetime.min.time())
+        with self._locked():
+            row = self.registry.get(product)
+            if row is None:
+                raise UnknownProductError(product)
+            return row["stock"] - self.ledger.net(product, since=to_epoch(when))
+
+    def total_stock(self) -> int:
+        """全製品の在庫数合計"""
+        with self._locked():
+            return self._total_stock
+
+    def export_snapshot(self, directory: str, format: str = "arrow") -> dict:
+        """製品・注文・台帳・日別集計をスナップショットに書き出す"""
+        with self._locked():
+            return write_snapshot(
+                directory,
+                self.registry.to_list(),
+                self.order_book.orders(),
+                self.ledger,
+                self.rollup,
+                format,
+                self._snapshot_metadata(),
+            )
+
+    def restore_snapshot(self, directory: str) -> dict:
+        """スナップショットからメモリ上のモデルを復元し、マニフェストを返す"""
+        snapshot = read_snapshot(directory)
+        with self._lock:
+            self._load(
+                snapshot["products"],
+                snapshot["orders"],
+                (),
+                snapshot["ledger"],
+                snapshot["rollup"],
+            )
+        return snapshot["manifest"]
+
+    def rebuild_rollup(self) -> None:
+        """日別集計を台帳から作り直す（復旧用）"""
+        with self._locked():
+            self.rollup = DailyRollup.from_ledger(self.ledger)
+            self._trends = None
+            self._total_stock = sum(p["stock"] for p in self.registry)
+            # 集計から作ったメトリクス・チャートのキャッシュを捨てさせる
+            self._bump("ledger")
+
+    def check_consistency(self) -> dict:
+        """日別集計・推移の集計・在庫数がそれぞれの元データと一致するか検査する
+
+        在庫数は全製品について、期首の在庫数に台帳の増減を足したものと
+        比べる。食い違いがなければ空の dict を返す。
+        """
+        with self._locked():
+            problems = {}
+            mismatched = self.rollup.verify(self.ledger)
+            if mismatched:
+                problems["rollup"] = mismatched
+            if self._trends is not None:
+                mismatched = self._trends.verify(self.ledger)
+                if mismatched:
+                    problems["trends"] = mismatched
+            actual_stock = sum(p["stock"] for p in self.registry)
+            if actual_stock != self._total_stock:
+                problems["total_stock"] = (self._total_stock, actual_stock)
+            stock = self._stock_problems()
+            if stock:
+                problems["stock"] = stock
+            return problems
+
+    def _opening_stock(self) -> dict:
+        """期首の在庫数（製品名 -> 在庫数）"""
+        return self._opening
+
+    def _ledger_stock(self) -> dict:
+        """期首の在庫数とメモリ上の台帳の増減から求めた在庫数（全製品）"""
+        opening = self._opening_stock()
+        return {
+            name: opening.get(name, 0) + self.ledger.net(name)
+            for name in self.registry.names()
+        }
+
+    def _stock_problems(self) -> dict:
+        """台帳から求めた在庫数とメモリ上の在庫数の食い違い"""
+        problems = {}
+        for name, expected in self._ledger_stock().items():
+            in_memory = self.registry.get(name)["stock"]
+            if expected != in_memory:
+                problems[name] = {"ledger": expected, "memory": in_memory}
+        return problems
+
+    def record(
+        self,
+        type: str,
+        product: str,
+        quantity: int,
+        note: str = "",
+        when: datetime | None = None,
+    ) -> dict:
+        """入庫・出庫を登録し、在庫数を更新する
+
+        出庫で在庫が不足する場合は InsufficientStockError を送出する。
+        在庫の検査と更新は _persist_record が不可分に行い、メモリ上の
+        在庫数はその結果（永続化先の値）に合わせる。
+        """
+        when = when or datetime.now()
+        note = note or "-"
+        ts = to_epoch(when)
+        with self._locked():
+            if product not in self.registry:
+                raise UnknownProductError(product)
+            try:
+                stock = self._persist_record(type, product, quantity, ts, note)
+            except InsufficientStockError as e:
+                if e.available is not None:
+                    self._sync_stock(product, e.available)
+                raise
+            self._sync_stock(product, stock)
+            seq = self.ledger.append(ts, type, product, quantity, note)
+            self.rollup.add(
+                ts,
+                self.ledger.product_codes[seq],
+                self.ledger.type_codes[seq],
+                quantity,
+            )
+            if self._trends is not None:
+                self._trends.add(
+                    ts,
+                    self.ledger.product_codes[seq],
+                    self.ledger.type_codes[seq],
+                    quantity,
+                )
+            self._stock_history.invalidate(product)
+            self._bump("products", "ledger")
+            if type == SHIPMENT:
+                self._bump("shipments")
+        return {
+            "datetime": when.strftime(DATETIME_FORMAT),
+            "type": type,
+            "product": product,
+            "quantity": quantity,
+            "note": note,
+        }
+
+    def _sync_stock(self, product: str, stock: int) -> None:
+        """メモリ上の在庫数を stock に合わせる（ストアのロック内で呼ぶ）"""
+        delta = self.registry.set_stock(product, stock)
+        if delta:
+            self._total_stock += delta
+            self._stock_history.invalidate(product)
+            self._bump("products")
+
+    def import_transactions(self, chunks, progress=None, shortages=None) -> int:
+        """入出庫を一括登録し、登録した件数を返す
+
+        chunks は DataFrame（datetime, type, product, quantity, note 列）の
+        イテレータ。全行を検証しながら1回のコミットで永続化し、製品名の
+        誤りや在庫がマイナスになる行があれば何も登録せずに
+        InvalidImportError を送出する。在庫はチャンク・行の順に適用して
+        検証する。progress はチャンクごとに処理済みの行数で呼ばれる。
+        shortages にリストを渡すと、在庫がマイナスになる出庫の行は
+        例外にせず、登録から外してその行番号を追加する。
+        """
+        with self._locked():
+            names = self.registry.names()
+            ids = {name: i for i, name in enumerate(names)}
+            start_stock = np.array([p["stock"] for p in self.registry], dtype=np.int64)
+            stock = start_stock.copy()
+            codes = np.array(
+                [self.ledger.product_code(name, create=True) for name in names],
+                dtype=np.int32,
+            )
+            receipt = self.ledger.type_code(RECEIPT)
+            type_names = np.asarray(TYPES, dtype=object)
+            staged = []
+            deltas = {}
+
+            def batches():
+                done = 0
+                for chunk in chunks:
+                    arrays = normalize_transactions(chunk, done + 1)
+                    product_ids = _product_ids(arrays["product"], ids, done + 1)
+                    quantity = arrays["quantity"]
+                    signed = np.where(
+                        arrays["type_code"] == receipt, quantity, -quantity
+                    )
+                    # 製品ごとの累積で、行ごとの在庫数を求める
+                    running = (
+                        stock[product_ids]
+                        + pd.Series(signed).groupby(product_ids).cumsum().to_numpy()
+                    )
+                    bad = np.flatnonzero(running < 0)
+                    if len(bad) and shortages is not None:
+                        bad = _shortage_rows(stock, product_ids, signed, bad)
+                        shortages.extend((done + 1 + bad).tolist())
+                        keep = np.ones(len(signed), dtype=bool)
+                        keep[bad] = False
+                        rows = np.flatnonzero(keep)
+                        arrays = {
+                            key: (
+                                [value[i] for i in rows]
+                                if isinstance(value, list)
+                                else value[keep]
+                            )
+                            for key, value in arrays.items()
+                        }
+                        product_ids = product_ids[keep]
+                        quantity = quantity[keep]
+                        signed = signed[keep]
+                    elif len(bad):
+                        product = arrays["product"][bad[0]]
+                        raise InvalidImportError(
+                            f"{product}の在庫がマイナスになります", done + 1 + bad[0]
+                        )
+                    np.add.at(stock, product_ids, signed)
+                    # 反映用には整数の列と備考のバイト列だけを残す
+                    # （製品名・備考の文字列のリストはチャンクごとに捨てる）
+                    staged.append(
+                        (
+                            arrays["ts"],
+                            codes[product_ids],
+                            arrays["type_code"],
+                            quantity,
+                            *encode_notes(arrays["note"]),
+                        )
+                    )
+                    done += len(chunk)
+                    yield {
+                        "ts": arrays["ts"],
+                        "type": type_names[arrays["type_code"]],
+                        "product": arrays["product"],
+                        "quantity": quantity,
+                        "note": arrays["note"],
+                    }
+                    if progress is not None:
+                        progress(done)
+                for i in np.flatnonzero(stock != start_stock):
+                    deltas[names[i]] = int(stock[i] - start_stock[i])
+
+            stocks = self._persist_import_transactions(batches(), deltas)
+
+            count = 0
+            shipped = False
+            for ts, product_codes, type_codes, quantity, *notes in staged:
+                shipped = shipped or bool((type_codes != receipt).any())
+                self.ledger.extend_encoded(
+                    ts, product_codes, type_codes, quantity, *notes
+                )
+                self.rollup.add_many(ts, product_codes, type_codes, quantity)
+                if self._trends is not None:
+                    self._trends.add_many(ts, product_codes, type_codes, quantity)
+                count += len(product_codes)
+            for name, delta in deltas.items():
+                if stocks is None:
+                    self._sync_stock(name, self.registry.get(name)["stock"] + delta)
+                else:
+                    self._sync_stock(name, stocks[name])
+            if count:
+                self._stock_history.invalidate()
+                self._bump("products", "ledger")
+            if shipped:
+                self._bump("shipments")
+            return count
+
+    def import_orders(self, chunks, progress=None) -> int:
+        """注文を一括登録し、登録した件数を返す
+
+        chunks は DataFrame（customer, product, quantity, delivery_date,
+        status 列）のイテレータ。製品名の誤りなどがあれば何も登録せずに
+        InvalidImportError を送出する。
+        """
+        with self._locked():
+            ids = {name: i for i, name in enumerate(self.registry.names())}
+            staged = []
+
+            def batches():
+                done = 0
+                for chunk in chunks:
+                    arrays = normalize_orders(chunk, done + 1)
+                    _product_ids(arrays["product"], ids, done + 1)
+                    columns = zip(*(arrays[field] for field in ORDER_FIELDS))
+                    orders = [dict(zip(ORDER_FIELDS, values)) for values in columns]
+                    staged.append(orders)
+                    done += len(chunk)
+                    yield orders
+                    if progress is not None:
+                        progress(done)
+
+            first_ids = self._persist_import_orders(batches())
+
+            count = 0
+            for i, orders in enumerate(staged):
+                for j, order in enumerate(orders):
+                    if first_ids is not None:
+                        order["id"] = first_ids[i] + j
+                    self.order_book.add(order)
+                count += len(orders)
+            if count:
+                self._bump("orders")
+            return count
+
+    def receive(self, product, quantity, note="", when=None) -> dict:
+        """入庫を登録"""
+        return self.record(RECEIPT, product, quantity, note, when)
+
+    def ship(self, product, quantity, note="", when=None) -> dict:
+        """出庫を登録"""
+        return self.record(SHIPMENT, product, quantity, note, when)
+
+    def close(self) -> None:
+        """接続を閉じる"""
+
+
+def _signed(type: str, quantity: int) -> int:
+    """在庫数の増減（入庫は正、出庫は負）"""
+    return quantity if type == RECEIPT else -quantity
+
+
+def _shortage_rows(stock, product_ids, signed, negative) -> np.ndarray:
+    """在庫が足りない出庫を先頭から順に外したときに外れる行
+
+    negative は外さずに累積したときに在庫がマイナスになる行。その製品の
+    行だけを順にたどり、足りない出庫を外した後の在庫で次の行を判定する。
+    """
+    products = np.unique(product_ids[negative])
+    current = {int(i): int(stock[i]) for i in products}
+    affected = np.isin(product_ids, products)
+    bad = []
+    for row in np.flatnonzero(affected).tolist():
+        product = int(product_ids[row])
+        after = current[product] + int(signed[row])
+        if after < 0:
+            bad.append(row)
+        else:
+            current[product] = after
+    return np.array(bad, dtype=np.int64)
+
+
+def _product_ids(products, ids, first_row) -> np.ndarray:
+    """製品名の配列を製品マスタの ID に変換（未登録があれば InvalidImportError）"""
+    mapped = pd.Series(products).map(ids)
+    missing = np.flatnonzero(mapped.isna().to_numpy())
+    if len(missing):
+        raise InvalidImportError(
+            f"製品マスタにない製品です: {products[missing[0]]}",
+            first_row + int(missing[0]),
+        )
+    return mapped.to_numpy(dtype=np.int64)
+
+
+def _order_row(row, with_id):
+    if with_id:
+        return dict(row)
+    return {k: v for k, v in row.items() if k != "id"}
+
+
+class MemoryStore(InventoryStore):
+    """プロセス内のメモリだけに保持するストア（テスト・試用向け）
+
+    snapshot を指定すると、そのスナップショットの内容から始める。
+    """
+
+    def __init__(self, snapshot: str | None = None):
+        super().__init__()
+        if snapshot:
+            self.restore_snapshot(snapshot)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    stock INTEGER NOT NULL,
+    unit TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    customer TEXT NOT NULL,
+    product TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    delivery_date TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    product TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    note TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_changes (
+    id INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    seq INTEGER NOT NULL,
+    product TEXT NOT NULL,
+    stock INTEGER NOT NULL,
+    PRIMARY KEY (seq, product)
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_product ON transactions (product, ts);
+CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (type, ts);
+CREATE INDEX IF NOT EXISTS idx_transactions_ts ON transactions (ts);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, delivery_date);
+CREATE INDEX IF NOT EXISTS idx_orders_product ON orders (product);
+"""
+
+# SQLiteStore が読み込み済みの最大 ID を覚えておくテーブル
+_SYNCED_TABLES = ("transactions", "orders", "order_changes")
+
+
+class SQLiteStore(InventoryStore):
+    """SQLite（WALモード）に保存するストア
+
+    起動時にテーブルをメモリ上のモデルへ読み込み、以降の変更は
+    SQLite とメモリの両方に反映する。WAL により読み取りは書き込みに
+    ブロックされない。
+
+    在庫数の正は入出庫の台帳で、products.stock はその投影。
+    CHECKPOINT_INTERVAL 件ごとに製品別の在庫数をチェックポイント
+    （入出庫 ID seq 時点の在庫数。直前のチェックポイントにそれ以降の
+    入出庫を足したもの）として同じトランザクションで保存し、
+    起動時は最新のチェックポイント以降の入出庫だけを足して在庫数を
+    求め直す。products.stock と食い違っていれば台帳に合わせて直し、
+    repaired に記録する。
+
+    snapshot を指定すると、台帳と日別集計はスナップショットから
+    メモリマップで読み込み、それ以降に追加された入出庫だけを
+    SQLite から読む（製品・注文は常に SQLite から読む）。
+
+    同じデータベースに複数のプロセス（アプリと取り込みスクリプトなど）が
+    書き込める。読み込み済みの入出庫・注文・ステータス変更（order_changes）
+    の最大 ID を覚えておき、ロックを取るたびに PRAGMA data_version で
+    他の接続のコミットを検出して、それより新しい行と在庫数を読み込む。
+    このストア自身が書いた行は書いたときにメモリへ反映済みなので
+    読み飛ばす。
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, snapshot: str | None = None):
+        super().__init__()
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Streamlit はリランごとに別スレッドで実行されうるため、
+        # 接続はスレッド間で共有しロックで直列化する
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self.repaired = {}
+        self._data_version = None
+        # テーブル -> 読み込み済みの最大 ID
+        self._synced = dict.fromkeys(_SYNCED_TABLES, 0)
+        # テーブル -> このストアが書いた、まだ _synced より後の ID の範囲
+        self._written = {table: [] for table in _SYNCED_TABLES}
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._recover_stock()
+            self._load_from_db(snapshot)
+
+    def _latest_checkpoint(self):
+        """最新のチェックポイント (seq, {製品名: 在庫数})（なければ (None, {})）"""
+        (seq,) = self._conn.execute("SELECT MAX(seq) FROM checkpoints").fetchone()
+        if seq is None:
+            return None, {}
+        rows = self._conn.execute(
+            "SELECT product, stock FROM checkpoints WHERE seq = ?", (seq,)
+        ).fetchall()
+        return seq, {product: stock for product, stock in rows}
+
+    def _derived_stock(self) -> dict | None:
+        """最新のチェックポイントとそれ以降の入出庫から求めた在庫数"""
+        seq, stocks = self._latest_checkpoint()
+        if seq is None:
+            return None
+        rows = self._conn.execute(
+            # NOT INDEXED: 製品の索引を全走査させず、ID の範囲（末尾）だけを読む
+            "SELECT product, SUM(CASE WHEN type = ? THEN quantity ELSE -quantity END)"
+            " FROM transactions NOT INDEXED WHERE id > ? GROUP BY product",
+            (RECEIPT, seq),
+        ).fetchall()
+        for product, net in rows:
+            stocks[product] = stocks.get(product, 0) + net
+        return stocks
+
+    def _write_checkpoint(self) -> None:
+        """台帳から求めた現在の在庫数をチェックポイントとして保存
+
+        直前のチェックポイントにそれ以降の入出庫を足して求める。最初の
+        1つ（期首）だけは products.stock を使う。トランザクション内で呼ぶ。
+        """
+        (seq,) = self._conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM transactions"
+        ).fetchone()
+        stocks = self._derived_stock()
+        if stocks is None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (seq, product, stock)"
+                " SELECT ?, name, stock FROM products",
+                (seq,),
+            )
+        else:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints (seq, product, stock)"
+                " VALUES (?, ?, ?)",
+                [(seq, product, stock) for product, stock in stocks.items()],
+            )
+        self._checkpoint_seq = seq
+
+    def _maybe_checkpoint(self, last_id: int) -> None:
+        if last_id - self._checkpoint_seq >= CHECKPOINT_INTERVAL:
+            self._write_checkpoint()
+
+    def _recover_stock(self) -> None:
+        """products.stock を台帳（チェックポイント＋以降の入出庫）に合わせる"""
+        derived = self._derived_stock()
+        with self._conn:
+            if derived is None:
+                # チェックポイントのない既存のデータベースは現在の在庫数を起点にする
+                self._write_checkpoint()
+                return
+            self._checkpoint_seq, _ = self._latest_checkpoint()
+            for name, stock in self._conn.execute(
+                "SELECT name, stock FROM products"
+            ).fetchall():
+                expected = derived.get(name)
+                if expected is not None and expected != stock:
+                    self._conn.execute(
+                        "UPDATE products SET stock = ? WHERE name = ?", (expected, name)
+                    )
+                    self.repaired[name] = (stock, expected)
+
+    def _opening_stock(self):
+        """最初のチェックポイント（期首）からそれまでの入出庫を引いた在庫数"""
+        (seq,) = self._conn.execute("SELECT MIN(seq) FROM checkpoints").fetchone()
+        if seq is None:
+            return super()._opening_stock()
+        stocks = dict(
+            self._conn.execute(
+                "SELECT product, stock FROM checkpoints WHERE seq = ?", (seq,)
+            ).fetchall()
+        )
+        for product, net in self._conn.execute(
+            "SELECT product, SUM(CASE WHEN type = ? THEN quantity ELSE -quantity END)"
+            " FROM transactions WHERE id <= ? GROUP BY product",
+            (RECEIPT, seq),
+        ).fetchall():
+            stocks[product] = stocks.get(product, 0) - net
+        return stocks
+
+    def _stock_problems(self):
+        """台帳（SQLite のチェックポイント＋以降の入出庫、メモリ上の台帳）から
+        求めた在庫数と、products.stock・メモリ上の在庫数の食い違い"""
+        derived = self._derived_stock() or {}
+        in_memory_ledger = self._ledger_stock()
+        problems = {}
+        for name, stored in self._conn.execute(
+            "SELECT name, stock FROM products"
+        ).fetchall():
+            memory = self.registry.get(name)
+            values = {
+                "ledger": derived.get(name),
+                "stored": stored,
+                "memory": memory["stock"] if memory else None,
+                "memory_ledger": in_memory_ledger.get(name),
+            }
+            if len(set(values.values())) > 1:
+                problems[name] = values
+        return problems
+
+    def _refresh(self):
+        (version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        if version == self._data_version:
+            # 前回から他の接続のコミットはない。それ以降の行は自分が書いたもの
+            for table, written in self._written.items():
+                if written:
+                    self._synced[table] = max(hi for _, hi in written)
+                    written.clear()
+            return
+        with self._reading():
+            products = self._conn.execute(
+                "SELECT name, stock FROM products ORDER BY id"
+            ).fetchall()
+            if [name for name, _ in products] != self.registry.names():
+                reload = True
+            else:
+                reload = False
+                rows = self._unsynced(
+                    "transactions", "ts, type, product, quantity, note"
+                )
+                orders = self._unsynced(
+                    "orders", "id, customer, product, quantity, delivery_date, status"
+                )
+                changes = self._unsynced(
+                    "order_changes", "order_id, status", skip_written=False
+                )
+                synced = self._max_ids()
+        if reload:
+            # 製品マスタが変わった（別のプロセスが登録した）ら全体を読み直す
+            self._load_from_db()
+            return
+        self._data_version = version
+        self._synced = synced
+        for written in self._written.values():
+            written.clear()
+
+        if rows:
+            start = len(self.ledger)
+            self.ledger.extend(tuple(r) for r in rows)
+            columns = (
+                self.ledger.ts[start:],
+                self.ledger.product_codes[start:],
+                self.ledger.type_codes[start:],
+                self.ledger.quantity[start:],
+            )
+            self.rollup.add_many(*columns)
+            if self._trends is not None:
+                self._trends.add_many(*columns)
+            for product in {r["product"] for r in rows}:
+                self._stock_history.invalidate(product)
+            self._bump("ledger")
+            if any(r["type"] == SHIPMENT for r in rows):
+                self._bump("shipments")
+        changed = bool(orders)
+        for order in orders:
+            self.order_book.add(dict(order))
+        # ステータスは変更ログの最後の値に合わせる（自分の変更も含めて読む）
+        statuses = {order_id: status for order_id, status in changes}
+        for order_id, status in statuses.items():
+            row = self.order_book.get(order_id)
+            if row is not None and row["status"] != status:
+                self.order_book.set_status(order_id, status)
+                changed = True
+        if changed:
+            self._bump("orders")
+        for name, stock in products:
+            self._sync_stock(name, stock)
+
+    def _unsynced(self, table, columns, skip_written=True):
+        """table の未読み込みの行（ID 順。skip_written なら自分が書いた範囲を除く）"""
+        written = sorted(self._written[table]) if skip_written else []
+        rows = []
+        lo = self._synced[table] + 1
+        for first, last in written + [(None, None)]:
+            query = f"SELECT {columns} FROM {table} WHERE id >= ?"
+            params = (lo,)
+            if first is not None:
+                query += " AND id < ?"
+                params += (first,)
+            rows += self._conn.execute(query + " ORDER BY id", params).fetchall()
+            if last is not None:
+                lo = last + 1
+        return rows
+
+    @contextmanager
+    def _reading(self):
+        """1つの読み取りトランザクション（同じ時点のデータ）で読む"""
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self._conn.commit()
+
+    def _max_ids(self) -> dict:
+        """_SYNCED_TABLES の各テーブルの最大 ID"""
+        return {
+            table: self._conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) FROM {table}"
+            ).fetchone()[0]
+            for table in _SYNCED_TABLES
+        }
+
+    def _load_from_db(self, snapshot=None):
+        (self._data_version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        with self._reading():
+            products = self._conn.execute(
+                "SELECT name, stock, unit FROM products ORDER BY id"
+            ).fetchall()
+            orders = self._conn.execute(
+                "SELECT id, customer, product, quantity, delivery_date, status"
+                " FROM orders ORDER BY id"
+            ).fetchall()
+            restored = self._read_snapshot(snapshot) if snapshot else None
+            last_id = restored["manifest"]["last_transaction_id"] if restored else 0
+            rows = self._conn.execute(
+                "SELECT ts, type, product, quantity, note FROM transactions"
+                " WHERE id > ? ORDER BY ts, id",
+                (last_id,),
+            ).fetchall()
+            self._synced = self._max_ids()
+        for written in self._written.values():
+            written.clear()
+        self._load(
+            [dict(r) for r in products],
+            [dict(r) for r in orders],
+            [tuple(r) for r in rows],
+            restored["ledger"] if restored else None,
+            restored["rollup"] if restored else None,
+        )
+
+    def _read_snapshot(self, directory):
+        """このデータベースのスナップショットなら読み込む（違えば None）"""
+        if not os.path.exists(os.path.join(directory, "manifest.json")):
+            return None
+        try:
+            snapshot = read_snapshot(directory)
+        except SnapshotError:
+            return None
+        manifest = snapshot["manifest"]
+        if manifest.get("database") != os.path.abspath(self.path):
+            return None
+        last_id = manifest["last_transaction_id"]
+        # スナップショット時点の入出庫の件数が合わなければ使わない
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE id <= ?", (last_id,)
+        ).fetchone()
+        if count != snapshot["manifest"]["rows"]["ledger"]:
+            return None
+        return snapshot
+
+    def _snapshot_metadata(self):
+        # ロック内で読み込み済み＝メモリ上の台帳はちょうどこの ID までの行
+        return {
+            "database": os.path.abspath(self.path),
+            "last_transaction_id": self._synced["transactions"],
+        }
+
+    def _persist_seed(self, products, orders, rows):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO products (name, stock, unit) VALUES (?, ?, ?)",
+                [(p["name"], p["stock"], p["unit"]) for p in products],
+            )
+            self._conn.executemany(
+                "INSERT INTO orders (customer, product, quantity, delivery_date,"
+                " status) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        o["customer"],
+                        o["product"],
+                        o["quantity"],
+                        o["delivery_date"],
+                        o["status"],
+                    )
+                    for o in orders
+                ],
+            )
+            self._conn.executemany(
+                "INSERT INTO transactions (ts, type, product, quantity, note)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._write_checkpoint()
+            # 初期データはこの後 _load でメモリに載る
+            synced = self._max_ids()
+        self._synced = synced
+        for written in self._written.values():
+            written.clear()
+
+    def _persist_record(self, type, product, quantity, ts, note):
+        delta = _signed(type, quantity)
+        with self._conn:
+            # 在庫の検査と更新を1文で行い、他プロセスと同時に出庫しても
+            # 負在庫にしない。反映後の在庫数は SQLite の値を正とする
+            cur = self._conn.execute(
+                "UPDATE products SET stock = stock + ?"
+                " WHERE name = ? AND stock + ? >= 0",
+                (delta, product, delta),
+            )
+            if cur.rowcount == 0:
+                raise InsufficientStockError(product, self._db_stock(product))
+            cur = self._conn.execute(
+                "INSERT INTO transactions (ts, type, product, quantity, note)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (ts, type, product, quantity, note),
+            )
+            self._maybe_checkpoint(cur.lastrowid)
+            stock = self._db_stock(product)
+        # コミットできてから記録する（ロールバックした ID は他の接続が使いうる）
+        self._written["transactions"].append((cur.lastrowid, cur.lastrowid))
+        return stock
+
+    def _db_stock(self, product):
+        row = self._conn.execute(
+            "SELECT stock FROM products WHERE name = ?", (product,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _persist_order(self, order):
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO orders (customer, product, quantity, delivery_date,"
+                " status) VALUES (?, ?, ?, ?, ?)",
+                (
+                    order["customer"],
+                    order["product"],
+                    order["quantity"],
+                    order["delivery_date"],
+                    order["status"],
+                ),
+            )
+        self._written["orders"].append((cur.lastrowid, cur.lastrowid))
+        return cur.lastrowid
+
+    def _persist_order_status(self, order_id, status):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE orders SET status = ? WHERE id = ?", (status, order_id)
+            )
+            cur = self._conn.execute(
+                "INSERT INTO order_changes (order_id, status) VALUES (?, ?)",
+                (order_id, status),
+            )
+        self._written["order_changes"].append((cur.lastrowid, cur.lastrowid))
+
+    def _persist_import_transactions(self, batches, deltas):
+        count = 0
+        with self._conn:
+            for columns in batches:
+                count += len(columns["ts"])
+                self._conn.executemany(
+                    "INSERT INTO transactions (ts, type, product, quantity, note)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    zip(
+                        columns["ts"].tolist(),
+                        columns["type"].tolist(),
+                        columns["product"].tolist(),
+                        columns["quantity"].tolist(),
+                        columns["note"],
+                    ),
+                )
+            for product, delta in deltas.items():
+                # 他プロセスの出庫と競合しても負在庫にしない
+                cur = self._conn.execute(
+                    "UPDATE products SET stock = stock + ?"
+                    " WHERE name = ? AND stock + ? >= 0",
+                    (delta, product, delta),
+                )
+                if cur.rowcount == 0:
+                    raise InsufficientStockError(product, self._db_stock(product))
+            (last_id,) = self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM transactions"
+            ).fetchone()
+            self._maybe_checkpoint(last_id)
+            stocks = {product: self._db_stock(product) for product in deltas}
+        if count:
+            # 1つの書き込みトランザクションで挿入したので ID は連番
+            self._written["transactions"].append((last_id - count + 1, last_id))
+        return stocks
+
+    def _persist_import_orders(self, batches):
+        first_ids = []
+        written = []
+        with self._conn:
+            for orders in batches:
+                if not orders:
+                    first_ids.append(None)
+                    continue
+                self._conn.executemany(
+                    "INSERT INTO orders (customer, product, quantity,"
+                    " delivery_date, status) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            o["customer"],
+                            o["product"],
+                            o["quantity"],
+                            o["delivery_date"],
+                            o["status"],
+                        )
+                        for o in orders
+                    ],
+                )
+                # 書き込みトランザクション中は他の接続が挿入できないので、
+                # 採番は直前の最大 ID からの連番になる
+                (last_id,) = self._conn.execute("SELECT MAX(id) FROM orders").fetchone()
+                first_ids.append(last_id - len(orders) + 1)
+                written.append((first_ids[-1], last_id))
+        self._written["orders"] += written
+        return first_ids
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(path: str | None = None, snapshot: str | None = None) -> InventoryStore:
+    """ストアを開く
+
+    path を省略した場合は環境変数 INVENTORY_DB、なければ
+    DEFAULT_DB_PATH を使う。"memory" を指定すると MemoryStore になる。
+    snapshot（省略時は環境変数 INVENTORY_SNAPSHOT）を指定すると、
+    そのスナップショットから読み込みを始める。SQLiteStore では
+    DEFAULT_SNAPSHOT_DIR が既定で、別のデータベースのものや
+    入出庫の件数が合わないものは無視する。
+    """
+    path = path or os.environ.get("INVENTORY_DB", DEFAULT_DB_PATH)
+    snapshot = snapshot or os.environ.get("INVENTORY_SNAPSHOT")
+    if path == "memory":
+        return MemoryStore(snapshot if snapshot and os.path.isdir(snapshot) else None)
+    return SQLiteStore(path, snapshot or DEFAULT_SNAPSHOT_DIR)
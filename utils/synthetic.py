@@ -0,0 +1,210 @@
+"""負荷試験・ベンチマーク用の合成データ
+
+製品数・注文数・入出庫件数を指定して、それらしい分布のデータを作る。
+
+- 製品の人気は Zipf 分布（上位の製品ほど入出庫が多い）
+- 入出庫は平日・日中に多く、直近ほど件数が増える
+- 出庫は小口、入庫は製造ロット単位で、製品ごとの増減はおおむね釣り合う
+- 初期在庫は、履歴の途中で在庫がマイナスにならないように決める
+- 注文の納期は今日の前後に散らばり、過去の納期はほとんど出荷済み
+
+同じ seed なら同じデータになる。
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.bulk_import import DEFAULT_CHUNK_ROWS
+from utils.ledger import RECEIPT, SHIPMENT
+from utils.orders import PENDING, SHIPPED
+
+# 曜日ごとの入出庫の多さ（月曜始まり）
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.9, 0.3, 0.1)
+
+# 入出庫の件数に占める入庫の割合
+RECEIPT_SHARE = 0.25
+
+# 製品の人気の偏り（Zipf 分布の指数）
+POPULARITY_EXPONENT = 1.1
+
+UNITS = ("個", "個", "個", "箱", "kg")
+
+_CUSTOMER_NAMES = (
+    "サンプル",
+    "テスト",
+    "ダミー",
+    "東都",
+    "北陸",
+    "中央",
+    "山田",
+    "日本",
+)
+_CUSTOMER_KINDS = ("商事", "工業", "物産", "製作所", "トレーディング")
+
+
+def _customers() -> list[str]:
+    customers = []
+    for i, kind in enumerate(_CUSTOMER_KINDS):
+        for j, name in enumerate(_CUSTOMER_NAMES):
+            if (i + j) % 2:
+                customers.append(f"株式会社{name}{kind}")
+            else:
+                customers.append(f"{name}{kind}株式会社")
+    return customers
+
+
+def _popularity(count: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** POPULARITY_EXPONENT
+    return weights / weights.sum()
+
+
+def generate_products(count: int, seed: int = 0) -> list[dict]:
+    """製品マスタ（在庫数は 0、populate が初期在庫を決める）"""
+    rng = np.random.default_rng(seed)
+    width = len(str(count))
+    units = rng.choice(len(UNITS), size=count)
+    return [
+        {"name": f"製品{i + 1:0{width}d}", "stock": 0, "unit": UNITS[units[i]]}
+        for i in range(count)
+    ]
+
+
+def generate_transactions(
+    product_names: list[str],
+    count: int,
+    days: int = 365,
+    now: datetime | None = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """入出庫履歴（datetime, type, product, quantity, note 列、日時順）
+
+    直近 days 日に count 件を散らばらせる。
+    """
+    rng = np.random.default_rng(seed)
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    first_day = np.datetime64(now.date() - timedelta(days=days - 1), "D")
+
+    # 日付: 曜日の重み × 直近ほど増える傾向
+    day_numbers = np.arange(days)
+    weekdays = (first_day + day_numbers).astype("datetime64[D]").astype(object)
+    weights = np.array([WEEKDAY_WEIGHTS[d.weekday()] for d in weekdays])
+    weights *= 1.0 + 0.5 * day_numbers / max(days - 1, 1)
+    day = rng.choice(days, size=count, p=weights / weights.sum())
+
+    # 時刻: 13時ごろを中心に 7〜19時
+    minutes = np.clip(rng.normal(13 * 60, 150, size=count), 7 * 60, 19 * 60 - 1)
+    times = (
+        first_day.astype("datetime64[m]")
+        + day.astype("timedelta64[D]")
+        + minutes.astype(np.int64).astype("timedelta64[m]")
+    )
+    times = np.sort(np.minimum(times, np.datetime64(now, "m")))
+
+    products = rng.choice(
+        len(product_names), size=count, p=_popularity(len(product_names))
+    )
+    receipt = rng.random(count) < RECEIPT_SHARE
+
+    # 出庫は製品ごとの基準量の前後、入庫はそれを釣り合わせるロット（10単位）
+    base = rng.integers(5, 50, size=len(product_names))[products]
+    shipped = np.maximum(1, rng.lognormal(np.log(base), 0.5)).astype(np.int64)
+    lot = (1 - RECEIPT_SHARE) / RECEIPT_SHARE * base * rng.uniform(0.7, 1.3, size=count)
+    received = np.maximum(10, np.round(lot / 10) * 10).astype(np.int64)
+
+    customers = np.asarray([f"{c}向け出荷" for c in _customers()], dtype=object)
+    notes = customers[
+        rng.choice(len(customers), size=count, p=_popularity(len(customers)))
+    ]
+    notes[receipt] = "製造完了分"
+
+    return pd.DataFrame(
+        {
+            "datetime": times.astype("datetime64[s]"),
+            "type": np.where(receipt, RECEIPT, SHIPMENT),
+            "product": np.asarray(product_names, dtype=object)[products],
+            "quantity": np.where(receipt, received, shipped),
+            "note": notes,
+        }
+    )
+
+
+def generate_orders(
+    product_names: list[str],
+    count: int,
+    today: date | None = None,
+    seed: int = 0,
+) -> list[dict]:
+    """注文（納期は今日の30日前〜60日後）"""
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+    customers = _customers()
+    customer = rng.choice(len(customers), size=count, p=_popularity(len(customers)))
+    products = rng.choice(
+        len(product_names), size=count, p=_popularity(len(product_names))
+    )
+    quantity = rng.integers(1, 21, size=count) * 5
+    offset = rng.integers(-30, 61, size=count)
+    # 納期が3日以上前なら大半は出荷済み、それ以外は大半が未出荷
+    shipped = np.where(offset < -3, rng.random(count) < 0.9, rng.random(count) < 0.15)
+    return [
+        {
+            "customer": customers[customer[i]],
+            "product": product_names[products[i]],
+            "quantity": int(quantity[i]),
+            "delivery_date": (today + timedelta(days=int(offset[i]))).isoformat(),
+            "status": SHIPPED if shipped[i] else PENDING,
+        }
+        for i in range(count)
+    ]
+
+
+def opening_stock(transactions: pd.DataFrame, product_names: list[str]) -> dict:
+    """履歴の途中で在庫がマイナスにならない最小の初期在庫（製品ごと）"""
+    signed = transactions["quantity"].where(
+        transactions["type"] == RECEIPT, -transactions["quantity"]
+    )
+    lowest = (
+        signed.groupby(transactions["product"])
+        .cumsum()
+        .groupby(transactions["product"])
+        .min()
+    )
+    return {name: max(0, -int(lowest.get(name, 0))) for name in product_names}
+
+
+def populate(
+    store,
+    products: int = 50,
+    orders: int = 500,
+    transactions: int = 10_000,
+    days: int = 365,
+    seed: int = 0,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    progress=None,
+) -> dict:
+    """空のストアに合成データを登録し、件数を返す
+
+    製品・注文は seed で、入出庫は import_transactions で一括登録する。
+    """
+    if not store.is_empty():
+        raise ValueError("合成データは空のストアにだけ登録できます")
+    rng = np.random.default_rng(seed)
+    product_rows = generate_products(products, seed)
+    names = [p["name"] for p in product_rows]
+    history = generate_transactions(names, transactions, days, seed=seed + 1)
+    opening = opening_stock(history, names)
+    for product in product_rows:
+        # 在庫切れ寸前の製品も残るように、余裕は 0〜200 の幅で持たせる
+        product["stock"] = opening[product["name"]] + int(rng.integers(0, 201))
+
+    store.seed(product_rows, generate_orders(names, orders, seed=seed + 2), [])
+    chunks = (
+        history.iloc[start : start + chunk_rows]
+        for start in range(0, len(history), chunk_rows)
+    )
+    store.import_transactions(chunks, progress)
+    return {"products": products, "orders": orders, "transactions": len(history)}
@@ -0,0 +1,283 @@
+"""入出庫の推移の多段集計（時・日・週・月）
+
+時間ごとの集計を元に、日・週・月と粒度を粗くした集計表を持つ。
+各段は製品別と全製品合計の両方を持ち、入出庫の登録ごとに増分で
+更新する。推移の表示は、期間に応じた粒度の段から必要な区間だけを
+二分探索で取り出すので、期間が何年あっても区間の数に比例する
+コストで済む（生の入出庫は集計し直さない）。
+
+各段はキー（スロット << 32 | 区間番号）の昇順に並んだ配列で持つ。
+スロットは全製品合計が種別コード、製品別が (製品コード + 1) * 2 + 種別コード。
+新しいキーは一旦 _pending に貯め、参照の前にまとめて差し込む。
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from utils.rollup import SECONDS_PER_DAY
+
+SECONDS_PER_HOUR = 3600
+
+# 細かい順
+RESOLUTIONS = ("hour", "day", "week", "month")
+RESOLUTION_LABELS = {"hour": "時間", "day": "日", "week": "週", "month": "月"}
+
+# 粒度を自動で選ぶときの区間数の上限
+DEFAULT_MAX_BUCKETS = 200
+
+# 週は月曜始まり（エポック日 4 = 1970-01-05 が月曜）
+_WEEK_OFFSET = 4
+
+_BUCKET_BITS = 32
+_BUCKET_MASK = (1 << _BUCKET_BITS) - 1
+_TYPE_SLOTS = 2
+
+# _pending がこの件数に達したら配列に差し込む
+PENDING_LIMIT = 1024
+
+
+def _months(days: np.ndarray) -> np.ndarray:
+    """エポック日 -> エポック月（1970-01 からの月数）"""
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def bucket_of(ts, resolution: str) -> np.ndarray:
+    """エポック秒を粒度ごとの区間番号に変換（配列可）"""
+    ts = np.asarray(ts, dtype=np.int64)
+    if resolution == "hour":
+        return ts // SECONDS_PER_HOUR
+    days = ts // SECONDS_PER_DAY
+    return _coarsen(days, "day", resolution)
+
+
+def _coarsen(buckets: np.ndarray, finer: str, resolution: str) -> np.ndarray:
+    """1段細かい区間番号を resolution の区間番号に変換"""
+    if resolution == finer:
+        return buckets
+    if resolution == "day":
+        return buckets // 24
+    if resolution == "week":
+        return (buckets - _WEEK_OFFSET) // 7
+    if resolution == "month":
+        return _months(buckets)
+    raise ValueError(resolution)
+
+
+# 段ごとの元になる段（週と月は日から作る）
+_SOURCE = {"day": "hour", "week": "day", "month": "day"}
+
+
+def bucket_starts(buckets, resolution: str) -> np.ndarray:
+    """区間番号を区間の開始日時（datetime64[s]）に変換"""
+    buckets = np.asarray(buckets, dtype=np.int64)
+    if resolution == "hour":
+        seconds = buckets * SECONDS_PER_HOUR
+    elif resolution == "day":
+        seconds = buckets * SECONDS_PER_DAY
+    elif resolution == "week":
+        seconds = (buckets * 7 + _WEEK_OFFSET) * SECONDS_PER_DAY
+    elif resolution == "month":
+        return buckets.astype("datetime64[M]").astype("datetime64[s]")
+    else:
+        raise ValueError(resolution)
+    return seconds.view("datetime64[s]")
+
+
+def choose_resolution(
+    start: int, end: int, max_buckets: int = DEFAULT_MAX_BUCKETS
+) -> str:
+    """[start, end) を max_buckets 個以内の区間で表せる最も細かい粒度"""
+    for resolution in RESOLUTIONS:
+        first, last = bucket_of([start, max(start, end - 1)], resolution)
+        if last - first + 1 <= max_buckets:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def _aggregate(keys, quantity, count):
+    """同じキーの数量・件数を合計し、キーの昇順で返す"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    quantity = np.bincount(inverse, weights=quantity, minlength=len(unique))
+    count = np.bincount(inverse, weights=count, minlength=len(unique))
+    return unique, quantity.astype(np.int64), count.astype(np.int64)
+
+
+def _rekey(keys: np.ndarray, finer: str, resolution: str) -> np.ndarray:
+    slots = keys >> _BUCKET_BITS
+    buckets = _coarsen(keys & _BUCKET_MASK, finer, resolution)
+    return (slots << _BUCKET_BITS) | buckets
+
+
+def _slots(products, types) -> np.ndarray:
+    return (np.asarray(products, dtype=np.int64) + 1) * _TYPE_SLOTS + np.asarray(
+        types, dtype=np.int64
+    )
+
+
+class _Level:
+    """1つの粒度の集計表（キーの昇順の配列と未反映のキー）"""
+
+    def __init__(self, keys=None, quantity=None, count=None):
+        empty = np.zeros(0, dtype=np.int64)
+        self.keys = empty if keys is None else keys
+        self.quantity = empty if quantity is None else quantity
+        self.count = empty if count is None else count
+        self._pending = {}
+
+    def __len__(self):
+        return len(self.keys) + len(self._pending)
+
+    def add(self, key: int, quantity: int) -> None:
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            self.quantity[i] += quantity
+            self.count[i] += 1
+            return
+        cell = self._pending.setdefault(key, [0, 0])
+        cell[0] += quantity
+        cell[1] += 1
+        if len(self._pending) >= PENDING_LIMIT:
+            self.flush()
+
+    def merge(self, keys, quantity, count) -> None:
+        """集計済み（キーが一意で昇順）の配列を加算"""
+        self.flush()
+        i = np.searchsorted(self.keys, keys)
+        found = i < len(self.keys)
+        found[found] = self.keys[i[found]] == keys[found]
+        self.quantity[i[found]] += quantity[found]
+        self.count[i[found]] += count[found]
+        self._insert(keys[~found], quantity[~found], count[~found])
+
+    def flush(self) -> None:
+        """_pending を配列に差し込む"""
+        if not self._pending:
+            return
+        keys = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        values = np.array(list(self._pending.values()), dtype=np.int64)
+        order = np.argsort(keys)
+        self._pending = {}
+        self._insert(keys[order], values[order, 0], values[order, 1])
+
+    def _insert(self, keys, quantity, count) -> None:
+        # 新しいキーは末尾（最新の区間）に来ることが多い
+        at = np.searchsorted(self.keys, keys)
+        self.keys = np.insert(self.keys, at, keys)
+        self.quantity = np.insert(self.quantity, at, quantity)
+        self.count = np.insert(self.count, at, count)
+
+    def series(self, slot: int, first: int, last: int):
+        """スロットの区間 first〜last（両端を含む）の数量・件数（区間ごとの配列）"""
+        self.flush()
+        base = slot << _BUCKET_BITS
+        lo = np.searchsorted(self.keys, base | first)
+        hi = np.searchsorted(self.keys, base | (last + 1))
+        offsets = (self.keys[lo:hi] & _BUCKET_MASK) - first
+        quantity = np.zeros(last - first + 1, dtype=np.int64)
+        count = np.zeros(last - first + 1, dtype=np.int64)
+        quantity[offsets] = self.quantity[lo:hi]
+        count[offsets] = self.count[lo:hi]
+        return quantity, count
+
+
+class TrendPyramid:
+    """時・日・週・月 × 製品（と全製品合計）× 種別 → 数量合計・件数
+
+    入出庫の登録ごとに add / add_many で全段を更新する。台帳から
+    作り直す from_ledger は、時間ごとの集計から日、日から週・月と
+    細かい段の結果を粗くして作る。製品・種別は Ledger の整数コード。
+    """
+
+    def __init__(self):
+        self.levels = {resolution: _Level() for resolution in RESOLUTIONS}
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels.values())
+
+    def add(self, ts: int, product: int, type: int, quantity: int) -> None:
+        """1件分を加算"""
+        slots = (int(_slots(product, type)), int(type))
+        for resolution, level in self.levels.items():
+            bucket = int(bucket_of(ts, resolution))
+            for slot in slots:
+                level.add((slot << _BUCKET_BITS) | bucket, int(quantity))
+
+    def add_many(self, ts, products, types, quantity) -> None:
+        """複数件をまとめて加算（各引数は同じ長さの配列）"""
+        if not len(ts):
+            return
+        for resolution, cells in self._build(ts, products, types, quantity).items():
+            self.levels[resolution].merge(*cells)
+
+    @staticmethod
+    def _build(ts, products, types, quantity) -> dict:
+        """入出庫の配列から段ごとの (keys, quantity, count) を作る"""
+        slots = _slots(products, types)
+        hours = bucket_of(ts, "hour")
+        keys, q, c = _aggregate(
+            (slots << _BUCKET_BITS) | hours,
+            np.asarray(quantity, dtype=np.int64),
+            np.ones(len(hours), dtype=np.int64),
+        )
+        # 全製品合計のスロット（= 種別コード）を加える
+        totals = ((keys >> _BUCKET_BITS) % _TYPE_SLOTS << _BUCKET_BITS) | (
+            keys & _BUCKET_MASK
+        )
+        cells = {
+            "hour": _aggregate(
+                np.concatenate([keys, totals]),
+                np.concatenate([q, q]),
+                np.concatenate([c, c]),
+            )
+        }
+        for resolution in RESOLUTIONS[1:]:
+            source = _SOURCE[resolution]
+            keys, q, c = cells[source]
+            cells[resolution] = _aggregate(_rekey(keys, source, resolution), q, c)
+        return cells
+
+    @classmethod
+    def from_ledger(cls, ledger) -> "TrendPyramid":
+        """台帳全体から集計し直す"""
+        pyramid = cls()
+        if len(ledger):
+            cells = cls._build(
+                ledger.ts, ledger.product_codes, ledger.type_codes, ledger.quantity
+            )
+            pyramid.levels = {
+                resolution: _Level(*cells[resolution]) for resolution in RESOLUTIONS
+            }
+        return pyramid
+
+    def series(
+        self,
+        resolution: str,
+        type: int,
+        start: int,
+        end: int,
+        product: int | None = None,
+    ):
+        """[start, end) を含む区間ごとの (開始日時, 数量合計, 件数)
+
+        区間は期間の端を含むもの全体（月の途中から指定しても月全体）。
+        """
+        first, last = bucket_of([start, max(start, end - 1)], resolution).tolist()
+        slot = type if product is None else int(_slots(product, type))
+        quantity, count = self.levels[resolution].series(slot, first, last)
+        return bucket_starts(np.arange(first, last + 1), resolution), quantity, count
+
+    def verify(self, ledger) -> list[str]:
+        """台帳から作り直した集計と比較し、食い違う段の名前を返す"""
+        expected = TrendPyramid.from_ledger(ledger)
+        mismatched = []
+        for resolution in RESOLUTIONS:
+            actual, wanted = self.levels[resolution], expected.levels[resolution]
+            actual.flush()
+            if not (
+                np.array_equal(actual.keys, wanted.keys)
+                and np.array_equal(actual.quantity, wanted.quantity)
+                and np.array_equal(actual.count, wanted.count)
+            ):
+                mismatched.append(resolution)
+        return mismatched
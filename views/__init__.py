@@ -0,0 +1,23 @@
+"""画面ごとのモジュール
+
+各モジュールは render(store, cached, lap) で画面を描画する。選んだ画面の
+モジュールだけを初めて表示するときに import するので、セッションの
+初回表示では使わない画面の import や定義のコストがかからない。
+"""
+
+import importlib
+
+# 表示モード -> モジュール
+VIEW_MODULES = {
+    "ダッシュボード": "views.dashboard",
+    "製品詳細": "views.product_detail",
+    "出荷担当": "views.shipping",
+    "製造担当": "views.manufacturing",
+    "営業担当": "views.sales",
+    "入出庫履歴": "views.history",
+}
+
+
+def load_view(name):
+    """表示モードの画面モジュールを返す（初回だけ import）"""
+    return importlib.import_module(VIEW_MODULES[name])
@@ -0,0 +1,114 @@
+"""在庫のチャート（Vega-Lite の仕様）
+
+st.vega_lite_chart に仕様の dict を渡して描画する。Altair を使わないので、
+import（数百 ms）やチャートを作るたびのスキーマ検証がかからない。
+"""
+
+import pandas as pd
+
+from utils.downsample import downsample
+from utils.trends import RESOLUTION_LABELS
+
+# 推移の区間の表示形式（粒度ごと）
+TREND_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-%m-%d の週",
+    "month": "%Y-%m",
+}
+
+
+def stock_bar_chart(height):
+    """製品ごとに色分けした在庫数の棒グラフ"""
+    return {
+        "height": height,
+        "mark": {"type": "bar"},
+        "encoding": {
+            "x": {"field": "name", "type": "nominal", "title": "製品名", "sort": None},
+            "y": {"field": "stock", "type": "quantitative", "title": "在庫数"},
+            "color": {
+                "field": "name",
+                "type": "nominal",
+                "legend": None,
+                "scale": {"scheme": "category10"},
+            },
+            "tooltip": [
+                {"field": "name", "type": "nominal"},
+                {"field": "stock", "type": "quantitative"},
+                {"field": "unit", "type": "nominal"},
+            ],
+        },
+    }
+
+
+def stock_line_chart(stock_df, date_range, target_points):
+    """在庫数推移の折れ線グラフ（期間で絞り込み、点数を間引く）
+
+    (表示するデータ, 仕様) を返す。
+    """
+    times = stock_df["datetime"].to_numpy()
+    lo = times.searchsorted(pd.Timestamp(date_range[0]).to_datetime64())
+    hi = times.searchsorted(
+        (pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)).to_datetime64()
+    )
+    stock_df = stock_df.iloc[lo:hi]
+
+    # ブラウザへ送る点数を抑える（欠品などの極値は残す）
+    stock_df = downsample(stock_df, "datetime", "stock", target_points)
+    stock_df = stock_df[["datetime", "stock", "type", "quantity"]]
+    top = float(stock_df["stock"].max() * 1.1) if len(stock_df) else 1.0
+
+    # 折れ線グラフ（コンパクト版）
+    return stock_df, {
+        "height": 250,
+        "mark": {"type": "line", "point": True, "color": "#3498db"},
+        "encoding": {
+            "x": {"field": "datetime", "type": "temporal", "title": "日時"},
+            "y": {
+                "field": "stock",
+                "type": "quantitative",
+                "title": "在庫数",
+                "scale": {"domain": [0, top]},
+            },
+            "tooltip": [
+                {"field": "datetime", "type": "temporal"},
+                {"field": "stock", "type": "quantitative"},
+                {"field": "type", "type": "nominal"},
+                {"field": "quantity", "type": "quantitative"},
+            ],
+        },
+    }
+
+
+def trend_chart(resolution):
+    """入庫・出庫の数量を区間ごとに並べた折れ線グラフ"""
+    time_format = TREND_FORMATS[resolution]
+    return {
+        "height": 300,
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {
+                "field": "datetime",
+                "type": "temporal",
+                "title": f"期間（{RESOLUTION_LABELS[resolution]}単位）",
+            },
+            "y": {"field": "quantity", "type": "quantitative", "title": "数量"},
+            "color": {
+                "field": "type",
+                "type": "nominal",
+                "title": "種別",
+                "scale": {"domain": ["入庫", "出庫"], "range": ["#2ecc71", "#e74c3c"]},
+            },
+            "tooltip": [
+                {
+                    "field": "datetime",
+                    "type": "temporal",
+                    "title": "期間",
+                    "format": time_format,
+                },
+                {"field": "type", "type": "nominal", "title": "種別"},
+                {"field": "quantity", "type": "quantitative", "title": "数量"},
+                {"field": "count", "type": "quantitative", "title": "件数"},
+            ],
+        },
+    }
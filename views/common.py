@@ -0,0 +1,109 @@
+"""画面に共通の表示設定・ヘルパーと、全セッションで共有するリソース"""
+
+import atexit
+import functools
+import os
+
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.cache import DerivedCache
+from utils.demo_data import seed_demo_data
+from utils.ingest import IngestWorker
+from utils.live import LiveTables
+from utils.storage import open_store
+
+# 日時は datetime64 のまま渡し、表示時にだけ分単位で整形する
+DATETIME_COLUMN = st.column_config.DatetimeColumn("datetime", format="YYYY-MM-DD HH:mm")
+
+# ライブ更新の間隔の選択肢（秒）
+LIVE_INTERVALS = [2, 5, 10, 30]
+DEFAULT_LIVE_INTERVAL = 5
+
+
+@st.cache_resource(show_spinner="データを読み込んでいます…")
+def shared_store():
+    """プロセス内の全セッションで共有するストア（環境変数 INVENTORY_DB で保存先を指定）
+
+    最初のセッションで1度だけ開き、空ならデモデータを登録する。
+    変更はストアの変更 API（record・add_order など）を通して行う。
+    """
+    store = open_store()
+    seed_demo_data(store)
+    return store
+
+
+@st.cache_resource
+def shared_cache():
+    """全セッションで共有する派生データ（表・チャート）のキャッシュ
+
+    キーにデータセットのバージョンを含むので、どのセッションが作った
+    値も同じデータから作ったものになる。値は変更せずに使う。
+    """
+    return DerivedCache()
+
+
+@st.cache_resource
+def shared_live_tables():
+    """全セッションで共有する、差分だけを反映して保つ表（utils/live.py）"""
+    return LiveTables()
+
+
+def live_table(store, kind, *params):
+    """kind(*params) の表の最新の状態（前回から変わった分だけを反映する）"""
+    return shared_live_tables().get(store, kind, *params)
+
+
+def live_interval():
+    """ライブ更新の間隔（秒、オフなら None）
+
+    データを表示するフラグメントの run_every に渡す。
+    """
+    if st.session_state.get("live_mode"):
+        return st.session_state.get("live_interval", DEFAULT_LIVE_INTERVAL)
+    return None
+
+
+@st.cache_resource
+def shared_ingest_worker():
+    """ドロップディレクトリからイベントを取り込むスレッド（プロセスに1つ）
+
+    環境変数 INVENTORY_INGEST_DIR を設定したときだけ起動し、なければ None。
+    取り込みはスクリプトの実行とは別のスレッドで行い、プロセスの終了時に
+    取り込み中のバッチを終えてから止める。
+    """
+    directory = os.environ.get("INVENTORY_INGEST_DIR")
+    if not directory:
+        return None
+    worker = IngestWorker(shared_store(), directory).start()
+    atexit.register(worker.stop)
+    return worker
+
+
+def fragment(func=None, *, run_every=None):
+    """st.fragment と同じ。フラグメントだけの再実行も再実行の計測に記録する
+
+    ページ全体の再実行の中で実行されたときは、その再実行の区間に含まれる。
+    """
+
+    def decorate(func):
+        @functools.wraps(func)
+        def timed():
+            profiler = st.session_state.get("profiler")
+            ctx = get_script_run_ctx()
+            if profiler is None or ctx is None or not ctx.fragment_ids_this_run:
+                return func()
+            with profiler.fragment(func.__name__):
+                return func()
+
+        return st.fragment(timed, run_every=run_every)
+
+    return decorate if func is None else decorate(func)
+
+
+def rerun_fragment():
+    """実行中のフラグメントだけを再実行（ページ全体の実行中ならページ全体）"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
@@ -0,0 +1,222 @@
+"""ダッシュボード（在庫・注文・入出庫の概要と推移、入出庫の登録）"""
+
+from datetime import datetime, timedelta
+
+import streamlit as st
+from utils.live import LiveOrders, LiveTransactions
+from utils.storage import InsufficientStockError
+from utils.trends import RESOLUTION_LABELS, RESOLUTIONS
+from views.charts import stock_bar_chart, trend_chart
+from views.common import (
+    DATETIME_COLUMN,
+    fragment,
+    live_interval,
+    live_table,
+    rerun_fragment,
+)
+
+
+def render(store, cached, lap):
+    """ダッシュボードを表示"""
+    st.title("🏭 工場在庫管理ダッシュボード")
+    st.markdown("---")
+
+    # 各ブロックはフラグメントにして、操作したブロックだけを再実行する
+    # （ライブ更新中はデータを表示するブロックを一定間隔で再実行する）
+    refresh = live_interval()
+
+    @fragment(run_every=refresh)
+    def dashboard_metrics():
+        # メトリクス表示
+        col1, col2, col3 = st.columns(3)
+
+        today = datetime.now().date()
+        today_start = datetime.combine(today, datetime.min.time())
+        today_receipts = store.total_quantity(type="入庫", since=today_start)
+        today_shipments = store.total_quantity(type="出庫", since=today_start)
+        pending_orders = store.order_count("未出荷")
+
+        with col1:
+            st.metric("本日の入庫", f"{today_receipts}個")
+        with col2:
+            st.metric("本日の出庫", f"{today_shipments}個")
+        with col3:
+            st.metric("未出荷注文", f"{pending_orders}件")
+        lap("metrics")
+
+    @fragment(run_every=refresh)
+    def dashboard_stock():
+        # 在庫状況の可視化
+        st.subheader("📊 製品別在庫状況")
+
+        # 棒グラフ用データ
+        products_df = cached("products_table", ["products"], store.products_table)
+        lap("products_table")
+
+        # Altairを使用して製品ごとに色分けした棒グラフを作成
+        chart = stock_bar_chart(400)
+        lap("stock_bar_chart")
+
+        st.vega_lite_chart(products_df, chart, use_container_width=True)
+        lap("render:stock_bar_chart")
+
+        # 在庫一覧テーブル
+        st.subheader("📦 在庫一覧")
+        st.dataframe(products_df, use_container_width=True, hide_index=True)
+        lap("render:products_table")
+
+    @fragment(run_every=refresh)
+    def dashboard_trends():
+        # 入出庫の推移（期間に応じて時間・日・週・月の集計を使い分ける）
+        st.subheader("📉 入出庫の推移")
+
+        today = datetime.now().date()
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            trend_range = st.date_input(
+                "期間", value=(today - timedelta(days=365), today), key="trend_range"
+            )
+        with col2:
+            trend_product = st.selectbox(
+                "製品", ["すべて"] + store.product_names(), key="trend_product"
+            )
+        with col3:
+            trend_resolution = st.selectbox(
+                "粒度",
+                ["自動", *RESOLUTIONS],
+                format_func=lambda r: RESOLUTION_LABELS.get(r, r),
+                key="trend_resolution",
+            )
+        if len(trend_range) != 2:
+            trend_range = (trend_range[0], trend_range[0])
+        since = datetime.combine(trend_range[0], datetime.min.time())
+        until = datetime.combine(
+            trend_range[1] + timedelta(days=1), datetime.min.time()
+        )
+
+        resolution, trend_df = cached(
+            "trend",
+            ["ledger"],
+            lambda: store.trend(
+                since,
+                until,
+                product=None if trend_product == "すべて" else trend_product,
+                resolution=None if trend_resolution == "自動" else trend_resolution,
+            ),
+            since,
+            until,
+            trend_product,
+            trend_resolution,
+        )
+        lap("trend")
+
+        st.vega_lite_chart(trend_df, trend_chart(resolution), use_container_width=True)
+        st.caption(
+            f"{RESOLUTION_LABELS[resolution]}単位で集計（{len(trend_df) // 2}区間）"
+        )
+        lap("render:trend")
+
+    @fragment
+    def dashboard_forms():
+        # 入庫・出庫フォーム（送信・登録ではこのブロックだけ再実行。在庫・履歴の
+        # ブロックはライブ更新か次の操作で更新され、登録後の在庫数は通知で示す）
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("➕ 入庫登録")
+            with st.form("receipt_form"):
+                receipt_product = st.selectbox(
+                    "製品を選択", store.product_names(), key="receipt_product"
+                )
+                receipt_quantity = st.number_input(
+                    "入庫数", min_value=1, value=10, step=1, key="receipt_quantity"
+                )
+                receipt_note = st.text_input("備考（任意）", key="receipt_note")
+                receipt_submit = st.form_submit_button("入庫を登録")
+
+                if receipt_submit:
+                    # 在庫更新と履歴追加
+                    store.receive(receipt_product, receipt_quantity, receipt_note)
+
+                    stock = store.product(receipt_product)["stock"]
+                    st.toast(
+                        f"✅ {receipt_product}を{receipt_quantity}個入庫しました"
+                        f"（在庫: {stock}個）"
+                    )
+                    rerun_fragment()
+
+        with col2:
+            st.subheader("➖ 出庫登録")
+            with st.form("shipment_form"):
+                shipment_product = st.selectbox(
+                    "製品を選択", store.product_names(), key="shipment_product"
+                )
+
+                # 選択した製品の在庫数を取得
+                current_stock = (
+                    store.product(shipment_product)["stock"] if shipment_product else 0
+                )
+
+                shipment_quantity = st.number_input(
+                    f"出庫数（在庫: {current_stock}個）",
+                    min_value=1,
+                    max_value=current_stock if current_stock > 0 else 1,
+                    value=min(10, current_stock) if current_stock > 0 else 1,
+                    step=1,
+                    key="shipment_quantity",
+                )
+                shipment_note = st.text_input("備考（任意）", key="shipment_note")
+                shipment_submit = st.form_submit_button("出庫を登録")
+
+                if shipment_submit:
+                    try:
+                        # 在庫更新と履歴追加（在庫チェックはストア側で行う）
+                        store.ship(shipment_product, shipment_quantity, shipment_note)
+                    except InsufficientStockError:
+                        st.error(f"❌ 在庫不足です（在庫: {current_stock}個）")
+                    else:
+                        stock = store.product(shipment_product)["stock"]
+                        st.toast(
+                            f"✅ {shipment_product}を{shipment_quantity}個出庫しました"
+                            f"（在庫: {stock}個）"
+                        )
+                        rerun_fragment()
+        lap("forms")
+
+    @fragment(run_every=refresh)
+    def dashboard_orders():
+        # 注文リスト
+        st.subheader("📋 注文リスト")
+        # 注文の追加・ステータス変更の分だけを反映した表
+        orders_df = live_table(store, LiveOrders)
+        lap("orders_table")
+        st.dataframe(orders_df, use_container_width=True, hide_index=True)
+        lap("render:orders_table")
+
+    @fragment(run_every=refresh)
+    def dashboard_transactions():
+        # 入出庫履歴
+        st.subheader("📈 入出庫履歴（最新20件）")
+        transactions_df = live_table(store, LiveTransactions, 20)
+        lap("recent_transactions")
+
+        # 色分けのため、typeに応じてスタイリング
+        st.dataframe(
+            transactions_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={"datetime": DATETIME_COLUMN},
+        )
+        lap("render:recent_transactions")
+
+    dashboard_metrics()
+    st.markdown("---")
+    dashboard_stock()
+    st.markdown("---")
+    dashboard_trends()
+    st.markdown("---")
+    dashboard_forms()
+    st.markdown("---")
+    dashboard_orders()
+    st.markdown("---")
+    dashboard_transactions()
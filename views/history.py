@@ -0,0 +1,118 @@
+"""入出庫履歴（絞り込みとページ単位の取得）"""
+
+from datetime import datetime, timedelta
+
+import streamlit as st
+from views.common import DATETIME_COLUMN, fragment, live_interval
+
+# 並べ替え（表示名 -> (列, 降順か)）
+HISTORY_SORTS = {
+    "日時（新しい順）": ("datetime", True),
+    "日時（古い順）": ("datetime", False),
+    "数量（多い順）": ("quantity", True),
+    "数量（少ない順）": ("quantity", False),
+}
+
+
+def render(store, cached, lap):
+    """入出庫履歴を表示"""
+    st.title("📜 入出庫履歴")
+    st.markdown("---")
+
+    # 絞り込み・ページ送りはこのブロックだけ再実行（ライブ更新中は一定間隔でも）
+    @fragment(run_every=live_interval())
+    def history_view():
+        # 絞り込み条件
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            history_product = st.selectbox(
+                "製品", ["すべて"] + store.product_names(), key="history_product"
+            )
+            history_type = st.selectbox(
+                "種別", ["すべて", "入庫", "出庫"], key="history_type"
+            )
+        with col2:
+            history_range = st.date_input("期間", value=(), key="history_range")
+            history_note = st.text_input("備考に含む文字", key="history_note")
+        with col3:
+            history_sort = st.selectbox(
+                "並べ替え", list(HISTORY_SORTS), key="history_sort"
+            )
+            page_size = st.selectbox(
+                "1ページの件数", [25, 50, 100, 200], index=1, key="history_page_size"
+            )
+        lap("filters")
+
+        since = until = None
+        if len(history_range) == 2:
+            since = datetime.combine(history_range[0], datetime.min.time())
+            until = datetime.combine(
+                history_range[1] + timedelta(days=1), datetime.min.time()
+            )
+        sort_column, descending = HISTORY_SORTS[history_sort]
+        filters = (
+            None if history_product == "すべて" else history_product,
+            None if history_type == "すべて" else history_type,
+            since,
+            until,
+            history_note or None,
+            sort_column,
+            descending,
+        )
+
+        # 条件が変わったら1ページ目に戻す
+        if st.session_state.get("history_filters") != (filters, page_size):
+            st.session_state.history_filters = (filters, page_size)
+            st.session_state.history_page = 1
+
+        def load_history_page(page):
+            return store.transaction_page(
+                page,
+                page_size,
+                filters[0],
+                filters[1],
+                since,
+                until,
+                filters[4],
+                sort_column,
+                descending,
+            )
+
+        _, total = cached(
+            "history_page",
+            ["ledger"],
+            lambda: load_history_page(1),
+            filters,
+            page_size,
+            1,
+        )
+        page_count = max((total + page_size - 1) // page_size, 1)
+        page = st.number_input(
+            "ページ", min_value=1, max_value=page_count, step=1, key="history_page"
+        )
+        page_df, total = cached(
+            "history_page",
+            ["ledger"],
+            lambda: load_history_page(page),
+            filters,
+            page_size,
+            page,
+        )
+        lap("history_page")
+
+        st.caption(
+            f"{total}件中 {min((page - 1) * page_size + 1, total)}〜"
+            f"{min(page * page_size, total)}件目（{page}/{page_count}ページ）"
+        )
+        if total:
+            st.dataframe(
+                page_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={"datetime": DATETIME_COLUMN},
+            )
+            lap("render:history_page")
+        else:
+            st.info("条件に合う入出庫履歴はありません")
+
+    history_view()
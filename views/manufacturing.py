@@ -0,0 +1,187 @@
+"""製造担当画面（在庫状況・需要予測と入庫の登録）"""
+
+from datetime import datetime, timedelta
+
+import streamlit as st
+from utils.forecast import cover_table, forecast_demand
+from utils.live import LiveTransactions
+from views.charts import stock_bar_chart
+from views.common import (
+    DATETIME_COLUMN,
+    fragment,
+    live_interval,
+    live_table,
+    rerun_fragment,
+)
+
+# 製造数の目安を出す期間（翌日から何日分の予測出庫をまかなうか）
+TARGET_DAYS = [7, 14, 30]
+
+
+def render(store, cached, lap):
+    """製造担当画面を表示"""
+    st.title("🏗️ 製造担当画面")
+    st.markdown("---")
+
+    # ライブ更新中は一定間隔でデータを表示するブロックを再実行する
+    refresh = live_interval()
+
+    @fragment(run_every=refresh)
+    def manufacturing_stock():
+        # メトリクス表示
+        col1, col2, col3 = st.columns(3)
+
+        total_stock = store.total_stock()
+        today = datetime.now().date()
+        today_start = datetime.combine(today, datetime.min.time())
+        today_receipts = store.total_quantity(type="入庫", since=today_start)
+        # 経過日数が7日以下（8日未満）の入庫
+        week_receipts = store.total_quantity(
+            type="入庫", since=datetime.now() - timedelta(days=8)
+        )
+
+        with col1:
+            st.metric("総在庫数", f"{total_stock}個")
+        with col2:
+            st.metric("本日入庫数", f"{today_receipts}個")
+        with col3:
+            st.metric("今週入庫数", f"{week_receipts}個")
+        lap("metrics")
+
+        st.markdown("---")
+
+        # 製品別在庫状況（棒グラフ）
+        st.subheader("📊 製品別在庫状況")
+
+        products_df = cached("products_table", ["products"], store.products_table)
+        lap("products_df")
+
+        chart = stock_bar_chart(300)
+        lap("stock_bar_chart")
+
+        st.vega_lite_chart(products_df, chart, use_container_width=True)
+        lap("render:stock_bar_chart")
+
+    manufacturing_stock()
+
+    st.markdown("---")
+
+    # 需要予測と在庫日数（予測は出庫があったときと日付が変わったときだけ作り直す）
+    @fragment(run_every=refresh)
+    def manufacturing_forecast():
+        st.subheader("📈 需要予測と在庫日数")
+
+        target_days = st.radio(
+            "製造数の目安",
+            TARGET_DAYS,
+            index=1,
+            format_func=lambda days: f"{days}日分",
+            horizontal=True,
+            key="forecast_target_days",
+        )
+
+        today = datetime.now().date()
+        model = cached(
+            "demand_forecast",
+            ["shipments"],
+            lambda: forecast_demand(store, today),
+            today,
+        )
+        lap("demand_forecast")
+
+        forecast_df = cached(
+            "days_of_cover",
+            ["products", "shipments"],
+            lambda: cover_table(model, store.products_table(), target_days),
+            today,
+            target_days,
+        )
+        lap("days_of_cover")
+
+        st.dataframe(
+            forecast_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "name": "製品名",
+                "stock": "在庫数",
+                "daily_demand": st.column_config.NumberColumn(
+                    "予測出庫（日平均）", format="%.1f"
+                ),
+                "days_of_cover": st.column_config.NumberColumn(
+                    "在庫日数", format="%d日"
+                ),
+                "stockout_date": st.column_config.DateColumn(
+                    "在庫切れ予定日", format="YYYY-MM-DD"
+                ),
+                "suggested": st.column_config.NumberColumn(
+                    f"製造数の目安（{target_days}日分）"
+                ),
+            },
+            height=300,
+        )
+        st.caption(
+            "直近12週の出庫から曜日ごとの出庫数を予測しています。在庫日数が空の製品は出庫の予測がありません。"
+        )
+        lap("render:days_of_cover")
+
+    manufacturing_forecast()
+
+    st.markdown("---")
+
+    # 2カラム：入庫フォームと履歴
+    col1, col2 = st.columns(2)
+
+    # 入庫フォーム（送信・登録ではこのブロックだけ再実行。在庫・履歴の
+    # ブロックはライブ更新か次の操作で更新され、登録後の在庫数は通知で示す）
+    @fragment
+    def manufacturing_form():
+        st.subheader("➕ 入庫登録")
+        with st.form("manufacturing_receipt_form"):
+            receipt_product = st.selectbox(
+                "製品を選択", store.product_names(), key="mfg_receipt_product"
+            )
+            receipt_quantity = st.number_input(
+                "入庫数", min_value=1, value=10, step=1, key="mfg_receipt_quantity"
+            )
+            receipt_note = st.text_input(
+                "備考（任意）", key="mfg_receipt_note", value="製造完了分"
+            )
+            receipt_submit = st.form_submit_button("入庫を登録")
+
+            if receipt_submit:
+                # 在庫更新と履歴追加
+                store.receive(receipt_product, receipt_quantity, receipt_note)
+
+                stock = store.product(receipt_product)["stock"]
+                st.toast(
+                    f"✅ {receipt_product}を{receipt_quantity}個入庫しました"
+                    f"（在庫: {stock}個）"
+                )
+                rerun_fragment()
+
+    with col1:
+        manufacturing_form()
+    lap("forms")
+
+    @fragment(run_every=refresh)
+    def manufacturing_receipts():
+        st.subheader("📥 最近の入庫履歴")
+
+        receipts_df = live_table(store, LiveTransactions, 10, None, "入庫")
+        lap("recent_receipts")
+
+        if receipts_df.num_rows:
+            st.dataframe(
+                receipts_df.select(["datetime", "product", "quantity", "note"]),
+                use_container_width=True,
+                hide_index=True,
+                column_config={"datetime": DATETIME_COLUMN},
+                height=300,
+            )
+            lap("render:recent_receipts")
+        else:
+            st.info("入庫履歴はまだありません")
+
+    with col2:
+        manufacturing_receipts()
@@ -0,0 +1,243 @@
+"""製品詳細（在庫数の推移・入出庫履歴・関連注文とクイック操作）"""
+
+import streamlit as st
+from utils.downsample import DEFAULT_TARGET_POINTS
+from utils.storage import InsufficientStockError
+from views.charts import stock_line_chart
+from views.common import DATETIME_COLUMN, fragment, live_interval, rerun_fragment
+
+
+def render(store, cached, lap):
+    """製品詳細を表示（製品はサイドバーで選ぶ）"""
+    st.sidebar.markdown("---")
+    selected_product = st.sidebar.selectbox("製品を選択", store.product_names())
+    st.title(f"🔍 製品詳細: {selected_product}")
+    st.markdown("---")
+
+    def load_product_transactions():
+        # 製品関連のトランザクション
+        return cached(
+            "product_transactions",
+            ["ledger"],
+            lambda: store.transaction_table(product=selected_product, limit=8),
+            selected_product,
+        )
+
+    # ライブ更新中は在庫数・履歴・注文のブロックを一定間隔で再実行する
+    # （在庫数推移のグラフは製品の履歴全体から作るので、操作したときだけ更新）
+    refresh = live_interval()
+
+    @fragment(run_every=refresh)
+    def product_summary():
+        # 上段左：メトリクス（ライブ更新の対象）
+        product_info = store.product(selected_product)
+        pending_quantity = store.order_quantity("未出荷", selected_product)
+        lap("product_data")
+
+        top_col1, top_col2 = st.columns(2)
+
+        with top_col1:
+            st.metric("現在庫数", f"{product_info['stock']}{product_info['unit']}")
+            # 過去の時点の在庫数（台帳のチェックポイントから求める）
+            stock_date = st.date_input(
+                "指定日の在庫数", value=None, key="stock_at_date"
+            )
+            if stock_date is not None:
+                past_stock = store.stock_at(selected_product, stock_date)
+                st.caption(f"{stock_date} 終了時点: {past_stock}{product_info['unit']}")
+
+        with top_col2:
+            st.metric("未出荷注文数", f"{pending_quantity}{product_info['unit']}")
+        lap("metrics")
+
+    @fragment
+    def product_actions():
+        # 上段右：クイック操作（入力中に再実行されないようライブ更新の対象外。
+        # ダイアログの開閉はこのブロックだけ再実行）
+        product_info = store.product(selected_product)
+
+        quick_col1, quick_col2 = st.columns(2)
+        with quick_col1:
+            if st.button(
+                "➕ 入庫", use_container_width=True, key="open_receipt_dialog"
+            ):
+                st.session_state.show_receipt_dialog = True
+
+        with quick_col2:
+            if st.button(
+                "➖ 出庫", use_container_width=True, key="open_shipment_dialog"
+            ):
+                st.session_state.show_shipment_dialog = True
+
+        # ダイアログ：入庫登録
+        if st.session_state.get("show_receipt_dialog", False):
+            with st.form("receipt_dialog_form"):
+                st.subheader("入庫登録")
+                receipt_qty = st.number_input(
+                    "数量", min_value=1, value=10, key="dialog_receipt_qty"
+                )
+                receipt_note = st.text_input("備考", key="dialog_receipt_note")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.form_submit_button("登録", use_container_width=True):
+                        store.receive(selected_product, receipt_qty, receipt_note)
+                        st.session_state.show_receipt_dialog = False
+                        # このブロックだけ再実行し、登録後の在庫数は通知で示す
+                        # （在庫数・グラフ・履歴はライブ更新か次の操作で更新）
+                        stock = store.product(selected_product)["stock"]
+                        st.toast(
+                            f"✅ {receipt_qty}{product_info['unit']}入庫しました"
+                            f"（在庫: {stock}{product_info['unit']}）"
+                        )
+                        rerun_fragment()
+                with col2:
+                    if st.form_submit_button("キャンセル", use_container_width=True):
+                        st.session_state.show_receipt_dialog = False
+                        rerun_fragment()
+
+        # ダイアログ：出庫登録
+        if st.session_state.get("show_shipment_dialog", False):
+            with st.form("shipment_dialog_form"):
+                st.subheader("出庫登録")
+                shipment_qty = st.number_input(
+                    f"数量（在庫: {product_info['stock']}{product_info['unit']}）",
+                    min_value=1,
+                    max_value=product_info["stock"] if product_info["stock"] > 0 else 1,
+                    value=(
+                        min(10, product_info["stock"])
+                        if product_info["stock"] > 0
+                        else 1
+                    ),
+                    key="dialog_shipment_qty",
+                )
+                shipment_note = st.text_input("備考", key="dialog_shipment_note")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.form_submit_button("登録", use_container_width=True):
+                        try:
+                            store.ship(selected_product, shipment_qty, shipment_note)
+                        except InsufficientStockError:
+                            st.error("❌ 在庫不足です")
+                        else:
+                            st.session_state.show_shipment_dialog = False
+                            stock = store.product(selected_product)["stock"]
+                            st.toast(
+                                f"✅ {shipment_qty}{product_info['unit']}出庫しました"
+                                f"（在庫: {stock}{product_info['unit']}）"
+                            )
+                            rerun_fragment()
+                with col2:
+                    if st.form_submit_button("キャンセル", use_container_width=True):
+                        st.session_state.show_shipment_dialog = False
+                        rerun_fragment()
+        lap("forms")
+
+    @fragment
+    def product_stock_chart():
+        # 在庫数推移（期間・点数の変更はこのブロックだけ再実行）
+        st.subheader("📈 在庫数推移")
+
+        if load_product_transactions().num_rows:
+            # 在庫数の推移（製品ごとにメモ化済み）
+            stock_df = store.stock_history(selected_product)
+            lap("stock_history")
+
+            # 表示期間と表示点数
+            first_date = stock_df["datetime"].iloc[0].date()
+            last_date = stock_df["datetime"].iloc[-1].date()
+            range_col, points_col = st.columns(2)
+            with range_col:
+                date_range = st.date_input(
+                    "表示期間",
+                    value=(first_date, last_date),
+                    min_value=first_date,
+                    max_value=last_date,
+                    key="stock_history_range",
+                )
+            with points_col:
+                target_points = st.select_slider(
+                    "最大表示点数",
+                    options=[100, 250, 500, 1000, 2000],
+                    value=DEFAULT_TARGET_POINTS,
+                    key="stock_history_points",
+                )
+            if len(date_range) != 2:
+                date_range = (first_date, last_date)
+
+            chart_df, line_chart = cached(
+                "stock_line_chart",
+                ["ledger"],
+                lambda: stock_line_chart(stock_df, date_range, target_points),
+                selected_product,
+                tuple(date_range),
+                target_points,
+            )
+            lap("stock_line_chart")
+            st.vega_lite_chart(chart_df, line_chart, use_container_width=True)
+            lap("render:stock_line_chart")
+        else:
+            st.info("まだ入出庫の履歴がありません")
+
+    @fragment(run_every=refresh)
+    def product_history():
+        st.subheader("📜 入出庫履歴")
+
+        trans_df = load_product_transactions()
+        if trans_df.num_rows:
+            st.dataframe(
+                trans_df.select(["datetime", "type", "quantity", "note"]),
+                use_container_width=True,
+                hide_index=True,
+                column_config={"datetime": DATETIME_COLUMN},
+                height=250,
+            )
+            lap("render:product_transactions")
+        else:
+            st.info("まだ入出庫の履歴がありません")
+
+    @fragment(run_every=refresh)
+    def product_orders_table():
+        # 下段：関連注文
+        st.subheader("📋 関連注文")
+
+        # 注文の取り出しも含めてキャッシュし、注文が変わらない再実行では読み直さない
+        orders_df = cached(
+            "product_orders_table",
+            ["orders"],
+            lambda: store.orders_table(product=selected_product),
+            selected_product,
+        )
+        lap("product_orders_table")
+        if orders_df.num_rows:
+            st.dataframe(
+                orders_df.select(["customer", "quantity", "delivery_date", "status"]),
+                use_container_width=True,
+                hide_index=True,
+                height=200,
+            )
+            lap("render:product_orders_table")
+        else:
+            st.info("この製品の注文はありません")
+
+    # 選択した製品が登録されている場合だけ表示
+    if store.product(selected_product):
+        summary_col, actions_col = st.columns([4, 3])
+        with summary_col:
+            product_summary()
+        with actions_col:
+            product_actions()
+
+        st.markdown("---")
+
+        # 中段：グラフと入出庫履歴（2カラム）
+        mid_col1, mid_col2 = st.columns([3, 2])
+        with mid_col1:
+            product_stock_chart()
+        with mid_col2:
+            product_history()
+
+        st.markdown("---")
+
+        product_orders_table()
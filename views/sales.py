@@ -0,0 +1,167 @@
+"""営業担当画面（注文一覧と納期予定）"""
+
+from datetime import datetime
+
+import pyarrow as pa
+
+import streamlit as st
+from utils.live import LiveOrders
+from utils.orders import order_table
+from views.common import fragment, live_interval, live_table
+
+# 納期予定の表示範囲（日数、None はすべて）
+DUE_RANGES = {"すべて": None, "納期超過": 0, "7日以内": 7, "30日以内": 30}
+
+
+def render(store, cached, lap):
+    """営業担当画面を表示"""
+    st.title("💼 営業担当画面")
+    st.markdown("---")
+
+    # ライブ更新中は一定間隔でデータを表示するブロックを再実行する
+    refresh = live_interval()
+
+    @fragment(run_every=refresh)
+    def sales_orders():
+        # メトリクス表示
+        col1, col2, col3 = st.columns(3)
+
+        total_orders = store.order_count()
+        pending_orders = store.order_count("未出荷")
+        shipped_orders = store.order_count("出荷済み")
+
+        with col1:
+            st.metric("総注文数", f"{total_orders}件")
+        with col2:
+            st.metric("未出荷", f"{pending_orders}件")
+        with col3:
+            st.metric("出荷済み", f"{shipped_orders}件")
+        lap("metrics")
+
+        st.markdown("---")
+
+        # 注文一覧
+        st.subheader("📋 注文一覧")
+
+        # ステータス別にタブ表示
+        tab1, tab2, tab3 = st.tabs(["すべて", "未出荷", "出荷済み"])
+
+        with tab1:
+            orders_df = live_table(store, LiveOrders)
+            lap("orders_table")
+            st.dataframe(
+                orders_df, use_container_width=True, hide_index=True, height=300
+            )
+            lap("render:orders_table")
+
+        with tab2:
+            if pending_orders:
+                pending_df = live_table(store, LiveOrders, "未出荷")
+                lap("orders_table")
+                st.dataframe(
+                    pending_df, use_container_width=True, hide_index=True, height=300
+                )
+                lap("render:orders_table")
+            else:
+                st.info("未出荷の注文はありません")
+
+        with tab3:
+            if shipped_orders:
+                shipped_df = live_table(store, LiveOrders, "出荷済み")
+                lap("orders_table")
+                st.dataframe(
+                    shipped_df, use_container_width=True, hide_index=True, height=300
+                )
+                lap("render:orders_table")
+            else:
+                st.info("出荷済みの注文はありません")
+
+    sales_orders()
+
+    st.markdown("---")
+
+    # 2カラム：製品別在庫と納期カレンダー
+    col1, col2 = st.columns(2)
+
+    @fragment(run_every=refresh)
+    def sales_products():
+        st.subheader("📦 製品別在庫状況")
+
+        def build_products_pending():
+            products_df = store.products_table()
+
+            # 各製品の未出荷注文数（注文索引の製品別集計から）
+            pending_by_product = store.pending_by_product()
+            pending = [
+                pending_by_product.get(name, 0)
+                for name in products_df["name"].to_pylist()
+            ]
+            return products_df.append_column("pending", pa.array(pending, pa.int64()))
+
+        products_df = cached(
+            "products_pending", ["products", "orders"], build_products_pending
+        )
+        lap("products_pending")
+
+        st.dataframe(
+            products_df.select(["name", "stock", "pending", "unit"]),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "name": "製品名",
+                "stock": "在庫数",
+                "pending": "未出荷数",
+                "unit": "単位",
+            },
+            height=300,
+        )
+        lap("render:products_pending")
+
+    # 納期予定（表示範囲の切り替えはこのブロックだけ再実行）
+    @fragment(run_every=refresh)
+    def delivery_schedule():
+        st.subheader("📅 納期予定")
+
+        due_range = st.radio(
+            "表示範囲", list(DUE_RANGES), horizontal=True, key="due_range"
+        )
+        due_days = DUE_RANGES[due_range]
+        today = datetime.now().date()
+
+        def build_delivery_df():
+            if due_range == "すべて":
+                rows = store.pending_orders_by_date()
+            elif due_range == "納期超過":
+                rows = store.overdue_orders(today)
+            else:
+                rows = store.orders_due_within(due_days, today)
+            return order_table(rows)
+
+        # 未出荷注文（納期順）
+        delivery_df = cached(
+            "delivery_schedule", ["orders"], build_delivery_df, due_range, today
+        )
+        lap("delivery_schedule")
+        if len(delivery_df):
+            st.dataframe(
+                delivery_df.select(
+                    ["delivery_date", "customer", "product", "quantity"]
+                ),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "delivery_date": "納期",
+                    "customer": "顧客",
+                    "product": "製品",
+                    "quantity": "数量",
+                },
+                height=300,
+            )
+            lap("render:delivery_schedule")
+        else:
+            st.info("納期予定はありません")
+
+    with col1:
+        sales_products()
+    with col2:
+        delivery_schedule()
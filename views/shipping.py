@@ -0,0 +1,116 @@
+"""出荷担当画面（未出荷注文と本日の出庫）"""
+
+from datetime import datetime
+
+import streamlit as st
+from utils.live import LiveTransactions
+from utils.orders import order_table
+from views.common import DATETIME_COLUMN, fragment, live_interval, live_table
+
+# 未出荷注文リストに出す件数（納期の早い順）
+PENDING_LIST_LIMIT = 100
+
+
+def render(store, cached, lap):
+    """出荷担当画面を表示"""
+    st.title("📦 出荷担当画面")
+    st.markdown("---")
+
+    # ライブ更新中は一定間隔でこのブロックを再実行する
+    @fragment(run_every=live_interval())
+    def shipping_view():
+        # メトリクス表示
+        col1, col2, col3, col4 = st.columns(4)
+
+        pending_count = store.order_count("未出荷")
+        today = datetime.now().date()
+        today_start = datetime.combine(today, datetime.min.time())
+        today_shipments = store.total_quantity(type="出庫", since=today_start)
+        total_pending_qty = store.order_quantity("未出荷")
+        overdue_count = cached(
+            "overdue_count", ["orders"], lambda: len(store.overdue_orders(today)), today
+        )
+
+        with col1:
+            st.metric("未出荷注文", f"{pending_count}件")
+        with col2:
+            st.metric("未出荷数量", f"{total_pending_qty}個")
+        with col3:
+            st.metric("本日出庫数", f"{today_shipments}個")
+        with col4:
+            st.metric("納期超過", f"{overdue_count}件")
+        lap("metrics")
+
+        st.markdown("---")
+
+        # 未出荷注文リスト（優先表示）
+        st.subheader("📦 未出荷注文リスト")
+
+        if pending_count:
+            # 納期の早い順に先頭だけ取り出す（納期キューで保持済み）
+            orders_df = cached(
+                "pending_orders_by_date",
+                ["orders"],
+                lambda: order_table(store.pending_orders_by_date(PENDING_LIST_LIMIT)),
+                PENDING_LIST_LIMIT,
+            )
+            lap("pending_orders_by_date")
+            if pending_count > PENDING_LIST_LIMIT:
+                st.caption(
+                    f"納期の早い {PENDING_LIST_LIMIT}件を表示（全{pending_count}件）"
+                )
+
+            st.dataframe(
+                orders_df, use_container_width=True, hide_index=True, height=300
+            )
+            lap("render:pending_orders_by_date")
+        else:
+            st.info("未出荷の注文はありません")
+
+        st.markdown("---")
+
+        # 2カラム：在庫状況と出庫履歴
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("📊 製品在庫状況")
+            # 在庫が少ない順にソート
+            products_df_sorted = cached(
+                "products_by_stock",
+                ["products"],
+                lambda: store.products_table().sort_by("stock"),
+            )
+            lap("products_by_stock")
+
+            st.dataframe(
+                products_df_sorted,
+                use_container_width=True,
+                hide_index=True,
+                height=300,
+            )
+            lap("render:products_by_stock")
+
+        with col2:
+            st.subheader("📤 本日の出庫履歴")
+
+            # 本日の出庫（追加された入出庫の分だけを反映）
+            today_shipments_df = live_table(
+                store, LiveTransactions, None, None, "出庫", today_start
+            )
+            lap("today_shipments")
+
+            if today_shipments_df.num_rows:
+                st.dataframe(
+                    today_shipments_df.select(
+                        ["datetime", "product", "quantity", "note"]
+                    ),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={"datetime": DATETIME_COLUMN},
+                    height=300,
+                )
+                lap("render:today_shipments")
+            else:
+                st.info("本日の出庫履歴はまだありません")
+
+    shipping_view()